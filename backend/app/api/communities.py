@@ -1,30 +1,49 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, WebSocket
+import asyncio
 from pydantic import BaseModel
 from uuid import UUID
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.models.community import Community
+from app.core.database import get_async_db
 from app.schemas.community import CommunityCreate, CommunityResponse
 import uuid
 from datetime import datetime, timezone
-from supabase import Client
-from typing import List
+from postgrest import AsyncPostgrestClient
+from typing import Optional
 from postgrest import APIError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+import logging
+import orjson
+from app.core.leaderboard import leaderboards
+from app.core.replication import replicator
+from app.services import community_service
+from app.core.http_cache import conditional_response, row_version
+from app.config import settings
+from app.services.sticker_service import iter_sticker_pages, list_stickers
+from app.core.pagination import decode_cursor
+from app.core.broker import broker, community_topic
+from app.core.admission import write_limiter
+from app.core.resilience import clear_deadline
+from app.core.responses import many_response, select_list, split_ids
+from app.schemas.user import ProfileResponse
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Taille de page des membres quand seul cursor est fourni
+MEMBERS_PAGE_SIZE = 100
+
 class JoinRequest(BaseModel):
     user_id: UUID
 
 @router.post("/", response_model=CommunityResponse)
-def create_community(community: CommunityCreate, supabase: Client = Depends(get_db)):
+async def create_community(community: CommunityCreate, supabase: AsyncPostgrestClient = Depends(get_async_db)):
     """
-    Crée une communauté et met à jour :
+    Crée une communauté et met à jour, dans une seule transaction côté Postgres :
     1. La table communities avec la nouvelle communauté
     2. La table user_communities pour le créateur
     3. La table profiles pour mettre à jour le community_id et is_admin du créateur
     """
+    write_limiter.check(str(community.admin_id))
     community_id = str(uuid.uuid4())
     created_at = datetime.now(timezone.utc).isoformat()
 
@@ -37,67 +56,189 @@ def create_community(community: CommunityCreate, supabase: Client = Depends(get_
         "created_at": created_at
     }
 
-    # Insertion dans la table communities
-    response = supabase.table("communities").insert(data).execute()
-    if not response.data:
-        raise HTTPException(status_code=400, detail=f"Erreur lors de la création de la communauté: {response}")
-
-    # Insertion dans la table user_communities
-    membership_data = {
-        "user_id": str(community.admin_id),
-        "community_id": community_id,
-        "joined_at": created_at
-    }
-    mem_response = supabase.table("user_communities").insert(membership_data).execute()
-    if not mem_response.data:
-        raise HTTPException(status_code=400, detail="Communauté créée mais erreur lors de l'ajout du membre")
-
-    # Mise à jour du profil de l'utilisateur avec le community_id et is_admin
-    profile_response = supabase.table("profiles") \
-        .update({
-            "community_id": community_id,
-            "is_admin": True
-        }) \
-        .eq("auth_id", str(community.admin_id)) \
-        .execute()
-    
-    if not profile_response.data:
-        raise HTTPException(
-            status_code=400,
-            detail="Erreur lors de la mise à jour du profil administrateur"
-        )
-
+    # communauté + appartenance du créateur + profil admin, en une transaction
+    await community_service.create_community(supabase, data)
     return CommunityResponse(**data)
 
 
+@router.get("")
+@router.get("/", include_in_schema=False)
+async def get_communities(
+    ids: str = Query(..., description="Ids des communautés, séparés par des virgules"),
+    supabase: AsyncPostgrestClient = Depends(get_async_db),
+):
+    """
+    Lecture groupée : {"items": [...], "missing": [...]}, dans l'ordre des ids
+    demandés (null pour une communauté introuvable). Une requête au plus (cache d'abord).
+    """
+    try:
+        wanted = split_ids(ids, settings.MULTI_GET_MAX_IDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    found = await community_service.get_communities_many(supabase, wanted)
+    return many_response(wanted, found)
+
 @router.get("/{community_id}")
-def get_community(community_id: UUID, supabase: Client = Depends(get_db)):
+async def get_community(community_id: UUID, request: Request, supabase: AsyncPostgrestClient = Depends(get_async_db)):
     """
     Récupère une communauté par son ID.
-    Renvoie au minimum { id, name } en 200, ou 404 si introuvable.
+    Renvoie au minimum { id, name } en 200 (ETag + Cache-Control, 304 si inchangée),
+    ou 404 si introuvable.
     """
     try:
-        res = (
-            supabase.table("communities")
-            .select("id,name,description,created_at")  # adapte les colonnes
-            .eq("id", str(community_id))
-            .single()
-            .execute()
-        )
-        if not res.data:
+        community = await community_service.get_community(supabase, str(community_id))
+        if not community:
             raise HTTPException(status_code=404, detail="Communauté introuvable")
-        return res.data
+        return conditional_response(
+            request, community, settings.HTTP_CACHE_COMMUNITY, key=("community", str(community_id)),
+            version=row_version([community], "id"),
+        )
     except HTTPException:
         raise
     except Exception as e:
         # Toujours renvoyer du JSON (Krakend n’aime pas les bodies vides)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/{community_id}/leaderboard")
+async def get_community_leaderboard(community_id: UUID, top: int = Query(10, ge=1, le=100)):
+    """
+    Top K des membres d'une communauté par score, servi depuis le classement
+    en mémoire du worker (aucun appel à Supabase).
+    """
+    replicator.check_ready()
+    return {
+        "community_id": str(community_id),
+        "leaderboard": leaderboards.community(str(community_id)).top(top),
+    }
+
+@router.get("/{community_id}/stickers")
+async def get_community_stickers(
+    community_id: UUID,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Curseur opaque renvoyé par la page précédente"),
+    offset: Optional[int] = Query(None, ge=0, description="Repli : pagination par offset"),
+    supabase: AsyncPostgrestClient = Depends(get_async_db),
+):
+    """
+    Stickers d'une communauté, du plus récent au plus ancien.
+    Pagination par clé (cursor) par défaut, par offset si `offset` est fourni sans `cursor`.
+    Renvoie {"items": [...], "next_cursor": "..." | null}.
+    """
+    if cursor is None and offset is None:
+        cursor = ""
+    try:
+        items, next_cursor = await list_stickers(
+            supabase, "community_id", str(community_id), limit, offset=offset or 0, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except APIError as e:
+        raise HTTPException(status_code=400, detail=e.message or "Query failed")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    # lignes brutes de la base : encodées directement, sans jsonable_encoder
+    return ORJSONResponse({"items": items, "next_cursor": next_cursor})
+
+async def _sticker_stream(request: Request, supabase, community_id: str, cursor: str, sse: bool):
+    # une page Supabase à la fois ; arrêt dès que le client s'est déconnecté
+    # flux long : pas d'échéance globale, seul le délai par appel s'applique
+    clear_deadline()
+    if sse:
+        yield b": stream\n\n"  # premier octet immédiat, avant le premier aller-retour
+    count = 0
+    try:
+        async for rows, next_cursor in iter_sticker_pages(
+            supabase, "community_id", community_id,
+            settings.STREAM_PAGE_SIZE, settings.STREAM_FIRST_PAGE_SIZE, cursor,
+        ):
+            count += len(rows)
+            if sse:
+                chunk = b"".join(b"data: " + orjson.dumps(row) + b"\n\n" for row in rows[:-1])
+                # id = curseur de reprise (Last-Event-ID) après la dernière ligne de la page
+                resume = f"id: {next_cursor}\n".encode() if next_cursor else b""
+                yield chunk + resume + b"data: " + orjson.dumps(rows[-1]) + b"\n\n"
+            else:
+                yield b"".join(orjson.dumps(row) + b"\n" for row in rows)
+            if await request.is_disconnected():
+                return
+    except Exception:
+        # en-têtes déjà envoyés : on ne peut plus changer le statut, on termine le flux
+        logger.exception("Flux des stickers de la communauté %s interrompu", community_id)
+        if sse:
+            yield b"event: error\ndata: {}\n\n"
+        return
+    if sse:
+        yield b"event: end\ndata: " + orjson.dumps({"count": count}) + b"\n\n"
+
+@router.get("/{community_id}/stickers/stream")
+async def stream_community_stickers(
+    community_id: UUID,
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|sse)$", description="ndjson (défaut) ou sse"),
+    cursor: Optional[str] = Query(None, description="Curseur de reprise (ou en-tête Last-Event-ID)"),
+    supabase: AsyncPostgrestClient = Depends(get_async_db),
+):
+    """
+    Tous les stickers d'une communauté, du plus récent au plus ancien, en flux :
+    NDJSON (une ligne JSON par sticker) ou Server-Sent Events (format=sse ou
+    Accept: text/event-stream). Les pages Supabase sont envoyées au fil de l'eau,
+    la mémoire reste constante quelle que soit la taille de la communauté.
+    """
+    sse = format == "sse" or (format is None and "text/event-stream" in request.headers.get("accept", ""))
+    cursor = cursor or request.headers.get("last-event-id") or ""
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        _sticker_stream(request, supabase, str(community_id), cursor, sse),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/{community_id}/ws")
+async def community_events(websocket: WebSocket, community_id: UUID):
+    """
+    Flux temps réel des stickers ajoutés / supprimés dans la communauté.
+    Chaque message est un tableau JSON d'événements {"type": "sticker.added" |
+    "sticker.removed", "sticker": {...}} (diffusion par lots). Une connexion
+    qui ne suit pas (file pleine) est fermée avec le code 1013.
+    """
+    await websocket.accept()
+    sub = broker.subscribe(community_topic(str(community_id)))
+
+    async def forward():
+        while True:
+            batch = await sub.get()
+            if batch is None:
+                await websocket.close(code=1013, reason="Client trop lent")
+                return
+            await websocket.send_text(orjson.dumps(batch).decode())
+
+    async def drain():
+        # messages du client ignorés ; sert à détecter la déconnexion
+        while True:
+            await websocket.receive_text()
+
+    tasks = [asyncio.ensure_future(forward()), asyncio.ensure_future(drain())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled():
+                task.exception()  # déconnexion du client : rien à signaler
+    finally:
+        for task in tasks:
+            task.cancel()
+        broker.unsubscribe(sub)
+
 @router.post("/{community_id}/join")
-def join_community(
+async def join_community(
     community_id: UUID,
     req: JoinRequest,
-    supabase: Client = Depends(get_db),
+    supabase: AsyncPostgrestClient = Depends(get_async_db),
 ):
     """
     Permet à un utilisateur de rejoindre une communauté.
@@ -106,129 +247,86 @@ def join_community(
     """
     user_id = str(req.user_id)
     community_id_str = str(community_id)
-
-    data = {
-        "user_id": user_id,
-        "community_id": community_id_str,
-        "joined_at": datetime.now(timezone.utc).isoformat(),
-    }
+    write_limiter.check(user_id)
 
     try:
-        # 🔹 1. Ajout dans la table de relation
-        supabase.table("user_communities").insert(data).execute()
-
-        # 🔹 2. Update du profile pour stocker la communauté active
-        supabase.table("profiles").update({"community_id": community_id_str}).eq("auth_id", user_id).execute()
-
-    except APIError as e:
-        raise HTTPException(status_code=400, detail=e.message or "Insert failed")
+        # ajout dans user_communities + communauté active du profil, en une transaction
+        await community_service.join_community(supabase, community_id_str, user_id)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
     return JSONResponse(status_code=200, content={"ok": True, "community_id": community_id_str})
 
 @router.delete("/{community_id}/quit")
-def quit_community(community_id: str, user_id: str, supabase: Client = Depends(get_db)):
+async def quit_community(community_id: str, user_id: str, supabase: AsyncPostgrestClient = Depends(get_async_db)):
     """
-    Permet à un utilisateur de quitter une communauté et met à jour son profil.
-    1. Supprime l'entrée dans user_communities
+    Permet à un utilisateur de quitter une communauté et met à jour son profil,
+    dans une seule transaction :
+    1. Supprime l'entrée dans user_communities (404 si l'utilisateur n'est pas membre)
     2. Met à jour le community_id du profil à null
     """
-    # Supprime l'utilisateur de la communauté
-    response = supabase.table("user_communities") \
-        .delete() \
-        .eq("community_id", community_id) \
-        .eq("user_id", user_id) \
-        .execute()
-        
-    if not response.data:
-        raise HTTPException(
-            status_code=response.status_code,
-            detail="Erreur lors de la suppression de l'utilisateur de la communauté"
-        )
-
-    # Met à jour le profil de l'utilisateur (community_id à null)
-    profile_response = supabase.table("profiles") \
-        .update({"community_id": None}) \
-        .eq("auth_id", str(user_id)) \
-        .execute()
-
-    if not profile_response.data:
-        raise HTTPException(
-            status_code=400,
-            detail="L'utilisateur a quitté la communauté mais erreur lors de la mise à jour du profil"
-        )
-
+    write_limiter.check(user_id)
+    await community_service.quit_community(supabase, community_id, user_id)
     return {"message": "Vous avez quitté la communauté avec succès"}
 
 @router.delete("/{community_id}/kick")
-def kick_user(community_id: str, admin_id: str, user_id: str, supabase: Client = Depends(get_db)):
+async def kick_user(community_id: str, admin_id: str, user_id: str, supabase: AsyncPostgrestClient = Depends(get_async_db)):
     """
-    Permet à l'administrateur d'une communauté d'expulser un utilisateur.
-    1. Vérifie les droits de l'admin
+    Permet à l'administrateur d'une communauté d'expulser un utilisateur,
+    dans une seule transaction :
+    1. Vérifie les droits de l'admin (404 si communauté introuvable, 403 sinon)
     2. Supprime l'utilisateur de la communauté
     3. Met à jour le profil de l'utilisateur expulsé
     """
-    # Vérifier que la communauté existe et récupérer l'admin
-    community_response = supabase.table("communities").select("admin_id").eq("id", community_id).execute()
-    if not community_response.data:
-        raise HTTPException(status_code=404, detail="Communauté introuvable")
-
-    community_admin = community_response.data[0]["admin_id"]
-    if str(community_admin) != str(admin_id):
-        raise HTTPException(status_code=403, detail="Seul l'administrateur peut expulser un utilisateur")
-
-    # Supprimer la relation utilisateur/communauté
-    response = supabase.table("user_communities") \
-        .delete() \
-        .eq("community_id", community_id) \
-        .eq("user_id", user_id) \
-        .execute()
-
-    if not response.data:
-        raise HTTPException(
-            status_code=response.status_code,
-            detail="Erreur lors de l'expulsion de l'utilisateur"
-        )
-
-    # Mettre à jour le profil de l'utilisateur expulsé
-    profile_response = supabase.table("profiles") \
-        .update({"community_id": None}) \
-        .eq("auth_id", str(user_id)) \
-        .execute()
-
-    if not profile_response.data:
-        raise HTTPException(
-            status_code=400,
-            detail="L'utilisateur a été expulsé mais erreur lors de la mise à jour de son profil"
-        )
-
+    write_limiter.check(admin_id)
+    await community_service.kick_user(supabase, community_id, admin_id, user_id)
     return {"message": "L'utilisateur a été expulsé avec succès"}
 
 
 @router.get("/{community_id}/users")
-def get_users_from_community(community_id: str, supabase: Client = Depends(get_db)):
+async def get_users_from_community(
+    community_id: str,
+    request: Request,
+    fields: Optional[str] = Query(None, description="Champs du profil à renvoyer, séparés par des virgules"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Taille de page (100 par défaut avec cursor)"),
+    cursor: Optional[str] = Query(None, description="Curseur opaque (vide = première page)"),
+    count: bool = Query(False, description="Ajoute le nombre total de membres"),
+    supabase: AsyncPostgrestClient = Depends(get_async_db),
+):
     """
-    Récupère tous les profils des utilisateurs d'une communauté spécifique.
-    Retourne une liste de profils.
+    Récupère les profils des utilisateurs d'une communauté, triés sur auth_id :
+    {"community_users": [...], "next_cursor": "..." | null [, "count": n]}
+    (ETag + Cache-Control, 304 si inchangée).
+    Sans limit ni cursor : tous les membres (next_cursor null). Avec l'un des
+    deux : pages de limit membres (100 par défaut), suivantes via next_cursor.
+    `fields` limite les colonnes lues et renvoyées (auth_id et updated_at toujours inclus).
     """
     try:
-        # Vérifie si la communauté existe
-        community_response = supabase.table("communities") \
-            .select("id") \
-            .eq("id", community_id) \
-            .execute()
-
-        if not community_response.data:
-            raise HTTPException(status_code=404, detail="Communauté introuvable")
-
-        # Récupère les profils des utilisateurs dans cette communauté
-        users_response = supabase.table("profiles") \
-            .select("*") \
-            .eq("community_id", community_id) \
-            .execute()
-
-        return { "community_users": users_response.data }
+        columns = select_list(ProfileResponse, fields, always=("auth_id", "updated_at"))
+        # None : la communauté n'existe pas
+        if limit is None and cursor is None:
+            page = await community_service.list_members(supabase, community_id, columns, None, "", count)
+        else:
+            page = await community_service.list_members(
+                supabase, community_id, columns, limit or MEMBERS_PAGE_SIZE, cursor or "", count
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except APIError as e:
+        raise HTTPException(status_code=400, detail=e.message or "Query failed")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
+    if page is None:
+        raise HTTPException(status_code=404, detail="Communauté introuvable")
 
+    try:
+        version = row_version(
+            page["community_users"], "auth_id", columns, limit, cursor, page["next_cursor"], page.get("count")
+        )
+        return conditional_response(request, page, settings.HTTP_CACHE_COMMUNITY_USERS, version=version)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
\ No newline at end of file
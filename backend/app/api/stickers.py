@@ -1,26 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Body, Request
 from fastapi.responses import JSONResponse
 from uuid import UUID, uuid4
-from app.core.database import get_db
-from postgrest.exceptions import APIError
-from supabase import Client
+from typing import Any, Optional
+from pydantic import ValidationError
+from app.core.database import get_async_db
+from postgrest import AsyncPostgrestClient
 from app.models.sticker import StickerCreate
 from app.schemas.sticker import StickerResponse
+from app.core.http_cache import conditional_response, row_version
+from app.core.responses import many_response, split_ids
+from app.core.admission import write_limiter
+from app.services import sticker_service
+from app.services.sticker_service import create_sticker, create_stickers_batch, remove_sticker, get_stickers_by_ids
+from app.core.geo import sticker_index
+from app.core.tiles import sticker_tiles
+from app.core.replication import replicator
+from app.config import settings
 
 router = APIRouter()
 
-@router.post("/", response_model=StickerResponse)
-def add_sticker(sticker: StickerCreate, supabase=Depends(get_db)):
-    community_id = str(sticker.community_id) if isinstance(sticker.community_id, UUID) else str(sticker.community_id or "")
-    auth_id      = str(sticker.auth_id)      if isinstance(sticker.auth_id, UUID)      else str(sticker.auth_id or "")
-
-    if not community_id:
-        raise HTTPException(status_code=400, detail="community_id is required")
-    if not auth_id:
-        raise HTTPException(status_code=400, detail="auth_id is required")
-
-    new_id = str(uuid4())
-    data = {
+def _sticker_data(sticker: StickerCreate, new_id: str, community_id: str, auth_id: str) -> dict:
+    # ligne à insérer dans la table stickers
+    return {
         "id": new_id,
         "community_id": community_id,
         "title": sticker.title.strip(),
@@ -31,49 +32,177 @@ def add_sticker(sticker: StickerCreate, supabase=Depends(get_db)):
         "auth_id": auth_id,
     }
 
-    try:
-        # 1️⃣ insertion du sticker
-        supabase.table("stickers").insert(data).execute()
-
-        # 2️⃣ récupération du profil utilisateur
-        profile_res = supabase.table("profiles").select("total_stickers, score").eq("auth_id", auth_id).single().execute()
-        if not profile_res.data:
-            raise HTTPException(status_code=404, detail="Profil non trouvé")
+@router.post("/", response_model=StickerResponse)
+async def add_sticker(sticker: StickerCreate, supabase=Depends(get_async_db)):
+    community_id = str(sticker.community_id) if isinstance(sticker.community_id, UUID) else str(sticker.community_id or "")
+    auth_id      = str(sticker.auth_id)      if isinstance(sticker.auth_id, UUID)      else str(sticker.auth_id or "")
 
-        current_stickers = profile_res.data.get("total_stickers") or 0
-        current_score = profile_res.data.get("score") or 0
+    if not community_id:
+        raise HTTPException(status_code=400, detail="community_id is required")
+    if not auth_id:
+        raise HTTPException(status_code=400, detail="auth_id is required")
+    write_limiter.check(auth_id)
 
-        # 3️⃣ mise à jour avec +1 et +10
-        supabase.table("profiles").update({
-            "total_stickers": current_stickers + 1,
-            "score": current_score + 10
-        }).eq("auth_id", auth_id).execute()
+    new_id = str(uuid4())
+    data = _sticker_data(sticker, new_id, community_id, auth_id)
 
-    except APIError as e:
-        raise HTTPException(status_code=400, detail=e.message or "Insert failed")
+    try:
+        # insertion du sticker + compteurs du profil (+1 / +10) en un seul appel atomique
+        await create_sticker(supabase, data)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
     return JSONResponse(status_code=200, content={"ok": True, "id": new_id})
 
+@router.post("/batch")
+async def add_stickers_batch(items: list[Any] = Body(...), supabase: AsyncPostgrestClient = Depends(get_async_db)):
+    """
+    Synchronisation groupée des stickers en file d'attente côté client.
+    Chaque élément est validé comme un StickerCreate ; les éléments valides sont
+    insérés en un seul appel et les compteurs mis à jour une fois par auth_id.
+    Le résultat est rapporté élément par élément (même ordre que la requête).
+    """
+    if len(items) > settings.STICKER_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lot trop volumineux : {settings.STICKER_BATCH_MAX_SIZE} stickers maximum",
+        )
+
+    results: list[dict] = [None] * len(items)
+    rows = []
+    for i, item in enumerate(items):
+        try:
+            sticker = StickerCreate.model_validate(item)
+        except ValidationError as e:
+            errors = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            results[i] = {"index": i, "ok": False, "error": errors}
+            continue
+        new_id = str(uuid4())
+        rows.append((i, _sticker_data(sticker, new_id, str(sticker.community_id), str(sticker.auth_id))))
+
+    # un lot compte pour une écriture par auteur
+    for auth_id in {row["auth_id"] for _, row in rows}:
+        write_limiter.check(auth_id)
+
+    inserted_ids = set()
+    if rows:
+        try:
+            result = await create_stickers_batch(supabase, [row for _, row in rows])
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        inserted_ids = {str(s["id"]) for s in result["stickers"]}
+
+    for i, row in rows:
+        if row["id"] in inserted_ids:
+            results[i] = {"index": i, "ok": True, "id": row["id"]}
+        else:
+            results[i] = {"index": i, "ok": False, "error": "Profil ou communauté introuvable"}
+
+    return {
+        "inserted": len(inserted_ids),
+        "failed": len(items) - len(inserted_ids),
+        "results": results,
+    }
+
+async def _with_distances(supabase, hits: list[tuple[float, str]]) -> list[dict]:
+    # hits : [(distance_m, sticker_id)] déjà triés -> lignes complètes dans le même ordre
+    distances = {sid: d for d, sid in hits}
+    rows = await get_stickers_by_ids(supabase, [sid for _, sid in hits])
+    # copies : les lignes peuvent venir du cache des stickers
+    return [{**row, "distance_m": round(distances[str(row["id"])], 1)} for row in rows]
+
+@router.get("/nearby")
+async def get_nearby_stickers(
+    lat: float = Query(..., ge=-90, le=90),
+    long: float = Query(..., ge=-180, le=180),
+    radius: float = Query(1000, gt=0, le=50_000, description="Rayon en mètres"),
+    community_id: Optional[UUID] = None,
+    limit: int = Query(100, ge=1, le=200),
+    supabase: AsyncPostgrestClient = Depends(get_async_db),
+):
+    """
+    Stickers autour d'un point, du plus proche au plus lointain (index spatial en mémoire).
+    """
+    replicator.check_ready()
+    hits = sticker_index.nearby(lat, long, radius, community_id=community_id, limit=limit)
+    return await _with_distances(supabase, hits)
+
+@router.get("/bbox")
+async def get_stickers_in_bbox(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_long: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_long: float = Query(..., ge=-180, le=180),
+    community_id: Optional[UUID] = None,
+    limit: int = Query(100, ge=1, le=200),
+    supabase: AsyncPostgrestClient = Depends(get_async_db),
+):
+    """
+    Stickers contenus dans une boîte lat/long, triés par distance au centre de la boîte.
+    min_long > max_long : boîte à cheval sur l'antiméridien (±180°).
+    """
+    if min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="min_lat doit être inférieur à max_lat")
+    replicator.check_ready()
+    hits = sticker_index.bbox(min_lat, min_long, max_lat, max_long, community_id=community_id, limit=limit)
+    return await _with_distances(supabase, hits)
+
+@router.get("/tiles/{z}/{x}/{y}")
+async def get_sticker_tile(z: int, x: int, y: int):
+    """
+    Densité des stickers pour une tuile de carte (schéma XYZ) : nombre total
+    et clusters (nombre + centroïde), calculés à partir d'agrégats en mémoire.
+    """
+    if not 0 <= z <= sticker_tiles.max_zoom:
+        raise HTTPException(
+            status_code=400,
+            detail=f"z doit être compris entre 0 et {sticker_tiles.max_zoom} (au-delà, utiliser /stickers/bbox)",
+        )
+    n = 1 << z
+    if not (0 <= x < n and 0 <= y < n):
+        raise HTTPException(status_code=400, detail="Tuile hors limites")
+    replicator.check_ready()
+    return sticker_tiles.tile(z, x, y)
+
+@router.get("")
+@router.get("/", include_in_schema=False)
+async def get_stickers(
+    ids: str = Query(..., description="Ids des stickers, séparés par des virgules"),
+    supabase: AsyncPostgrestClient = Depends(get_async_db),
+):
+    """
+    Lecture groupée : {"items": [...], "missing": [...]}, dans l'ordre des ids
+    demandés (null pour un id introuvable). Une requête au plus (cache d'abord).
+    """
+    try:
+        wanted = split_ids(ids, settings.MULTI_GET_MAX_IDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    found = await sticker_service.get_stickers_many(supabase, wanted)
+    return many_response(wanted, found, StickerResponse)
+
 @router.get("/{sticker_id}", response_model=StickerResponse)
-def get_sticker(sticker_id: str, supabase: Client = Depends(get_db)):
+async def get_sticker(sticker_id: str, request: Request, supabase: AsyncPostgrestClient = Depends(get_async_db)):
     """
-    Récupère un sticker par son identifiant
+    Récupère un sticker par son identifiant (ETag + Cache-Control, 304 si inchangé)
     """
-    response = supabase.table("stickers").select("*").eq("id", sticker_id).execute()
-    if not response.data or len(response.data) == 0:
+    row = await sticker_service.get_sticker(supabase, sticker_id)
+    if row is None:
         raise HTTPException(status_code=404, detail="Sticker not found")
-
-    # response.data est une liste, on prend le premier élément
-    return StickerResponse(**response.data[0])
+    # ligne de confiance (base / cache) : pas de revalidation par StickerResponse
+    return conditional_response(
+        request, row, settings.HTTP_CACHE_STICKER, model=StickerResponse, key=("sticker", sticker_id),
+        version=row_version([row], "id"),
+    )
 
 @router.delete("/{sticker_id}")
-def delete_sticker(sticker_id: str, supabase: Client = Depends(get_db)):
+async def delete_sticker(sticker_id: str, supabase: AsyncPostgrestClient = Depends(get_async_db)):
     """
-    Supprime un sticker par son identifiant
+    Supprime un sticker par son identifiant et décrémente les compteurs de son auteur
     """
-    response = supabase.table("stickers").delete().eq("id", sticker_id).execute()
-    if not response.data:
-        raise HTTPException(status_code=response.status_code, detail=str(response.data))
-    return {"message": "Sticker deleted successfully"}
\ No newline at end of file
+    await remove_sticker(supabase, sticker_id)
+    return {"message": "Sticker deleted successfully"}
@@ -1,20 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from app.schemas.user import ProfileResponse, ProfileUpdate
 from app.models.user import ProfileCreate
-from supabase import Client
-from app.core.database import get_db
+from postgrest import AsyncPostgrestClient
+from app.core.database import get_async_db
+from app.services import user_service
 from app.services.user_service import create_profile
+from app.services.sticker_service import list_stickers
 from postgrest.exceptions import APIError
 from uuid import UUID
+from app.core.leaderboard import leaderboards
+from app.core.replication import replicator
+from app.core.http_cache import conditional_response, row_version
+from app.core.responses import many_response, pick, select_list, split_ids
+from app.schemas.sticker import StickerResponse
+from app.config import settings
 
 router = APIRouter()
 
 @router.post("/", response_model=ProfileResponse)
-def create_profile_route(profile: ProfileCreate, supabase: Client = Depends(get_db)):
+async def create_profile_route(profile: ProfileCreate, supabase: AsyncPostgrestClient = Depends(get_async_db)):
     """
     Endpoint pour créer un profil utilisateur.
     """
-    created_profile = create_profile(
+    created_profile = await create_profile(
         supabase,
         auth_id=profile.auth_id,
         username=profile.username,
@@ -27,36 +35,84 @@ from fastapi import APIRouter, Depends, HTTPException
 from typing import Optional
 
 
-@router.get("/{auth_id}", response_model=ProfileResponse)
-def get_profile(auth_id: str, supabase: Client = Depends(get_db)):
+@router.get("")
+@router.get("/", include_in_schema=False)
+async def get_profiles(
+    ids: str = Query(..., description="auth_id des profils, séparés par des virgules"),
+    supabase: AsyncPostgrestClient = Depends(get_async_db),
+):
+    """
+    Lecture groupée : {"items": [...], "missing": [...]}, dans l'ordre des ids
+    demandés (null pour un profil introuvable). Une requête au plus (cache d'abord).
+    """
+    try:
+        wanted = split_ids(ids, settings.MULTI_GET_MAX_IDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    found = await user_service.get_profiles_many(supabase, wanted)
+    return many_response(wanted, found, ProfileResponse)
+
+@router.get("/leaderboard")
+async def get_global_leaderboard(top: int = Query(10, ge=1, le=100)):
+    """
+    Top K de tous les utilisateurs par score, servi depuis le classement en mémoire.
+    """
+    replicator.check_ready()
+    return {"leaderboard": leaderboards.global_board.top(top)}
+
+
+@router.get("/{auth_id}", responses={200: {
+    "model": ProfileResponse,
+    "description": "Profil complet, ou seulement auth_id, updated_at et les champs demandés si fields est fourni",
+}})
+async def get_profile(
+    auth_id: str,
+    request: Request,
+    fields: Optional[str] = Query(None, description="Champs à renvoyer, séparés par des virgules"),
+    supabase: AsyncPostgrestClient = Depends(get_async_db),
+):
     """
     Endpoint pour récupérer les informations d'un profil utilisateur.
 
     Args:
         auth_id: L'identifiant d'authentification de l'utilisateur
+        fields: Champs à renvoyer (auth_id toujours inclus) ; tous par défaut
         supabase: Instance du client Supabase
 
     Returns:
-        ProfileResponse: Les informations du profil
+        ProfileResponse: Les informations du profil (ETag + Cache-Control, 304 si inchangé) ;
+        avec fields, un objet partiel (auth_id, updated_at et les champs demandés)
 
     Raises:
         HTTPException: Si le profil n'est pas trouvé
     """
     try:
-        response = supabase.table('profiles') \
-            .select("*") \
-            .eq('auth_id', auth_id) \
-            .single() \
-            .execute()
+        columns = select_list(ProfileResponse, fields, always=("auth_id",))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        # ligne complète lue via le cache des profils, réduite ensuite aux champs demandés
+        profile = await user_service.get_profile(supabase, auth_id)
 
-        if not response.data:
+        if not profile:
             raise HTTPException(
                 status_code=404,
                 detail=f"Profil non trouvé pour l'auth_id: {auth_id}"
             )
-            
-        return response.data
+
+        # compteurs dans la version : les deltas en écriture différée ne changent pas updated_at
+        version = row_version([profile], "auth_id", columns, profile.get("total_stickers"), profile.get("score"))
+        if columns != "*":
+            return conditional_response(
+                request, pick(profile, columns), settings.HTTP_CACHE_PROFILE, version=version
+            )
+        return conditional_response(
+            request, profile, settings.HTTP_CACHE_PROFILE, model=ProfileResponse, key=("profile", auth_id),
+            version=version,
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -64,45 +120,50 @@ def get_profile(auth_id: str, supabase: Client = Depends(get_db)):
         )
 
 @router.put("/{auth_id}", response_model=ProfileResponse)
-def update_profile(auth_id: str, profile: ProfileUpdate, supabase: Client = Depends(get_db)):
+async def update_profile(auth_id: str, profile: ProfileUpdate, supabase: AsyncPostgrestClient = Depends(get_async_db)):
     # ne met à jour que les champs fournis
     payload = profile.model_dump(exclude_unset=True)
     if not payload:
         raise HTTPException(status_code=400, detail="No fields to update")
 
-    res = supabase.table("profiles").update(payload).eq("auth_id", auth_id).execute()
-
-    if not res.data:
-        existing = supabase.table("profiles").select("*").eq("auth_id", auth_id).single().execute()
-        if not existing.data:
-            raise HTTPException(status_code=404, detail="Profil introuvable")
-        return existing.data
-
-    return res.data[0]
+    updated = await user_service.update_profile(supabase, auth_id, payload)
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Profil introuvable")
+    return updated
 
 @router.get("/{auth_id}/stickers")
-def get_stickers_for_user(
+async def get_stickers_for_user(
     auth_id: UUID,
+    request: Request,
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
-    supabase: Client = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Curseur opaque (vide = première page)"),
+    fields: Optional[str] = Query(None, description="Champs à renvoyer, séparés par des virgules"),
+    supabase: AsyncPostgrestClient = Depends(get_async_db)
 ):
     """
     Récupérer tous les stickers d'un utilisateur donné (auth_id).
+    `fields` limite les colonnes lues et renvoyées (id, created_at et updated_at toujours inclus).
+
+    Sans `cursor` : pagination par offset, renvoie la liste des stickers.
+    Avec `cursor` (`?cursor=` pour la première page) : pagination par clé,
+    renvoie {"items": [...], "next_cursor": "..." | null}.
     """
     try:
-        query = (
-            supabase
-            .table("stickers")
-            .select("*")
-            .eq("auth_id", str(auth_id))
-            .order("created_at", desc=True)
-            .range(offset, offset + limit - 1)
+        columns = select_list(StickerResponse, fields, always=("id", "created_at", "updated_at"))
+        items, next_cursor = await list_stickers(
+            supabase, "auth_id", str(auth_id), limit, offset=offset, cursor=cursor, columns=columns
         )
-        res = query.execute()
-        return res.data or []
-
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except APIError as e:
         raise HTTPException(status_code=400, detail=e.message or "Query failed")
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # lignes brutes de la base : encodées directement (orjson), avec ETag
+    body = items if cursor is None else {"items": items, "next_cursor": next_cursor}
+    version = row_version(items, "id", columns, cursor, next_cursor)
+    return conditional_response(request, body, settings.HTTP_CACHE_USER_STICKERS, version=version)
@@ -9,4 +9,107 @@ class Settings:
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     ALLOWED_ORIGINS: list = os.getenv("ALLOWED_ORIGINS", "").split(",")
 
-settings = Settings()
\ No newline at end of file
+    # 📌 Pool HTTP vers Supabase (un pool par worker gunicorn)
+    SUPABASE_HTTP2: bool = os.getenv("SUPABASE_HTTP2", "1") == "1"
+    SUPABASE_POOL_MAX_CONNECTIONS: int = int(os.getenv("SUPABASE_POOL_MAX_CONNECTIONS", "100"))
+    SUPABASE_POOL_MAX_KEEPALIVE: int = int(os.getenv("SUPABASE_POOL_MAX_KEEPALIVE", "20"))
+    SUPABASE_POOL_KEEPALIVE_EXPIRY: float = float(os.getenv("SUPABASE_POOL_KEEPALIVE_EXPIRY", "30"))
+    SUPABASE_TIMEOUT: float = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+
+    # 📌 Tuiles de densité des stickers (GET /stickers/tiles/{z}/{x}/{y})
+    TILE_MAX_ZOOM: int = int(os.getenv("TILE_MAX_ZOOM", "12"))
+    TILE_CLUSTER_DEPTH: int = int(os.getenv("TILE_CLUSTER_DEPTH", "3"))
+    TILE_CACHE_SIZE: int = int(os.getenv("TILE_CACHE_SIZE", "2048"))
+
+    # 📌 Caches de lecture (taille max, TTL en secondes)
+    CACHE_PROFILE_SIZE: int = int(os.getenv("CACHE_PROFILE_SIZE", "10000"))
+    CACHE_PROFILE_TTL: float = float(os.getenv("CACHE_PROFILE_TTL", "30"))
+    CACHE_COMMUNITY_SIZE: int = int(os.getenv("CACHE_COMMUNITY_SIZE", "2000"))
+    CACHE_COMMUNITY_TTL: float = float(os.getenv("CACHE_COMMUNITY_TTL", "300"))
+    CACHE_STICKER_SIZE: int = int(os.getenv("CACHE_STICKER_SIZE", "10000"))
+    CACHE_STICKER_TTL: float = float(os.getenv("CACHE_STICKER_TTL", "300"))
+
+    # 📌 Taille max d'un lot POST /stickers/batch
+    STICKER_BATCH_MAX_SIZE: int = int(os.getenv("STICKER_BATCH_MAX_SIZE", "200"))
+
+    # 📌 Ligne de log JSON par requête avec le détail des appels Supabase
+    QUERY_LOG_ENABLED: bool = os.getenv("QUERY_LOG_ENABLED", "0") == "1"
+
+    # 📌 Stockage : "supabase" (PostgREST) ou "memory" (moteur en mémoire, sans réseau)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "supabase")
+    MEMORY_SEED_FILE: str | None = os.getenv("MEMORY_SEED_FILE") or None
+
+    # 📌 Coalescence des lectures concurrentes identiques (noms séparés par des virgules,
+    # parmi community, community_members, profile, sticker ; vide = désactivée)
+    SINGLEFLIGHT_ROUTES: set = set(filter(None, os.getenv(
+        "SINGLEFLIGHT_ROUTES", "community,community_members,profile,sticker"
+    ).split(",")))
+
+    # 📌 Cache-Control des lectures (GET avec ETag, 304 si If-None-Match correspond)
+    HTTP_CACHE_PROFILE: str = os.getenv("HTTP_CACHE_PROFILE", "public, max-age=30")
+    HTTP_CACHE_STICKER: str = os.getenv("HTTP_CACHE_STICKER", "public, max-age=300")
+    HTTP_CACHE_COMMUNITY: str = os.getenv("HTTP_CACHE_COMMUNITY", "public, max-age=300")
+    HTTP_CACHE_COMMUNITY_USERS: str = os.getenv("HTTP_CACHE_COMMUNITY_USERS", "public, max-age=30")
+    HTTP_CACHE_USER_STICKERS: str = os.getenv("HTTP_CACHE_USER_STICKERS", "public, max-age=30")
+    HTTP_ETAG_MEMO_SIZE: int = int(os.getenv("HTTP_ETAG_MEMO_SIZE", "10000"))
+
+    # 📌 Flux GET /communities/{id}/stickers/stream : première page courte (premier
+    # octet au plus tôt), puis pages pleines
+    STREAM_FIRST_PAGE_SIZE: int = int(os.getenv("STREAM_FIRST_PAGE_SIZE", "50"))
+    STREAM_PAGE_SIZE: int = int(os.getenv("STREAM_PAGE_SIZE", "500"))
+
+    # 📌 Diffusion temps réel (WebSocket) et réplication entre workers : transport
+    # "memory" (local au worker), "unix" (workers d'une même machine, sockets dans
+    # BROKER_SOCKET_DIR) ou "module:Classe" ; taille de la file de chaque connexion
+    # (au-delà, l'abonné est décroché)
+    BROKER_BACKEND: str = os.getenv("BROKER_BACKEND", "memory")
+    BROKER_SOCKET_DIR: str = os.getenv("BROKER_SOCKET_DIR", "/tmp/slapit_broker")
+    WS_QUEUE_SIZE: int = int(os.getenv("WS_QUEUE_SIZE", "100"))
+
+    # 📌 Index spatial, tuiles et classements du worker : chargés en tâche de fond au
+    # démarrage puis tenus à jour par la réplication. Reconstruction complète optionnelle
+    # toutes les N secondes (relit toute la table stickers par worker ; 0 = jamais)
+    INDEX_RESYNC_INTERVAL: float = float(os.getenv("INDEX_RESYNC_INTERVAL", "0"))
+
+    # 📌 Compteurs total_stickers / score en écriture différée : deltas cumulés par
+    # profil et écrits par lots (intervalle en secondes, ou dès N profils en attente).
+    # Les deltas restent propres au worker qui les a reçus : les autres workers servent
+    # les compteurs en base, en retard d'au plus FLUSH_INTERVAL (+ durée du flush)
+    PROFILE_COUNTERS_WRITE_BEHIND: bool = os.getenv("PROFILE_COUNTERS_WRITE_BEHIND", "0") == "1"
+    PROFILE_COUNTERS_FLUSH_INTERVAL: float = float(os.getenv("PROFILE_COUNTERS_FLUSH_INTERVAL", "1.0"))
+    PROFILE_COUNTERS_FLUSH_SIZE: int = int(os.getenv("PROFILE_COUNTERS_FLUSH_SIZE", "500"))
+
+    # 📌 Lectures groupées GET /users, /stickers, /communities ?ids=... : ids max par requête
+    MULTI_GET_MAX_IDS: int = int(os.getenv("MULTI_GET_MAX_IDS", "100"))
+
+    # 📌 Admission : appels Supabase simultanés max par worker, attente max d'une place
+    # (secondes) et taille max de la file ; au-delà, 503 immédiat avec Retry-After
+    SUPABASE_MAX_CONCURRENCY: int = int(os.getenv("SUPABASE_MAX_CONCURRENCY", "100"))
+    SUPABASE_QUEUE_TIMEOUT: float = float(os.getenv("SUPABASE_QUEUE_TIMEOUT", "0.5"))
+    SUPABASE_MAX_QUEUE: int = int(os.getenv("SUPABASE_MAX_QUEUE", "200"))
+    OVERLOAD_RETRY_AFTER: float = float(os.getenv("OVERLOAD_RETRY_AFTER", "1"))
+
+    # 📌 Quota d'écritures par auth_id (seau à jetons) : jetons par seconde (0 = pas de
+    # limite) et réserve max ; au-delà, 429 avec Retry-After
+    WRITE_RATE_PER_SECOND: float = float(os.getenv("WRITE_RATE_PER_SECOND", "0"))
+    WRITE_RATE_BURST: int = int(os.getenv("WRITE_RATE_BURST", "10"))
+
+    # 📌 Résilience des appels Supabase : échéance par requête HTTP et délai par appel
+    # (secondes), nouveaux essais des lectures (attente exponentielle avec gigue),
+    # lecture doublée après HEDGE_AFTER secondes sans réponse (0 = désactivée),
+    # coupe-circuit après N échecs consécutifs, rouvert à l'essai après RESET secondes
+    REQUEST_DEADLINE: float = float(os.getenv("REQUEST_DEADLINE", "20"))
+    SUPABASE_CALL_TIMEOUT: float = float(os.getenv("SUPABASE_CALL_TIMEOUT", "5"))
+    SUPABASE_READ_RETRIES: int = int(os.getenv("SUPABASE_READ_RETRIES", "2"))
+    SUPABASE_RETRY_BACKOFF: float = float(os.getenv("SUPABASE_RETRY_BACKOFF", "0.05"))
+    SUPABASE_HEDGE_AFTER: float = float(os.getenv("SUPABASE_HEDGE_AFTER", "0"))
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_RESET_TIMEOUT: float = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "10"))
+
+    # 📌 Journal d'accès JSON sur stdout (promtail -> Loki), écrit par un thread dédié :
+    # part des réponses < 400 conservées (1 = toutes), taille max de la file
+    ACCESS_LOG_ENABLED: bool = os.getenv("ACCESS_LOG_ENABLED", "1") == "1"
+    ACCESS_LOG_SAMPLE_RATE: float = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+    ACCESS_LOG_QUEUE_SIZE: int = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", "10000"))
+
+settings = Settings()
@@ -0,0 +1,164 @@
+# app/core/access_log.py
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+import orjson
+
+from app.config import settings
+from app.core.metrics import ACCESS_LOG_DROPPED
+
+logger = logging.getLogger("slapit.access")
+
+# 📌 Identifiant de la requête HTTP en cours (en-tête X-Request-ID reçu ou généré)
+_request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+# loggers dont les enregistrements partent en JSON par la file (access + logs de l'application)
+LOGGERS = ("slapit.access", "app")
+
+
+def bind_request_id(headers: list[tuple[bytes, bytes]]):
+    """
+    Reprend l'X-Request-ID reçu (passerelle) s'il est raisonnable, sinon en génère
+    un ; renvoie (id, jeton du ContextVar à rendre via _request_id.reset).
+    """
+    request_id = None
+    for name, value in headers:
+        if name == b"x-request-id":
+            if 0 < len(value) <= 64:
+                request_id = value.decode("latin-1")
+            break
+    if request_id is None:
+        request_id = uuid.uuid4().hex
+    return request_id, _request_id.set(request_id)
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement (champs exploitables tels quels par Loki)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+        }
+        if isinstance(record.msg, dict):
+            entry.update(record.msg)
+        else:
+            entry["message"] = record.getMessage()
+        request_id = getattr(record, "request_id", None)
+        if request_id and "request_id" not in entry:
+            entry["request_id"] = request_id
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class QueueingHandler(logging.handlers.QueueHandler):
+    """
+    Handler non bloquant : l'enregistrement est posé tel quel dans une file bornée
+    (formatage et écriture faits par le thread du QueueListener). File pleine :
+    l'enregistrement est abandonné et compté, la requête n'attend jamais.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args:
+            # message figé dans le thread appelant (les arguments peuvent changer ensuite)
+            record.msg, record.args = record.getMessage(), None
+        if not hasattr(record, "request_id"):
+            record.request_id = _request_id.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            ACCESS_LOG_DROPPED.inc()
+
+
+class AccessLog:
+    """
+    Journal d'accès JSON du worker : une ligne par requête (route, statut, durée,
+    appels Supabase, request_id), les réponses < 400 étant échantillonnées
+    (sample_rate) ; erreurs et exceptions des loggers de l'application dans le
+    même format. Rien n'est écrit tant que start() n'a pas été appelé.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, queue_size: int = 10_000):
+        self.sample_rate = sample_rate
+        self.queue_size = queue_size
+        self._handler: logging.Handler | None = None
+        self._listener: logging.handlers.QueueListener | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._handler is not None
+
+    def start(self, stream=None, queued: bool = True) -> None:
+        """
+        Branche le journal sur stream (stdout par défaut). queued=False : formatage
+        et écriture synchrones, dans le thread de la requête (comparaison, débogage).
+        """
+        if self._handler is not None:
+            return
+        target = logging.StreamHandler(stream or sys.stdout)
+        target.setFormatter(JsonFormatter())
+        if queued:
+            records: queue.Queue = queue.Queue(self.queue_size)
+            self._handler = QueueingHandler(records)
+            self._listener = logging.handlers.QueueListener(records, target)
+            self._listener.start()
+        else:
+            self._handler = target
+        for name in LOGGERS:
+            logging.getLogger(name).addHandler(self._handler)
+            logging.getLogger(name).setLevel(logging.INFO)
+
+    def stop(self) -> None:
+        """Détache le handler et vide la file (appelé à l'arrêt du worker)."""
+        if self._handler is None:
+            return
+        for name in LOGGERS:
+            logging.getLogger(name).removeHandler(self._handler)
+        if self._listener is not None:
+            self._listener.stop()
+        self._listener = self._handler = None
+
+    def request(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        duration: float,
+        calls: list,
+        request_id: str,
+        error: BaseException | None = None,
+    ) -> None:
+        """Ligne d'accès d'une requête (appelé par le middleware, après la réponse)."""
+        if self._handler is None:
+            return
+        if status < 400 and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        level = logging.ERROR if status >= 500 else logging.WARNING if status >= 400 else logging.INFO
+        entry = {
+            "type": "access",
+            "method": method,
+            "route": route,
+            "status": status,
+            "duration_ms": round(duration * 1000, 2),
+            "db_calls": len(calls),
+            "db_ms": round(sum(c[2] for c in calls) * 1000, 2),
+            "request_id": request_id,
+        }
+        if error is not None:
+            entry["error"] = f"{type(error).__name__}: {error}"
+        logger.log(level, entry)
+
+
+# 📌 Journal d'accès du worker (démarré dans le lifespan si ACCESS_LOG_ENABLED)
+access_log = AccessLog(settings.ACCESS_LOG_SAMPLE_RATE, settings.ACCESS_LOG_QUEUE_SIZE)
@@ -0,0 +1,138 @@
+# app/core/admission.py
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.core.cache import LRUCache
+from app.core.metrics import ADMISSION_REJECTED
+
+
+class Overloaded(HTTPException):
+    """503 immédiat avec Retry-After : Supabase est saturé, inutile d'attendre."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(
+            status_code=503,
+            detail="Service surchargé, réessayez plus tard",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+class RateLimited(HTTPException):
+    """429 avec Retry-After : quota d'écritures de l'utilisateur épuisé."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(
+            status_code=429,
+            detail="Trop de requêtes, réessayez plus tard",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+class AdmissionLimiter:
+    """
+    Nombre borné d'appels Supabase simultanés (par worker). Au-delà, l'appel
+    attend une place au plus queue_timeout secondes dans une file d'au plus
+    max_queue appels ; sinon Overloaded (503) tout de suite, au lieu
+    d'accumuler des requêtes qui finiraient de toute façon en timeout.
+    """
+
+    def __init__(self, limit: int, queue_timeout: float, max_queue: int, retry_after: float = 1.0):
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self.rejected = 0
+
+    async def acquire(self) -> None:
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._reject("queue_full")
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._reject("deadline")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # place cédée juste avant l'annulation : on la rend
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self) -> None:
+        # la place passe directement au premier appel en attente
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _reject(self, reason: str):
+        self.rejected += 1
+        ADMISSION_REJECTED.labels(reason).inc()
+        raise Overloaded(self.retry_after)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self._active,
+            "waiting": len(self._waiters),
+            "rejected": self.rejected,
+        }
+
+
+class TokenBucket:
+    """
+    Limite de débit par clé (auth_id) : rate jetons par seconde, au plus burst
+    en réserve. Les seaux sont gardés dans un LRU borné (mémoire constante).
+    rate <= 0 : pas de limite.
+    """
+
+    def __init__(self, rate: float, burst: int, maxsize: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = LRUCache(maxsize)
+
+    def check(self, key: str, cost: int = 1) -> None:
+        """Consomme cost jetons pour key ; lève RateLimited s'il n'y en a pas assez."""
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key) or (float(self.burst), now)
+        tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+        if tokens < cost:
+            self._buckets.set(key, (tokens, now))
+            ADMISSION_REJECTED.labels("rate_limit").inc()
+            raise RateLimited((cost - tokens) / self.rate)
+        self._buckets.set(key, (tokens - cost, now))
+
+
+# 📌 Appels Supabase simultanés du worker (cf. instrument()) et quota d'écritures par utilisateur
+outbound_limiter = AdmissionLimiter(
+    settings.SUPABASE_MAX_CONCURRENCY,
+    settings.SUPABASE_QUEUE_TIMEOUT,
+    settings.SUPABASE_MAX_QUEUE,
+    settings.OVERLOAD_RETRY_AFTER,
+)
+write_limiter = TokenBucket(settings.WRITE_RATE_PER_SECOND, settings.WRITE_RATE_BURST)
@@ -0,0 +1,260 @@
+# app/core/broker.py
+import asyncio
+import importlib
+import logging
+import os
+import socket
+from typing import Any, Callable
+
+import orjson
+
+from app.config import settings
+from app.core.metrics import BROKER_DELIVERED, BROKER_DROPPED, BROKER_SEND_ERRORS, BROKER_SUBSCRIBERS
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[str, dict], None]
+
+
+class Subscription:
+    """
+    Abonnement d'une connexion à un sujet : file bornée de lots d'événements.
+    Un abonné trop lent (file pleine) est décroché plutôt que de ralentir les autres.
+    """
+
+    __slots__ = ("topic", "queue", "dropped")
+
+    def __init__(self, topic: str, maxsize: int):
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = False
+
+    async def get(self) -> list[dict] | None:
+        """Prochain lot d'événements ; None si l'abonné a été décroché."""
+        return await self.queue.get()
+
+    def _drop(self) -> None:
+        self.dropped = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class MemoryBackend:
+    """
+    Transport par défaut : local au worker. Un transport inter-workers (Redis
+    pub/sub, LISTEN/NOTIFY, ...) expose la même interface : publish() ne bloque
+    pas, et chaque message reçu (y compris les siens) est remis via deliver.
+    """
+
+    def __init__(self):
+        self._deliver: Deliver | None = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    def publish(self, topic: str, event: dict) -> None:
+        if self._deliver is not None:
+            self._deliver(topic, event)
+
+    async def close(self) -> None:
+        self._deliver = None
+
+
+class UnixSocketBackend:
+    """
+    Transport entre les workers d'une même machine (gunicorn -w N) : chaque worker
+    lie un socket Unix datagramme dans directory. publish() remet le message au
+    worker lui-même puis l'envoie, sans bloquer, à chaque autre socket du
+    répertoire ; un pair saturé perd le message (compté), le socket d'un worker
+    arrêté est supprimé.
+    """
+
+    # taille max d'un message reçu (un événement sticker fait moins d'1 Ko)
+    MAX_MESSAGE = 65536
+
+    def __init__(self, directory: str | None = None, name: str | None = None):
+        self.directory = directory or settings.BROKER_SOCKET_DIR
+        self.name = name
+        self._deliver: Deliver | None = None
+        self._sock: socket.socket | None = None
+        self._path: str | None = None
+
+    async def start(self, deliver: Deliver) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._path = os.path.join(self.directory, f"{self.name or os.getpid()}.sock")
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self._path)
+        self._sock.setblocking(False)
+        self._deliver = deliver
+        asyncio.get_running_loop().add_reader(self._sock.fileno(), self._read)
+
+    def publish(self, topic: str, event: dict) -> None:
+        if self._deliver is None:
+            return
+        self._deliver(topic, event)
+        data = orjson.dumps([topic, event])
+        for entry in os.scandir(self.directory):
+            if entry.path == self._path or not entry.name.endswith(".sock"):
+                continue
+            try:
+                self._sock.sendto(data, entry.path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # worker arrêté : plus personne ne lit ce socket
+                try:
+                    os.unlink(entry.path)
+                except OSError:
+                    pass
+            except OSError as e:
+                BROKER_SEND_ERRORS.inc()
+                logger.warning("Message %s non remis à %s : %s", topic, entry.name, e)
+
+    def _read(self) -> None:
+        while True:
+            try:
+                data = self._sock.recv(self.MAX_MESSAGE)
+            except BlockingIOError:
+                return
+            try:
+                topic, event = orjson.loads(data)
+            except (orjson.JSONDecodeError, ValueError):
+                logger.warning("Message illisible ignoré (%d octets)", len(data))
+                continue
+            self._deliver(topic, event)
+
+    async def close(self) -> None:
+        if self._sock is not None:
+            asyncio.get_running_loop().remove_reader(self._sock.fileno())
+            self._sock.close()
+            self._sock = None
+            try:
+                os.unlink(self._path)
+            except OSError:
+                pass
+        self._deliver = None
+
+
+def load_backend(spec: str) -> Any:
+    """
+    BROKER_BACKEND : "memory" (local au worker), "unix" (workers d'une même
+    machine, cf. UnixSocketBackend) ou "paquet.module:Classe" (constructeur sans argument).
+    """
+    if spec == "memory":
+        return MemoryBackend()
+    if spec == "unix":
+        return UnixSocketBackend()
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name)()
+
+
+class Broker:
+    """
+    Pub/sub du worker pour les connexions WebSocket. Côté écriture, publish()
+    ne fait qu'ajouter l'événement à un tampon (O(1)) ; la diffusion aux
+    abonnés est faite par lots, une fois par tour de boucle, hors du chemin
+    d'écriture : chaque abonné reçoit un seul lot par diffusion.
+
+    Un sujet peut aussi avoir un auditeur interne (listen) : appelé tout de
+    suite pour chaque message reçu, sans file (ex. réplication entre workers).
+    """
+
+    def __init__(self, backend=None, queue_size: int = 100):
+        self.backend = backend or MemoryBackend()
+        self.queue_size = queue_size
+        self._topics: dict[str, set[Subscription]] = {}
+        self._listeners: dict[str, Deliver] = {}
+        self._pending: dict[str, list[dict]] = {}
+        self._flush_scheduled = False
+        self._started = False
+
+    async def start(self) -> None:
+        if not self._started:
+            await self.backend.start(self._deliver)
+            self._started = True
+
+    async def close(self) -> None:
+        if self._started:
+            await self.backend.close()
+            self._started = False
+
+    def subscribe(self, topic: str) -> Subscription:
+        sub = Subscription(topic, self.queue_size)
+        self._topics.setdefault(topic, set()).add(sub)
+        BROKER_SUBSCRIBERS.inc()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        subs = self._topics.get(sub.topic)
+        if subs is not None and sub in subs:
+            subs.discard(sub)
+            BROKER_SUBSCRIBERS.dec()
+            if not subs:
+                del self._topics[sub.topic]
+
+    def listen(self, topic: str, listener: Callable[[dict], None]) -> None:
+        """Auditeur interne du sujet (un seul par sujet), appelé à la réception de chaque message."""
+        self._listeners[topic] = listener
+
+    def subscribers(self, topic: str) -> int:
+        return len(self._topics.get(topic, ()))
+
+    def publish(self, topic: str, event: dict) -> None:
+        """Publie un événement (non bloquant) ; appelé depuis le chemin d'écriture."""
+        if self._started:
+            self.backend.publish(topic, event)
+        else:
+            # transport pas démarré (hors lifespan, ex. tests) : remise locale
+            self._deliver(topic, event)
+
+    def _deliver(self, topic: str, event: dict) -> None:
+        # message reçu du transport (depuis la boucle du worker) : auditeur interne
+        # tout de suite, abonnés WebSocket au prochain tour de boucle
+        listener = self._listeners.get(topic)
+        if listener is not None:
+            listener(event)
+        if topic not in self._topics:
+            return
+        self._pending.setdefault(topic, []).append(event)
+        if not self._flush_scheduled:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._pending.clear()
+                return
+            self._flush_scheduled = True
+            loop.call_soon(self._flush)
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, {}
+        delivered = 0
+        for topic, batch in pending.items():
+            for sub in list(self._topics.get(topic, ())):
+                try:
+                    sub.queue.put_nowait(batch)
+                except asyncio.QueueFull:
+                    # abonné le plus lent : décroché, la connexion sera fermée
+                    self.unsubscribe(sub)
+                    sub._drop()
+                    BROKER_DROPPED.inc()
+                    logger.info("Abonné trop lent décroché de %s", topic)
+                    continue
+                delivered += len(batch)
+        BROKER_DELIVERED.inc(delivered)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "topics": len(self._topics),
+            "subscribers": sum(len(subs) for subs in self._topics.values()),
+        }
+
+
+def community_topic(community_id: str) -> str:
+    return f"community:{community_id}"
+
+
+# 📌 Broker du worker (transport configurable via BROKER_BACKEND)
+broker = Broker(load_backend(settings.BROKER_BACKEND), settings.WS_QUEUE_SIZE)
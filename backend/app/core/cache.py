@@ -0,0 +1,147 @@
+# app/core/cache.py
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+from app.config import settings
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Cache borné en mémoire, éviction du moins récemment utilisé.
+    Compte les hits / misses pour pouvoir dimensionner maxsize.
+
+    Chaque invalidation (pop, clear) avance une génération : une lecture
+    commencée avant (token()) et terminée après ne remet pas en cache une
+    valeur périmée (set(..., token) est alors ignoré).
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._generation = 0
+        # clé -> génération de sa dernière invalidation (borné à maxsize clés) ;
+        # au-delà, _floor : génération la plus récente oubliée (prudence)
+        self._invalidated: OrderedDict[Hashable, int] = OrderedDict()
+        self._floor = 0
+        self.stale_writes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._data.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def token(self) -> int:
+        """Génération courante, à prendre avant la lecture en base (cf. set)."""
+        return self._generation
+
+    def set(self, key: Hashable, value: Any, token: int | None = None) -> bool:
+        """
+        Met la valeur en cache ; avec token, seulement si key n'a pas été invalidée
+        depuis token(). Renvoie False si la valeur, périmée, a été écartée.
+        """
+        if token is not None and self._invalidated.get(key, self._floor) > token:
+            self.stale_writes += 1
+            return False
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return True
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+        self._generation += 1
+        self._invalidated[key] = self._generation
+        self._invalidated.move_to_end(key)
+        while len(self._invalidated) > self.maxsize:
+            _, self._floor = self._invalidated.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._generation += 1
+        self._invalidated.clear()
+        self._floor = self._generation
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+            "stale_writes": self.stale_writes,
+        }
+
+
+class TTLCache(LRUCache):
+    """
+    LRUCache dont chaque entrée expire ttl secondes après son écriture.
+    Une entrée expirée compte comme un miss et est retirée à la lecture.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        super().__init__(maxsize)
+        self.ttl = ttl
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING or item[0] <= time.monotonic():
+            if item is not _MISSING:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key: Hashable, value: Any, token: int | None = None) -> bool:
+        return super().set(key, (time.monotonic() + self.ttl, value), token)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "ttl": self.ttl}
+
+
+async def get_many(
+    cache: LRUCache,
+    ids: list[str],
+    fetch: Callable[[list[str]], Awaitable[dict[str, dict]]],
+) -> dict[str, dict]:
+    """
+    Lecture groupée à travers un cache : les ids absents du cache sont lus en
+    un seul appel fetch(ids manquants) -> {id: ligne}, puis mis en cache (sauf
+    ceux invalidés pendant la lecture). Renvoie {id: ligne} pour les ids trouvés.
+    """
+    found, missing = {}, []
+    for key in ids:
+        row = cache.get(key)
+        if row is None:
+            missing.append(key)
+        else:
+            found[key] = row
+    if missing:
+        token = cache.token()
+        for key, row in (await fetch(missing)).items():
+            cache.set(key, row, token)
+            found[key] = row
+    return found
+
+
+# 📌 Caches de lecture par entité (un jeu par worker), invalidés par les écritures de
+# tous les workers (cf. app/core/replication.py)
+profile_cache = TTLCache(settings.CACHE_PROFILE_SIZE, settings.CACHE_PROFILE_TTL)
+community_cache = TTLCache(settings.CACHE_COMMUNITY_SIZE, settings.CACHE_COMMUNITY_TTL)
+sticker_cache = TTLCache(settings.CACHE_STICKER_SIZE, settings.CACHE_STICKER_TTL)
+
+entity_caches = {
+    "profiles": profile_cache,
+    "communities": community_cache,
+    "stickers": sticker_cache,
+}
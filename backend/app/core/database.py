@@ -1,28 +1,133 @@
 # app/core/database.py
 import os
-from supabase import create_client, Client
+from typing import TYPE_CHECKING
+import httpx
+from postgrest import AsyncPostgrestClient
 from dotenv import load_dotenv
+from app.config import settings
+from app.core.admission import outbound_limiter
+from app.core.resilience import supabase_policy
+from app.core.instrumentation import InstrumentedClient, record_call
+from app.core.memory_db import MemoryDatabase
+from app.core.metrics import observe_supabase_call
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 TESTING = os.getenv("TESTING") == "1"
+MEMORY = settings.STORAGE_BACKEND == "memory"
 
-_supabase: Client | None = None
+_supabase: "Client | None" = None
+_async_supabase: AsyncPostgrestClient | MemoryDatabase | None = None
+_async_db: InstrumentedClient | None = None
 
-if not TESTING:
+# 📌 Les clients sont créés au premier usage (pas à l'import) : démarrage plus rapide
+# des workers, et compatible avec gunicorn --preload (création après le fork).
+if not TESTING and not MEMORY:
     if not SUPABASE_URL or not SUPABASE_KEY:
         raise ValueError("❌ Erreur : Les variables SUPABASE_URL et SUPABASE_KEY ne sont pas définies !")
-    _supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-def get_db() -> Client:
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """
+    Client PostgREST asynchrone dont la session httpx est un pool HTTP/2
+    borné (limites et keep-alive configurables via les settings).
+    """
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        limits = httpx.Limits(
+            max_connections=settings.SUPABASE_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.SUPABASE_POOL_KEEPALIVE_EXPIRY,
+        )
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            verify=verify,
+            proxy=proxy,
+            follow_redirects=True,
+            http2=settings.SUPABASE_HTTP2,
+            limits=limits,
+        )
+
+
+def get_db() -> "Client":
     """
-    Renvoie le client Supabase. En mode TESTING, on NE doit pas appeler ce getter :
-    les tests doivent override cette dépendance avec un client factice.
+    Renvoie le client Supabase complet (auth, storage, ...), créé au premier appel :
+    le paquet supabase n'est importé que si ce getter sert. En mode TESTING, on NE
+    doit pas appeler ce getter : les tests doivent override cette dépendance avec
+    un client factice.
     """
+    global _supabase
     if TESTING:
         # Sécurité: si un test oublie d’override, on échoue explicitement.
         raise RuntimeError("get_db() appelé en mode TESTING. Mocke cette dépendance via app.dependency_overrides.")
-    assert _supabase is not None, "Client Supabase non initialisé"
-    return _supabase
\ No newline at end of file
+    if _supabase is None:
+        from supabase import create_client
+
+        _supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return _supabase
+
+
+def instrument(client) -> InstrumentedClient:
+    """
+    Enveloppe un client (réel ou factice) avec les observateurs des appels Supabase,
+    la limite d'appels simultanés et la politique de résilience du worker.
+    """
+    return InstrumentedClient(
+        client, observers=[observe_supabase_call, record_call], limiter=outbound_limiter, policy=supabase_policy
+    )
+
+
+async def get_async_db() -> InstrumentedClient:
+    """
+    Variante asynchrone de get_db : renvoie le client PostgREST du worker,
+    instrumenté (métriques par table × verbe, comptabilité par requête).
+    Le client (et son pool de connexions) est créé au premier appel, donc
+    après le fork gunicorn : chaque worker possède son propre pool.
+    Avec STORAGE_BACKEND=memory, renvoie le moteur en mémoire du worker
+    (chargé depuis MEMORY_SEED_FILE s'il est défini).
+    """
+    global _async_supabase, _async_db
+    if TESTING:
+        raise RuntimeError("get_async_db() appelé en mode TESTING. Mocke cette dépendance via app.dependency_overrides.")
+    if _async_db is None and MEMORY:
+        _async_supabase = MemoryDatabase()
+        if settings.MEMORY_SEED_FILE:
+            _async_supabase.load(settings.MEMORY_SEED_FILE)
+        _async_db = instrument(_async_supabase)
+    if _async_db is None:
+        _async_supabase = PooledPostgrestClient(
+            f"{SUPABASE_URL}/rest/v1",
+            headers={"apikey": SUPABASE_KEY, "Authorization": f"Bearer {SUPABASE_KEY}"},
+            timeout=settings.SUPABASE_TIMEOUT,
+        )
+        _async_db = instrument(_async_supabase)
+    return _async_db
+
+
+async def close_async_db() -> None:
+    """Ferme le pool HTTP du worker (appelé à l'arrêt de l'application)."""
+    global _async_supabase, _async_db
+    if isinstance(_async_supabase, PooledPostgrestClient):
+        await _async_supabase.aclose()
+    _async_supabase = None
+    _async_db = None
+
+
+def _forget_clients() -> None:
+    # après un fork (gunicorn --preload) : un client éventuellement créé par le
+    # master partage ses sockets avec lui, le worker recrée le sien au premier appel
+    global _supabase, _async_supabase, _async_db
+    _supabase = None
+    _async_supabase = None
+    _async_db = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_clients)
@@ -0,0 +1,151 @@
+# app/core/geo.py
+import heapq
+import math
+
+EARTH_RADIUS_M = 6_371_000
+METERS_PER_DEG_LAT = 111_320
+
+
+def haversine_m(lat1: float, long1: float, lat2: float, long2: float) -> float:
+    """Distance orthodromique en mètres entre deux points (lat/long en degrés)."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(long2 - long1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """
+    Index spatial en mémoire : grille régulière de cellules lat/long.
+
+    Chaque sticker est rangé dans la cellule qui contient sa position ;
+    une requête ne parcourt que les cellules qui recoupent la zone demandée
+    au lieu de scanner tous les stickers. L'index est propre au worker :
+    il est chargé depuis Supabase puis tenu à jour par les écritures de
+    tous les workers (cf. app/core/replication.py).
+    """
+
+    def __init__(self, cell_deg: float = 0.01):
+        self.cell_deg = cell_deg
+        # (cx, cy) -> {sticker_id: (lat, long, community_id)}
+        self._cells: dict[tuple[int, int], dict[str, tuple[float, float, str]]] = {}
+        # sticker_id -> cellule, pour la suppression en O(1)
+        self._by_id: dict[str, tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def _cell(self, lat: float, long: float) -> tuple[int, int]:
+        return math.floor(long / self.cell_deg), math.floor(lat / self.cell_deg)
+
+    def add(self, sticker_id: str, lat: float, long: float, community_id: str | None = None) -> None:
+        sticker_id = str(sticker_id)
+        self.remove(sticker_id)
+        cell = self._cell(lat, long)
+        self._cells.setdefault(cell, {})[sticker_id] = (float(lat), float(long), str(community_id or ""))
+        self._by_id[sticker_id] = cell
+
+    def get(self, sticker_id: str) -> tuple[float, float, str] | None:
+        """(lat, long, community_id) du sticker s'il est dans l'index."""
+        cell = self._by_id.get(str(sticker_id))
+        return None if cell is None else self._cells[cell][str(sticker_id)]
+
+    def remove(self, sticker_id: str) -> None:
+        cell = self._by_id.pop(str(sticker_id), None)
+        if cell is None:
+            return
+        bucket = self._cells[cell]
+        bucket.pop(str(sticker_id), None)
+        if not bucket:
+            del self._cells[cell]
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._by_id.clear()
+
+    def replace(self, other: "GridIndex") -> None:
+        """Remplace le contenu par celui d'un index reconstruit à part (même taille de cellule)."""
+        self._cells, self._by_id = other._cells, other._by_id
+
+    def _candidates(self, min_lat: float, min_long: float, max_lat: float, max_long: float):
+        """
+        Stickers des cellules qui recoupent la boîte (à filtrer ensuite). Les
+        longitudes hors de [-180, 180] (boîte qui franchit l'antiméridien)
+        sont ramenées de l'autre côté.
+        """
+        if max_long - min_long >= 360:
+            spans = [(-180.0, 180.0)]
+        elif min_long < -180:
+            spans = [(min_long + 360, 180.0), (-180.0, max_long)]
+        elif max_long > 180:
+            spans = [(min_long, 180.0), (-180.0, max_long - 360)]
+        else:
+            spans = [(min_long, max_long)]
+
+        ranges = []
+        for lo, hi in spans:
+            x0, y0 = self._cell(min_lat, lo)
+            x1, y1 = self._cell(max_lat, hi)
+            ranges.append((x0, x1, y0, y1))
+        n_cells = sum((x1 - x0 + 1) * (y1 - y0 + 1) for x0, x1, y0, y1 in ranges)
+        if n_cells >= len(self._cells):
+            # zone très large : parcourir les cellules occupées coûte moins cher
+            for bucket in self._cells.values():
+                yield from bucket.items()
+            return
+        cells = self._cells
+        for x0, x1, y0, y1 in ranges:
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    bucket = cells.get((x, y))
+                    if bucket:
+                        yield from bucket.items()
+
+    def nearby(self, lat: float, long: float, radius_m: float,
+               community_id: str | None = None, limit: int = 100) -> list[tuple[float, str]]:
+        """
+        Stickers à moins de radius_m mètres de (lat, long), triés par distance.
+        Renvoie une liste de (distance_m, sticker_id).
+        """
+        dlat = radius_m / METERS_PER_DEG_LAT
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        dlong = min(radius_m / (METERS_PER_DEG_LAT * cos_lat), 180.0)
+        community_id = str(community_id) if community_id else None
+
+        hits = []
+        for sid, (s_lat, s_long, s_comm) in self._candidates(lat - dlat, long - dlong, lat + dlat, long + dlong):
+            if community_id and s_comm != community_id:
+                continue
+            d = haversine_m(lat, long, s_lat, s_long)
+            if d <= radius_m:
+                hits.append((d, sid))
+        return heapq.nsmallest(limit, hits)
+
+    def bbox(self, min_lat: float, min_long: float, max_lat: float, max_long: float,
+             community_id: str | None = None, limit: int = 100) -> list[tuple[float, str]]:
+        """
+        Stickers contenus dans la boîte, triés par distance au centre de la boîte.
+        min_long > max_long : la boîte franchit l'antiméridien (de min_long à 180,
+        puis de -180 à max_long), comme les bbox GeoJSON.
+        Renvoie une liste de (distance_m, sticker_id).
+        """
+        crosses = min_long > max_long
+        if crosses:
+            max_long += 360
+        c_lat, c_long = (min_lat + max_lat) / 2, (min_long + max_long) / 2
+        community_id = str(community_id) if community_id else None
+
+        hits = []
+        for sid, (s_lat, s_long, s_comm) in self._candidates(min_lat, min_long, max_lat, max_long):
+            if community_id and s_comm != community_id:
+                continue
+            if crosses and s_long < min_long:
+                s_long += 360
+            if min_lat <= s_lat <= max_lat and min_long <= s_long <= max_long:
+                hits.append((haversine_m(c_lat, c_long, s_lat, s_long), sid))
+        return heapq.nsmallest(limit, hits)
+
+
+# 📌 Index partagé par les routes du worker
+sticker_index = GridIndex()
@@ -0,0 +1,88 @@
+# app/core/http_cache.py
+import hashlib
+from typing import Hashable, Iterable
+
+import orjson
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from app.config import settings
+from app.core.cache import LRUCache
+from app.core.responses import project
+
+# (clé) -> (objet source, etag, corps encodé) : tant que le cache de lecture renvoie
+# le même objet (même ligne en cache), l'ETag et le corps ne sont pas recalculés
+_encoded = LRUCache(settings.HTTP_ETAG_MEMO_SIZE)
+
+
+def encode(source, model: type[BaseModel] | None = None, key: Hashable | None = None) -> tuple[str, bytes]:
+    """
+    Corps JSON (orjson) et ETag fort (empreinte blake2b du corps) de source,
+    projetée sur les champs de model s'il est fourni. Mémoïsé par key.
+    """
+    if key is not None:
+        memo = _encoded.get(key)
+        if memo is not None and memo[0] is source:
+            return memo[1], memo[2]
+    body = orjson.dumps(source if model is None else project(model, source))
+    etag = _etag(body)
+    if key is not None:
+        _encoded.set(key, (source, etag, body))
+    return etag, body
+
+
+def row_version(rows: Iterable[dict], key: str, *parts) -> tuple | None:
+    """
+    Version de lignes lues en base : (parts..., (clé, updated_at) de chaque ligne).
+    Sert de validateur sans encoder le corps ; parts distingue les formes de
+    réponse (route, projection, curseur, compteurs ajoutés par l'API).
+    None si une ligne n'a pas d'updated_at (ETag tiré du corps).
+    """
+    version = list(parts)
+    for row in rows:
+        stamp = row.get("updated_at")
+        if stamp is None:
+            return None
+        version.append((row.get(key), stamp))
+    return tuple(version)
+
+
+def _etag(data: bytes) -> str:
+    return '"' + hashlib.blake2b(data, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Comparaison faible de If-None-Match (liste d'ETags ou *), cf. RFC 9110."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def conditional_response(
+    request: Request,
+    source,
+    cache_control: str,
+    model: type[BaseModel] | None = None,
+    key: Hashable | None = None,
+    version: tuple | None = None,
+) -> Response:
+    """
+    Réponse 200 avec ETag et Cache-Control, ou 304 sans corps si le client
+    présente déjà cet ETag (If-None-Match).
+
+    Avec version (cf. row_version), l'ETag en est tiré et le corps n'est encodé
+    que pour un 200 ; sinon l'ETag est l'empreinte du corps encodé.
+    """
+    if version is None:
+        etag, body = encode(source, model, key)
+    else:
+        etag, body = _etag(repr(version).encode()), None
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if body is None:
+        body = encode(source, model, key)[1]
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,192 @@
+# app/core/instrumentation.py
+import json
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable
+
+from app.config import settings
+from app.core.access_log import _request_id, access_log, bind_request_id
+
+logger = logging.getLogger("slapit.queries")
+
+# Méthodes du query builder qui déterminent le verbe de l'appel
+VERBS = {"select", "insert", "update", "upsert", "delete"}
+
+# observer(table, verb, durée en secondes, exception ou None)
+Observer = Callable[[str, str, float, BaseException | None], None]
+
+
+class _InstrumentedQuery:
+    """
+    Enveloppe un query builder PostgREST : les appels de chaînage sont
+    transmis tels quels (et ré-enveloppés), execute() est chronométré et
+    notifié aux observateurs du client.
+    """
+
+    __slots__ = ("_builder", "_client", "_table", "_verb")
+
+    def __init__(self, builder, client: "InstrumentedClient", table: str, verb: str | None):
+        self._builder = builder
+        self._client = client
+        self._table = table
+        self._verb = verb
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+        verb = name if name in VERBS and self._verb is None else self._verb
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute"):
+                return _InstrumentedQuery(result, self._client, self._table, verb)
+            return result
+
+        return chained
+
+    async def _attempt(self):
+        limiter = self._client.limiter
+        if limiter is None:
+            return await self._builder.execute()
+        # place dans la limite d'appels simultanés (Overloaded si saturé)
+        await limiter.acquire()
+        try:
+            return await self._builder.execute()
+        finally:
+            limiter.release()
+
+    async def execute(self):
+        verb = self._verb or "select"
+        policy = self._client.policy
+        start = time.perf_counter()
+        error = None
+        try:
+            if policy is None:
+                return await self._attempt()
+            # délai, nouveaux essais (lectures seulement), coupe-circuit
+            return await policy.call(self._attempt, idempotent=verb == "select")
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            for observer in self._client.observers:
+                observer(self._table, verb, duration, error)
+
+
+class InstrumentedClient:
+    """
+    Enveloppe le client renvoyé par get_async_db : chaque appel table(...) / rpc(...)
+    exécuté est notifié aux observateurs (métriques Prometheus, ...), soumis au
+    contrôle d'admission (limiter) et à la politique de résilience (policy) s'ils
+    sont fournis.
+    """
+
+    def __init__(self, client, observers: list[Observer] | None = None, limiter=None, policy=None):
+        self._client = client
+        self.observers: list[Observer] = list(observers or [])
+        self.limiter = limiter
+        self.policy = policy
+
+    def table(self, name: str) -> _InstrumentedQuery:
+        return _InstrumentedQuery(self._client.table(name), self, name, None)
+
+    def rpc(self, fn: str, params: dict, *args, **kwargs) -> _InstrumentedQuery:
+        return _InstrumentedQuery(self._client.rpc(fn, params, *args, **kwargs), self, fn, "rpc")
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+# 📌 Comptabilité par requête HTTP : liste des appels Supabase de la requête en cours
+_request_calls: ContextVar[list | None] = ContextVar("request_calls", default=None)
+
+
+def record_call(table: str, verb: str, duration: float, error: BaseException | None) -> None:
+    """Observateur : ajoute l'appel à la requête HTTP en cours (s'il y en a une)."""
+    calls = _request_calls.get()
+    if calls is not None:
+        calls.append((table, verb, duration))
+
+
+def current_calls() -> list:
+    """Appels Supabase (table, verbe, durée) de la requête en cours."""
+    return _request_calls.get() or []
+
+
+def server_timing(calls: list, total: float) -> str:
+    """
+    En-tête Server-Timing : total Supabase (nombre d'appels en description),
+    détail par table.verbe, puis durée totale côté application. Durées en ms.
+    """
+    per_op: dict[str, list] = {}
+    for table, verb, duration in calls:
+        agg = per_op.setdefault(f"db.{table}.{verb}", [0, 0.0])
+        agg[0] += 1
+        agg[1] += duration
+    parts = [f'db;dur={sum(c[2] for c in calls) * 1000:.2f};desc="{len(calls)} calls"']
+    parts += [f'{name};dur={dur * 1000:.2f};desc="{n}"' for name, (n, dur) in per_op.items()]
+    parts.append(f"app;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """
+    Middleware ASGI : ouvre la comptabilité des appels Supabase pour chaque
+    requête, l'expose dans l'en-tête Server-Timing et, si QUERY_LOG_ENABLED,
+    l'écrit en une ligne de log JSON. Attribue aussi l'X-Request-ID (renvoyé
+    dans la réponse) et écrit la ligne du journal d'accès.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        calls: list = []
+        token = _request_calls.set(calls)
+        request_id, id_token = bind_request_id(scope["headers"])
+        start = time.perf_counter()
+        status = 500
+        error = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = server_timing(calls, time.perf_counter() - start)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", header.encode()),
+                    (b"x-request-id", request_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            _request_calls.reset(token)
+            _request_id.reset(id_token)
+            if access_log.running:
+                route = getattr(scope.get("route"), "path", None) or scope["path"]
+                access_log.request(
+                    scope["method"], route, status, time.perf_counter() - start, calls, request_id, error
+                )
+            if settings.QUERY_LOG_ENABLED:
+                route = getattr(scope.get("route"), "path", None) or scope["path"]
+                logger.info(json.dumps({
+                    "method": scope["method"],
+                    "route": route,
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                    "db_calls": len(calls),
+                    "db_ms": round(sum(c[2] for c in calls) * 1000, 2),
+                    "calls": [{"table": t, "verb": v, "ms": round(d * 1000, 2)} for t, v, d in calls],
+                }))
@@ -0,0 +1,117 @@
+# app/core/leaderboard.py
+from bisect import bisect_left, insort
+
+# Champs du profil conservés dans le classement (pas le profil complet)
+ENTRY_FIELDS = ("auth_id", "username", "avatar_url", "score", "total_stickers")
+
+
+class Leaderboard:
+    """
+    Classement trié par score décroissant (à égalité : par auth_id).
+
+    Les clés (-score, auth_id) sont gardées dans une liste triée : une mise
+    à jour est une suppression + insertion par dichotomie, la lecture du
+    top K est une simple tranche de liste.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, dict] = {}
+        self._order: list[tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, auth_id: str) -> bool:
+        return auth_id in self._entries
+
+    def upsert(self, entry: dict) -> None:
+        auth_id = entry["auth_id"]
+        self.remove(auth_id)
+        self._entries[auth_id] = entry
+        insort(self._order, (-(entry.get("score") or 0), auth_id))
+
+    def remove(self, auth_id: str) -> None:
+        entry = self._entries.pop(auth_id, None)
+        if entry is None:
+            return
+        key = (-(entry.get("score") or 0), auth_id)
+        i = bisect_left(self._order, key)
+        if i < len(self._order) and self._order[i] == key:
+            del self._order[i]
+
+    def top(self, k: int) -> list[dict]:
+        return [
+            {"rank": rank, **self._entries[auth_id]}
+            for rank, (_, auth_id) in enumerate(self._order[:k], start=1)
+        ]
+
+    def rank(self, auth_id: str) -> int | None:
+        entry = self._entries.get(auth_id)
+        if entry is None:
+            return None
+        return bisect_left(self._order, (-(entry.get("score") or 0), auth_id)) + 1
+
+
+class Leaderboards:
+    """
+    Classement global + un classement par communauté, tenus à jour
+    incrémentalement par les écritures (stickers, profils, communautés) de
+    tous les workers (cf. app/core/replication.py).
+    """
+
+    def __init__(self):
+        self.global_board = Leaderboard()
+        self._communities: dict[str, Leaderboard] = {}
+        self._community_of: dict[str, str | None] = {}
+
+    def community(self, community_id: str) -> Leaderboard:
+        return self._communities.get(str(community_id)) or Leaderboard()
+
+    def clear(self) -> None:
+        self.global_board = Leaderboard()
+        self._communities.clear()
+        self._community_of.clear()
+
+    def replace(self, other: "Leaderboards") -> None:
+        """Remplace tous les classements par ceux reconstruits à part."""
+        self.global_board = other.global_board
+        self._communities = other._communities
+        self._community_of = other._community_of
+
+    def update(self, auth_id: str, **fields) -> None:
+        """
+        Met à jour (ou crée) l'entrée d'un utilisateur. Seuls les champs fournis
+        changent ; community_id (s'il est fourni) déplace l'utilisateur d'un
+        classement de communauté à l'autre.
+        """
+        auth_id = str(auth_id)
+        current = self.global_board._entries.get(auth_id) or {
+            "auth_id": auth_id, "username": None, "avatar_url": None, "score": 0, "total_stickers": 0,
+        }
+        entry = {**current, **{k: v for k, v in fields.items() if k in ENTRY_FIELDS}}
+        self.global_board.upsert(entry)
+
+        old_community = self._community_of.get(auth_id)
+        new_community = str(fields["community_id"]) if fields.get("community_id") else (
+            None if "community_id" in fields else old_community
+        )
+        if old_community and old_community != new_community:
+            board = self._communities.get(old_community)
+            if board is not None:
+                board.remove(auth_id)
+                if not board:
+                    del self._communities[old_community]
+        if new_community:
+            self._communities.setdefault(new_community, Leaderboard()).upsert(entry)
+        self._community_of[auth_id] = new_community
+
+    def remove(self, auth_id: str) -> None:
+        auth_id = str(auth_id)
+        self.global_board.remove(auth_id)
+        community_id = self._community_of.pop(auth_id, None)
+        if community_id and community_id in self._communities:
+            self._communities[community_id].remove(auth_id)
+
+
+# 📌 Classements partagés par les routes du worker
+leaderboards = Leaderboards()
@@ -0,0 +1,571 @@
+# app/core/memory_db.py
+"""
+Moteur de stockage en mémoire, interchangeable avec le client PostgREST
+(STORAGE_BACKEND=memory) : mêmes appels table(...).select/eq/.../execute()
+et rpc(...) que ceux des services, pour faire tourner l'API sans réseau
+(dev, démo, tests de charge locaux).
+
+Chaque table garde ses lignes par clé primaire, des index secondaires
+(auth_id, community_id, ...) et un index sur created_at, tous triés par
+(created_at, clé) : une liste paginée par clé ("plus récents d'abord")
+se lit directement dans l'index, sans tri ni parcours complet.
+
+Les fonctions SQL des migrations (add_sticker, join_community, ...) sont
+reproduites en Python, avec les mêmes codes d'erreur. Un execute() ne
+contient aucun await : il est atomique vis-à-vis de la boucle asyncio.
+Les données vivent dans le worker : lancer gunicorn avec un seul worker (-w 1).
+"""
+import bisect
+import json
+import re
+import uuid
+from datetime import datetime, timezone
+
+from postgrest.exceptions import APIError
+
+# motif produit par app.core.pagination.keyset_filter (valeurs entre guillemets ou non,
+# comme PostgREST) : created_at.lt.C,and(created_at.eq.C,id.lt.ID)
+_KEYSET = re.compile(
+    r'^created_at\.lt\.(?P<q>"?)(?P<c>[^",()]+)(?P=q),'
+    r'and\(created_at\.eq\.(?P=q)(?P=c)(?P=q),id\.lt\.(?P<qi>"?)(?P<id>[^",()]+)(?P=qi)\)$'
+)
+# ressource embarquée dans un select : [alias:]table[!colonne](colonnes)
+_EMBED = re.compile(r'^(?:(?P<alias>\w+):)?(?P<table>\w+)(?:!(?P<hint>\w+))?\((?P<columns>.*)\)$')
+# clé étrangère (dans la table enfant) utilisée par défaut pour embarquer enfant dans parent
+_RELATIONS = {
+    ("communities", "profiles"): "community_id",
+    ("communities", "stickers"): "community_id",
+    ("profiles", "stickers"): "auth_id",
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _error(message: str, code: str) -> APIError:
+    return APIError({"message": message, "code": code})
+
+
+class MemoryResponse:
+    def __init__(self, data, count: int | None = None):
+        self.data = data
+        self.count = count
+
+
+class MemoryTable:
+    """Lignes d'une table + index triés sur (created_at, clé)."""
+
+    def __init__(self, name: str, key: tuple[str, ...], indexes: tuple[str, ...] = ()):
+        self.name = name
+        self.key = key
+        self.rows: dict = {}
+        self.keys: list = []  # clés primaires triées (order + gt sur la clé)
+        self.by_created: list = []  # (created_at, clé) triés
+        self.indexes: dict[str, dict[str, list]] = {column: {} for column in indexes}
+
+    def pk(self, row: dict):
+        if len(self.key) == 1:
+            return str(row[self.key[0]])
+        return tuple(str(row[c]) for c in self.key)
+
+    def _entry(self, row: dict):
+        return (row.get("created_at") or "", self.pk(row))
+
+    def add(self, row: dict) -> None:
+        pk = self.pk(row)
+        self.rows[pk] = row
+        bisect.insort(self.keys, pk)
+        entry = self._entry(row)
+        bisect.insort(self.by_created, entry)
+        for column, index in self.indexes.items():
+            if row.get(column) is not None:
+                bisect.insort(index.setdefault(str(row[column]), []), entry)
+
+    def discard(self, pk) -> dict | None:
+        row = self.rows.pop(pk, None)
+        if row is None:
+            return None
+        _remove(self.keys, pk)
+        entry = self._entry(row)
+        _remove(self.by_created, entry)
+        for column, index in self.indexes.items():
+            if row.get(column) is not None:
+                entries = index[str(row[column])]
+                _remove(entries, entry)
+                if not entries:
+                    del index[str(row[column])]
+        return row
+
+    def replace(self, pk, row: dict) -> None:
+        self.discard(pk)
+        self.add(row)
+
+
+def _remove(entries: list, item) -> None:
+    i = bisect.bisect_left(entries, item)
+    if i < len(entries) and entries[i] == item:
+        del entries[i]
+
+
+class MemoryQuery:
+    """Query builder (sous-ensemble de postgrest utilisé par les services)."""
+
+    def __init__(self, db: "MemoryDatabase", table: MemoryTable):
+        self._db = db
+        self._table = table
+        self._action = "select"
+        self._columns = "*"
+        self._count = None
+        self._payload = None
+        self._filters: list = []  # (op, column, value)
+        self._keyset: tuple[str, str] | None = None
+        self._invalid: APIError | None = None  # filtre refusé, levé à l'exécution
+        self._order: list[tuple[str, bool]] = []
+        self._limit: int | None = None
+        self._offset = 0
+        self._single = False
+        self._embeds: dict[str, dict] = {}  # filtres / tri / limite par ressource embarquée
+
+    # chaînage
+    def select(self, columns: str = "*", count: str | None = None):
+        self._columns, self._count = columns, count
+        return self
+
+    def insert(self, payload):
+        self._action, self._payload = "insert", payload
+        return self
+
+    def update(self, payload: dict):
+        self._action, self._payload = "update", payload
+        return self
+
+    def delete(self):
+        self._action = "delete"
+        return self
+
+    def eq(self, column: str, value):
+        self._filter("eq", column, str(value))
+        return self
+
+    def in_(self, column: str, values):
+        self._filters.append(("in", column, {str(v) for v in values}))
+        return self
+
+    def gt(self, column: str, value):
+        self._filter("gt", column, str(value))
+        return self
+
+    def or_(self, filters: str):
+        # seule forme utilisée par les services : le curseur de pagination par clé
+        match = _KEYSET.match(filters.replace(" ", ""))
+        if not match:
+            self._invalid = _error(f'"failed to parse logic tree ({filters})" (line 1, column 4)', "PGRST100")
+            return self
+        self._keyset = (match["c"], match["id"])
+        return self
+
+    def order(self, column: str, desc: bool = False, foreign_table: str | None = None, **_):
+        if foreign_table:
+            self._embed(foreign_table)["order"].append((column, desc))
+        else:
+            self._order.append((column, desc))
+        return self
+
+    def limit(self, n: int, foreign_table: str | None = None):
+        if foreign_table:
+            self._embed(foreign_table)["limit"] = n
+        else:
+            self._limit = n
+        return self
+
+    def range(self, start: int, end: int):
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    def _filter(self, op: str, column: str, value) -> None:
+        # "table.colonne" : filtre des lignes de la ressource embarquée
+        name, dot, embedded = column.partition(".")
+        if dot:
+            self._embed(name)["filters"].append((op, embedded, value))
+        else:
+            self._filters.append((op, column, value))
+
+    def _embed(self, name: str) -> dict:
+        return self._embeds.setdefault(name, {"filters": [], "order": [], "limit": None})
+
+    # exécution
+    async def execute(self) -> MemoryResponse:
+        if self._invalid is not None:
+            raise self._invalid
+        if self._action == "insert":
+            rows = self._payload if isinstance(self._payload, list) else [self._payload]
+            return MemoryResponse(self._db.insert(self._table.name, rows))
+
+        rows, count = self._plan()
+        if self._action == "update":
+            rows = [self._db.update(self._table, row, self._payload) for row in rows]
+        elif self._action == "delete":
+            rows = [self._table.discard(self._table.pk(row)) for row in rows]
+        else:
+            rows = [self._project(row) for row in rows]
+
+        if self._single:
+            if len(rows) != 1:
+                raise APIError({
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                    "code": "PGRST116",
+                    "details": f"The result contains {len(rows)} rows",
+                })
+            return MemoryResponse(rows[0], count)
+        return MemoryResponse(rows, count)
+
+    def _candidates(self):
+        """
+        Lignes candidates dans l'ordre le plus utile, d'après les filtres :
+        clé primaire, puis index secondaire, puis index created_at / clés.
+        Renvoie (itérable de lignes, déjà triées selon self._order ?).
+        """
+        table = self._table
+        newest_first = self._order[:1] == [("created_at", True)]
+        for op, column, value in self._filters:
+            if op == "eq" and (column,) == table.key:
+                row = table.rows.get(value)
+                return ([row] if row else []), True
+            if op == "in" and (column,) == table.key:
+                return [table.rows[v] for v in value if v in table.rows], False
+        for op, column, value in self._filters:
+            if op == "eq" and column in table.indexes:
+                return self._walk(table.indexes[column].get(value, [])), newest_first
+        if newest_first:
+            return self._walk(table.by_created), True
+        if self._order[:1] == [(table.key[0], False)] and len(table.key) == 1:
+            start = 0
+            for op, column, value in self._filters:
+                if op == "gt" and column == table.key[0]:
+                    start = bisect.bisect_right(table.keys, value)
+            return (table.rows[pk] for pk in table.keys[start:]), True
+        return table.rows.values(), False
+
+    def _walk(self, entries: list):
+        # parcours "plus récents d'abord", en partant du curseur s'il y en a un
+        end = len(entries)
+        if self._keyset is not None:
+            end = bisect.bisect_left(entries, self._keyset)
+        rows = self._table.rows
+        return (rows[entries[i][1]] for i in range(end - 1, -1, -1))
+
+    def _matches(self, row: dict) -> bool:
+        for op, column, value in self._filters:
+            current = row.get(column)
+            current = None if current is None else str(current)
+            if op == "eq" and current != value:
+                return False
+            if op == "in" and current not in value:
+                return False
+            if op == "gt" and (current is None or current <= value):
+                return False
+        if self._keyset is not None:
+            return (row.get("created_at") or "", str(row.get("id"))) < self._keyset
+        return True
+
+    def _plan(self) -> tuple[list, int | None]:
+        candidates, ordered = self._candidates()
+        if not self._order:
+            ordered = True
+        matched = (row for row in candidates if self._matches(row))
+        if not ordered or self._count:
+            matched = list(matched)
+            if not ordered:
+                for column, desc in reversed(self._order):
+                    matched.sort(key=lambda r: (r.get(column) is None, str(r.get(column) or "")), reverse=desc)
+        count = None
+        if self._count:
+            count = len(matched)
+        rows = []
+        stop = None if self._limit is None else self._offset + self._limit
+        for i, row in enumerate(matched):
+            if stop is not None and i >= stop:
+                break
+            if i >= self._offset:
+                rows.append(row)
+        return rows, count
+
+    def _project(self, row: dict) -> dict:
+        if self._columns.strip() == "*":
+            return dict(row)
+        out = {}
+        for column in _split_columns(self._columns):
+            embed = _EMBED.match(column)
+            if embed:
+                out[embed["alias"] or embed["table"]] = self._embedded(row, embed)
+            elif column == "*":
+                out.update(row)
+            else:
+                out[column] = row.get(column)
+        return out
+
+    def _embedded(self, row: dict, embed: re.Match):
+        # lignes enfant de row (relation 1-n), avec les filtres / tri / limite qui leur sont propres
+        child = self._db.tables[embed["table"]]
+        fk = embed["hint"] or _RELATIONS[(self._table.name, child.name)]
+        ops = self._embed(embed["alias"] or embed["table"])
+        query = MemoryQuery(self._db, child)
+        query._filters = [("eq", fk, str(self._table.pk(row))), *ops["filters"]]
+        if embed["columns"].strip() == "count":
+            return [{"count": len(query._plan()[0])}]
+        query._columns, query._order, query._limit = embed["columns"], list(ops["order"]), ops["limit"]
+        return [query._project(r) for r in query._plan()[0]]
+
+
+def _split_columns(columns: str) -> list[str]:
+    """Colonnes d'un select, séparées par les virgules de premier niveau (hors parenthèses)."""
+    parts, depth, current = [], 0, ""
+    for char in columns:
+        if char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += (char == "(") - (char == ")")
+        current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+class MemoryDatabase:
+    """Tables profiles, communities, user_communities et stickers, en mémoire."""
+
+    def __init__(self):
+        self.tables = {
+            "profiles": MemoryTable("profiles", ("auth_id",), indexes=("community_id",)),
+            "communities": MemoryTable("communities", ("id",), indexes=("admin_id",)),
+            "user_communities": MemoryTable(
+                "user_communities", ("user_id", "community_id"), indexes=("user_id", "community_id")
+            ),
+            "stickers": MemoryTable("stickers", ("id",), indexes=("auth_id", "community_id")),
+        }
+        self._rpc = {
+            "add_sticker": self._add_sticker,
+            "delete_sticker": self._delete_sticker,
+            "add_stickers_batch": self._add_stickers_batch,
+            "add_stickers_batch_deferred": self._add_stickers_batch_deferred,
+            "add_sticker_deferred": self._add_sticker_deferred,
+            "delete_sticker_deferred": self._delete_sticker_deferred,
+            "apply_profile_deltas": self._apply_profile_deltas,
+            "create_community": self._create_community,
+            "join_community": self._join_community,
+            "quit_community": self._quit_community,
+            "kick_user": self._kick_user,
+        }
+
+    def table(self, name: str) -> MemoryQuery:
+        if name not in self.tables:
+            raise _error(f'relation "public.{name}" does not exist', "42P01")
+        return MemoryQuery(self, self.tables[name])
+
+    def rpc(self, fn: str, params: dict) -> "_MemoryCall":
+        if fn not in self._rpc:
+            raise _error(f"Could not find the function public.{fn}", "PGRST202")
+        return _MemoryCall(self._rpc[fn], params)
+
+    def load(self, path: str) -> None:
+        """Charge un jeu de données JSON {"profiles": [...], "stickers": [...], ...}."""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        for name in ("profiles", "communities", "user_communities", "stickers"):
+            self.insert(name, data.get(name, []))
+
+    # 📌 écritures (contrôle des clés, valeurs par défaut, index)
+    def insert(self, name: str, rows: list[dict]) -> list[dict]:
+        table = self.tables[name]
+        prepared = []
+        for row in rows:
+            row = dict(row)
+            if "id" in table.key and row.get("id") is None:
+                row["id"] = str(uuid.uuid4())
+            row.setdefault("created_at", _now())
+            row.setdefault("updated_at", row["created_at"])
+            if table.pk(row) in table.rows or any(table.pk(row) == table.pk(p) for p in prepared):
+                raise _error(f'duplicate key value violates unique constraint "{name}_pkey"', "23505")
+            prepared.append(row)
+        for row in prepared:
+            table.add(row)
+        return [dict(row) for row in prepared]
+
+    def update(self, table: MemoryTable, row: dict, payload: dict) -> dict:
+        # updated_at : comme le trigger set_updated_at
+        updated = {**row, **payload, "updated_at": _now()}
+        table.replace(table.pk(row), updated)
+        return dict(updated)
+
+    def _profile(self, auth_id) -> dict | None:
+        return self.tables["profiles"].rows.get(str(auth_id))
+
+    def _bump(self, profile: dict, n: int) -> dict:
+        return self.update(self.tables["profiles"], profile, {
+            "total_stickers": max((profile.get("total_stickers") or 0) + n, 0),
+            "score": max((profile.get("score") or 0) + 10 * n, 0),
+        })
+
+    # 📌 fonctions SQL (cf. supabase/migrations)
+    def _add_sticker(self, p_sticker: dict) -> dict:
+        profile = self._profile(p_sticker.get("auth_id"))
+        if profile is None:
+            raise _error("Profil non trouvé", "P0002")
+        if str(p_sticker.get("community_id")) not in self.tables["communities"].rows:
+            raise _error('insert or update on table "stickers" violates foreign key constraint', "23503")
+        [sticker] = self.insert("stickers", [p_sticker])
+        profile = self._bump(profile, 1)
+        return {"sticker": sticker, "total_stickers": profile["total_stickers"], "score": profile["score"]}
+
+    def _delete_sticker(self, p_id: str) -> dict:
+        sticker = self.tables["stickers"].discard(str(p_id))
+        if sticker is None:
+            raise _error("Sticker not found", "P0002")
+        profile = self._profile(sticker["auth_id"])
+        if profile is not None:
+            profile = self._bump(profile, -1)
+        return {
+            "sticker": sticker,
+            "total_stickers": profile and profile["total_stickers"],
+            "score": profile and profile["score"],
+        }
+
+    def _add_sticker_deferred(self, p_sticker: dict) -> dict:
+        profile = self._profile(p_sticker.get("auth_id"))
+        if profile is None:
+            raise _error("Profil non trouvé", "P0002")
+        if str(p_sticker.get("community_id")) not in self.tables["communities"].rows:
+            raise _error('insert or update on table "stickers" violates foreign key constraint', "23503")
+        [sticker] = self.insert("stickers", [p_sticker])
+        return {"sticker": sticker, "total_stickers": profile.get("total_stickers") or 0, "score": profile.get("score") or 0}
+
+    def _delete_sticker_deferred(self, p_id: str) -> dict:
+        sticker = self.tables["stickers"].discard(str(p_id))
+        if sticker is None:
+            raise _error("Sticker not found", "P0002")
+        profile = self._profile(sticker["auth_id"])
+        return {
+            "sticker": sticker,
+            "total_stickers": profile and profile["total_stickers"],
+            "score": profile and profile["score"],
+        }
+
+    def _apply_profile_deltas(self, p_deltas: list[dict]) -> list[dict]:
+        deltas = {}
+        for d in p_deltas:
+            total, score = deltas.get(str(d["auth_id"]), (0, 0))
+            deltas[str(d["auth_id"])] = (total + d["total_stickers"], score + d["score"])
+        bumped = []
+        for auth_id, (total, score) in deltas.items():
+            profile = self._profile(auth_id)
+            if profile is None:
+                continue
+            profile = self.update(self.tables["profiles"], profile, {
+                "total_stickers": max((profile.get("total_stickers") or 0) + total, 0),
+                "score": max((profile.get("score") or 0) + score, 0),
+            })
+            bumped.append({k: profile[k] for k in ("auth_id", "total_stickers", "score")})
+        return bumped
+
+    def _insert_batch(self, p_stickers: list[dict]) -> tuple[list[dict], dict[str, int]]:
+        # lignes sans profil / communauté ou dont l'id existe déjà : écartées
+        stickers, counts = [], {}
+        existing = self.tables["stickers"].rows
+        for row in p_stickers:
+            if self._profile(row.get("auth_id")) is None:
+                continue
+            if str(row.get("community_id")) not in self.tables["communities"].rows:
+                continue
+            if row.get("id") is not None and str(row["id"]) in existing:
+                continue
+            [sticker] = self.insert("stickers", [row])
+            stickers.append(sticker)
+            counts[str(sticker["auth_id"])] = counts.get(str(sticker["auth_id"]), 0) + 1
+        return stickers, counts
+
+    def _add_stickers_batch(self, p_stickers: list[dict]) -> dict:
+        stickers, counts = self._insert_batch(p_stickers)
+        profiles = []
+        for auth_id, n in counts.items():
+            profile = self._bump(self._profile(auth_id), n)
+            profiles.append({k: profile[k] for k in ("auth_id", "total_stickers", "score")})
+        return {"stickers": stickers, "profiles": profiles}
+
+    def _add_stickers_batch_deferred(self, p_stickers: list[dict]) -> dict:
+        stickers, counts = self._insert_batch(p_stickers)
+        profiles = []
+        for auth_id, n in counts.items():
+            profile = self._profile(auth_id)
+            profiles.append({
+                "auth_id": auth_id,
+                "total_stickers": profile.get("total_stickers") or 0,
+                "score": profile.get("score") or 0,
+                "n": n,
+            })
+        return {"stickers": stickers, "profiles": profiles}
+
+    def _create_community(self, p_community: dict) -> dict:
+        profile = self._profile(p_community.get("admin_id"))
+        if profile is None:
+            raise _error("Erreur lors de la mise à jour du profil administrateur", "P0001")
+        [community] = self.insert("communities", [p_community])
+        self.insert("user_communities", [{
+            "user_id": str(community["admin_id"]),
+            "community_id": str(community["id"]),
+            "joined_at": community["created_at"],
+        }])
+        self.update(self.tables["profiles"], profile, {"community_id": str(community["id"]), "is_admin": True})
+        return community
+
+    def _join_community(self, p_community_id: str, p_user_id: str) -> dict:
+        profile = self._profile(p_user_id)
+        if profile is None:
+            raise _error("Profil introuvable", "P0002")
+        if str(p_community_id) not in self.tables["communities"].rows:
+            raise _error('insert or update on table "user_communities" violates foreign key constraint', "23503")
+        self.insert("user_communities", [{
+            "user_id": str(p_user_id), "community_id": str(p_community_id), "joined_at": _now(),
+        }])
+        self.update(self.tables["profiles"], profile, {"community_id": str(p_community_id)})
+        return {"user_id": str(p_user_id), "community_id": str(p_community_id)}
+
+    def _leave(self, community_id: str, user_id: str, profile_error: str) -> dict:
+        memberships = self.tables["user_communities"]
+        if (str(user_id), str(community_id)) not in memberships.rows:
+            raise _error("Utilisateur introuvable dans cette communauté", "P0002")
+        profile = self._profile(user_id)
+        if profile is None:
+            raise _error(profile_error, "P0001")
+        memberships.discard((str(user_id), str(community_id)))
+        self.update(self.tables["profiles"], profile, {"community_id": None})
+        return {"user_id": str(user_id), "community_id": str(community_id)}
+
+    def _quit_community(self, p_community_id: str, p_user_id: str) -> dict:
+        return self._leave(p_community_id, p_user_id, "Erreur lors de la mise à jour du profil")
+
+    def _kick_user(self, p_community_id: str, p_admin_id: str, p_user_id: str) -> dict:
+        community = self.tables["communities"].rows.get(str(p_community_id))
+        if community is None:
+            raise _error("Communauté introuvable", "P0002")
+        if str(community.get("admin_id")) != str(p_admin_id):
+            raise _error("Seul l'administrateur peut expulser un utilisateur", "42501")
+        return self._leave(
+            p_community_id, p_user_id, "Erreur lors de la mise à jour du profil de l'utilisateur expulsé"
+        )
+
+
+class _MemoryCall:
+    """Appel de fonction SQL : même interface qu'un query builder (execute)."""
+
+    def __init__(self, fn, params: dict):
+        self._fn = fn
+        self._params = params
+
+    async def execute(self) -> MemoryResponse:
+        return MemoryResponse(self._fn(**self._params))
@@ -0,0 +1,171 @@
+# app/core/metrics.py
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+from app.core.cache import LRUCache
+
+# 📌 Métriques HTTP de l'API (labels : route = gabarit de la route, pas le chemin réel)
+HTTP_REQUESTS = Counter(
+    "slapit_http_requests_total",
+    "Requêtes HTTP traitées",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "slapit_http_request_duration_seconds",
+    "Durée de traitement des requêtes HTTP",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+HTTP_IN_FLIGHT = Gauge(
+    "slapit_http_requests_in_flight",
+    "Requêtes HTTP en cours de traitement",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+# 📌 Appels sortants vers Supabase (table × verbe)
+SUPABASE_LATENCY = Histogram(
+    "slapit_supabase_request_duration_seconds",
+    "Durée des appels PostgREST vers Supabase",
+    ["table", "verb", "outcome"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+# 📌 Coalescence des lectures (leader = appel Supabase réel, follower = appel évité)
+SINGLEFLIGHT_CALLS = Counter(
+    "slapit_singleflight_calls_total",
+    "Lectures passées par la coalescence, par rôle",
+    ["name", "role"],
+)
+
+# 📌 Diffusion WebSocket (broker du worker)
+BROKER_SUBSCRIBERS = Gauge(
+    "slapit_ws_subscribers",
+    "Connexions WebSocket abonnées",
+    multiprocess_mode="livesum",
+)
+BROKER_DELIVERED = Counter(
+    "slapit_ws_events_delivered_total",
+    "Événements remis aux files des abonnés",
+)
+BROKER_DROPPED = Counter(
+    "slapit_ws_slow_consumers_dropped_total",
+    "Abonnés décrochés parce que leur file était pleine",
+)
+BROKER_SEND_ERRORS = Counter(
+    "slapit_broker_send_errors_total",
+    "Messages du broker non remis à un autre worker (file du pair pleine, message trop gros)",
+)
+ADMISSION_REJECTED = Counter(
+    "slapit_admission_rejected_total",
+    "Requêtes refusées par le contrôle d'admission (503) ou le quota d'écritures (429)",
+    ["reason"],
+)
+RESILIENCE_EVENTS = Counter(
+    "slapit_supabase_resilience_events_total",
+    "Nouveaux essais, lectures doublées, délais dépassés et ouvertures du coupe-circuit",
+    ["event"],
+)
+ACCESS_LOG_DROPPED = Counter(
+    "slapit_access_log_dropped_total",
+    "Lignes de log abandonnées parce que la file du journal était pleine",
+)
+PROFILE_COUNTER_FLUSHES = Counter(
+    "slapit_profile_counter_flushes_total",
+    "Écritures groupées des compteurs de profils différés, par résultat",
+    ["outcome"],
+)
+
+
+# Séries déjà résolues : .labels() est coûteux, on le fait une fois par combinaison.
+# Un cache borné par famille de métriques (les clés des deux familles ne se mélangent pas).
+_http_cache = LRUCache(1024)
+_supabase_cache = LRUCache(1024)
+
+
+def _http_series(method: str, route: str, status: int):
+    key = (method, route, status)
+    series = _http_cache.get(key)
+    if series is None:
+        series = (
+            HTTP_REQUESTS.labels(method, route, str(status)),
+            HTTP_LATENCY.labels(method, route, str(status)),
+        )
+        _http_cache.set(key, series)
+    return series
+
+
+def observe_supabase_call(table: str, verb: str, duration: float, error: BaseException | None) -> None:
+    key = (table, verb, error is None)
+    series = _supabase_cache.get(key)
+    if series is None:
+        series = SUPABASE_LATENCY.labels(table, verb, "ok" if error is None else "error")
+        _supabase_cache.set(key, series)
+    series.observe(duration)
+
+
+def metrics_payload() -> bytes:
+    """
+    Export texte Prometheus. En mode multi-processus (gunicorn, variable
+    PROMETHEUS_MULTIPROC_DIR définie), agrège les fichiers de tous les workers.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+_in_flight: dict[str, Gauge] = {}
+
+
+class PrometheusMiddleware:
+    """
+    Middleware ASGI (sans BaseHTTPMiddleware, pour limiter le coût par requête) :
+    compte les requêtes, mesure leur durée et suit celles en cours.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        in_flight = _in_flight.get(method)
+        if in_flight is None:
+            in_flight = _in_flight[method] = HTTP_IN_FLIGHT.labels(method)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            in_flight.dec()
+            # la route est renseignée dans le scope par le routeur Starlette
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            requests, latency = _http_series(method, template, status)
+            requests.inc()
+            latency.observe(duration)
@@ -0,0 +1,51 @@
+# app/core/pagination.py
+import base64
+import json
+from datetime import datetime
+from uuid import UUID
+
+
+def encode_cursor(created_at: str, row_id: str) -> str:
+    """Curseur opaque (base64url) pointant sur la ligne (created_at, id)."""
+    raw = json.dumps([created_at, str(row_id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    """
+    Inverse de encode_cursor : (created_at ISO 8601, id UUID).
+    Les valeurs partent dans un filtre PostgREST (keyset_filter) : tout ce qui
+    n'est pas une date et un UUID valides est refusé. Lève ValueError si le
+    curseur est invalide.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        datetime.fromisoformat(created_at)
+        return created_at, str(UUID(row_id))
+    except Exception:
+        raise ValueError("Curseur invalide")
+
+
+def encode_key_cursor(key: str) -> str:
+    """Curseur opaque sur une clé seule (listes triées par clé croissante)."""
+    return base64.urlsafe_b64encode(json.dumps([str(key)]).encode()).decode().rstrip("=")
+
+
+def decode_key_cursor(cursor: str) -> str:
+    """Inverse de encode_key_cursor (clé UUID, normalisée). Lève ValueError si le curseur est invalide."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        [key] = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return str(UUID(key))
+    except Exception:
+        raise ValueError("Curseur invalide")
+
+
+def keyset_filter(created_at: str, row_id: str) -> str:
+    """
+    Filtre PostgREST (pour .or_) des lignes strictement après le curseur,
+    dans l'ordre created_at desc, id desc. Valeurs issues de decode_cursor
+    uniquement (validées : rien à échapper).
+    """
+    return f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{row_id}")'
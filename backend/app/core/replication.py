@@ -0,0 +1,153 @@
+# app/core/replication.py
+import asyncio
+import logging
+import math
+import os
+import time
+from typing import Any, Awaitable, Callable
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.core.broker import broker
+
+logger = logging.getLogger(__name__)
+
+# Sujet du broker réservé à la réplication (aucun abonné WebSocket)
+SYNC_TOPIC = "_sync"
+
+# Attente avant un nouvel essai quand le chargement initial a échoué (secondes)
+LOAD_RETRY_DELAY = 5.0
+
+Handler = Callable[[dict], None]
+# chargeur : construit de nouvelles structures depuis Supabase (sans toucher à celles
+# en service) et renvoie la fonction qui les met en place
+Loader = Callable[[Any], Awaitable[Callable[[], None]]]
+
+
+class WarmingUp(HTTPException):
+    """503 avec Retry-After : les structures en mémoire du worker ne sont pas encore chargées."""
+
+    def __init__(self, retry_after: float = LOAD_RETRY_DELAY):
+        super().__init__(
+            status_code=503,
+            detail="Chargement en cours, réessayez dans quelques secondes",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+class Replicator:
+    """
+    Structures dérivées propres à chaque worker (index spatial, tuiles, classements,
+    caches de lecture), tenues cohérentes entre les workers :
+
+    - publish() applique un événement d'écriture tout de suite dans le worker puis le
+      diffuse aux autres par le transport du broker ; chacun l'applique une fois
+      (les messages reçus du worker émetteur lui-même sont ignorés) ;
+    - start() charge les structures en tâche de fond (ready est faux jusque-là) puis,
+      si resync_interval > 0, les reconstruit périodiquement depuis Supabase :
+      rattrapage des messages perdus (transport local au worker, pair saturé) ;
+    - les événements reçus pendant un chargement sont rejoués sur les nouvelles
+      structures une fois en place (les handlers sont idempotents).
+    """
+
+    def __init__(self, resync_interval: float = 0.0):
+        self.resync_interval = resync_interval
+        self.ready = True
+        self.loaded_at: float | None = None
+        self._handlers: dict[str, Handler] = {}
+        self._loaders: list[tuple[str, Loader]] = []
+        self._journal: list[tuple[str, dict]] | None = None
+        self._task: asyncio.Task | None = None
+        self.received = 0
+
+    def on(self, event_type: str, handler: Handler) -> None:
+        self._handlers[event_type] = handler
+
+    def loader(self, name: str, load: Loader) -> None:
+        self._loaders.append((name, load))
+
+    def publish(self, event_type: str, payload: dict) -> None:
+        """Applique l'événement dans ce worker et le diffuse aux autres (non bloquant)."""
+        self._apply(event_type, payload)
+        broker.publish(SYNC_TOPIC, {"type": event_type, "origin": os.getpid(), "payload": payload})
+
+    def check_ready(self) -> None:
+        """Lève WarmingUp tant que le premier chargement n'a pas abouti."""
+        if not self.ready:
+            raise WarmingUp()
+
+    def _receive(self, event: dict) -> None:
+        if event.get("origin") == os.getpid():
+            return  # déjà appliqué par publish()
+        self.received += 1
+        try:
+            self._apply(event["type"], event["payload"])
+        except Exception:
+            logger.exception("Événement de réplication %s non appliqué", event.get("type"))
+
+    def _apply(self, event_type: str, payload: dict) -> None:
+        handler = self._handlers.get(event_type)
+        if handler is None:
+            logger.warning("Événement de réplication inconnu ignoré : %s", event_type)
+            return
+        if self._journal is not None:
+            self._journal.append((event_type, payload))
+        handler(payload)
+
+    async def start(self, get_client: Callable[[], Awaitable]) -> None:
+        if self._task is None and self._loaders:
+            self.ready = False
+            self._task = asyncio.ensure_future(self._run(get_client))
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def reload(self, supabase) -> None:
+        """Reconstruit toutes les structures puis les met en place d'un coup."""
+        start = time.perf_counter()
+        self._journal = []
+        try:
+            commits = [await load(supabase) for _, load in self._loaders]
+        finally:
+            journal, self._journal = self._journal, None
+        # sans point de suspension : aucune requête ne voit un état intermédiaire
+        for commit in commits:
+            commit()
+        for event_type, payload in journal:
+            self._handlers[event_type](payload)
+        self.loaded_at = time.time()
+        logger.info(
+            "Structures en mémoire chargées (%s) en %.1f s",
+            ", ".join(name for name, _ in self._loaders), time.perf_counter() - start,
+        )
+
+    async def _run(self, get_client: Callable[[], Awaitable]) -> None:
+        while not self.ready:
+            try:
+                await self.reload(await get_client())
+                self.ready = True
+            except Exception:
+                logger.exception("Chargement des structures en mémoire échoué, nouvel essai dans %.0f s", LOAD_RETRY_DELAY)
+                await asyncio.sleep(LOAD_RETRY_DELAY)
+        while self.resync_interval > 0:
+            await asyncio.sleep(self.resync_interval)
+            try:
+                await self.reload(await get_client())
+            except Exception:
+                logger.exception("Resynchronisation des structures en mémoire échouée")
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "loaded_at": self.loaded_at,
+            "received": self.received,
+            "resync_interval": self.resync_interval,
+        }
+
+
+# 📌 Réplication des structures en mémoire du worker (handlers et chargeurs enregistrés par les services)
+replicator = Replicator(settings.INDEX_RESYNC_INTERVAL)
+broker.listen(SYNC_TOPIC, replicator._receive)
@@ -0,0 +1,239 @@
+# app/core/resilience.py
+import asyncio
+import math
+import random
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+
+import httpx
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+
+from app.config import settings
+from app.core.metrics import RESILIENCE_EVENTS
+
+# Codes PostgREST / Postgres d'erreurs passagères (connexion, pool, statement timeout)
+TRANSIENT_CODES = {"PGRST000", "PGRST001", "PGRST002", "PGRST003", "57014", "57P01", "08006", "08001"}
+
+# 📌 Échéance de la requête HTTP en cours (time.monotonic()), posée par DeadlineMiddleware
+_deadline: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(HTTPException):
+    """504 : l'appel Supabase n'a pas abouti avant son délai ou l'échéance de la requête."""
+
+    def __init__(self):
+        super().__init__(status_code=504, detail="Supabase n'a pas répondu à temps")
+
+
+class CircuitOpen(HTTPException):
+    """503 immédiat avec Retry-After : Supabase est en échec, on ne l'appelle plus pour l'instant."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(
+            status_code=503,
+            detail="Supabase indisponible, réessayez plus tard",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+def remaining() -> float | None:
+    """Secondes restantes avant l'échéance de la requête en cours (None : pas d'échéance)."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def clear_deadline() -> None:
+    """Retire l'échéance de la requête en cours (flux longs : seul le délai par appel s'applique)."""
+    _deadline.set(None)
+
+
+def is_transient(error: BaseException) -> bool:
+    """Erreur réseau / timeout / indisponibilité : l'appel peut être retenté."""
+    if isinstance(error, (asyncio.TimeoutError, httpx.TransportError, OSError)):
+        return True
+    return isinstance(error, APIError) and (error.code or "") in TRANSIENT_CODES
+
+
+class CircuitBreaker:
+    """
+    Coupe-circuit du worker : après threshold échecs passagers consécutifs, les
+    appels échouent tout de suite (CircuitOpen) pendant reset_timeout secondes ;
+    puis un seul appel d'essai est laissé passer (demi-ouvert) : succès -> fermé,
+    échec -> rouvert.
+    """
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.reset()
+
+    def reset(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_at: float | None = None
+
+    def before_call(self, probe_timeout: float) -> None:
+        """Lève CircuitOpen si l'appel ne doit pas partir."""
+        if self.state == "closed":
+            return
+        now = time.monotonic()
+        if self.state == "open":
+            wait = self.opened_at + self.reset_timeout - now
+            if wait > 0:
+                raise CircuitOpen(wait)
+            self.state = "half_open"
+            self._probe_at = None
+        # demi-ouvert : un seul appel d'essai à la fois (un essai perdu expire)
+        if self._probe_at is not None and now - self._probe_at < probe_timeout:
+            raise CircuitOpen(self.reset_timeout)
+        self._probe_at = now
+
+    def record(self, ok: bool) -> None:
+        if ok:
+            self.state, self.failures, self._probe_at = "closed", 0, None
+            return
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.threshold:
+            if self.state != "open":
+                RESILIENCE_EVENTS.labels("circuit_open").inc()
+            self.state, self.opened_at, self._probe_at = "open", time.monotonic(), None
+
+    def stats(self) -> dict:
+        return {"state": self.state, "failures": self.failures}
+
+
+class CallPolicy:
+    """
+    Politique appliquée à chaque appel Supabase (cf. InstrumentedClient) :
+
+    - délai par appel : min(call_timeout, temps restant avant l'échéance de la requête) ;
+    - lectures (idempotentes) retentées jusqu'à retries fois sur erreur passagère,
+      avec attente exponentielle à gigue complète, dans la limite de l'échéance ;
+    - lectures doublées (hedging) si la première n'a pas répondu après hedge_after
+      secondes : la première réponse gagne, l'autre est annulée (0 = désactivé) ;
+    - coupe-circuit partagé par tous les appels du worker.
+    Les écritures ne sont jamais retentées ni doublées.
+    """
+
+    def __init__(
+        self,
+        call_timeout: float,
+        retries: int,
+        backoff: float,
+        hedge_after: float,
+        breaker: CircuitBreaker,
+    ):
+        self.call_timeout = call_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge_after = hedge_after
+        self.breaker = breaker
+
+    async def call(self, attempt: Callable[[], Awaitable[Any]], idempotent: bool) -> Any:
+        retries = self.retries if idempotent else 0
+        for n in range(retries + 1):
+            timeout = self._timeout()
+            self.breaker.before_call(timeout)
+            try:
+                if idempotent and 0 < self.hedge_after < timeout:
+                    result = await self._hedged(attempt, timeout)
+                else:
+                    result = await asyncio.wait_for(attempt(), timeout)
+            except HTTPException:
+                raise  # refus local (surcharge) : ni échec amont ni nouvel essai
+            except Exception as e:
+                if not is_transient(e):
+                    self.breaker.record(True)  # Supabase a répondu (erreur métier)
+                    raise
+                self.breaker.record(False)
+                delay = random.uniform(0, self.backoff * 2 ** n)
+                left = remaining()
+                if n == retries or (left is not None and left <= delay):
+                    if isinstance(e, asyncio.TimeoutError):
+                        RESILIENCE_EVENTS.labels("timeout").inc()
+                        raise DeadlineExceeded() from e
+                    raise
+                RESILIENCE_EVENTS.labels("retry").inc()
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record(True)
+            return result
+
+    def _timeout(self) -> float:
+        left = remaining()
+        if left is None:
+            return self.call_timeout
+        if left <= 0:
+            RESILIENCE_EVENTS.labels("deadline").inc()
+            raise DeadlineExceeded()
+        return min(self.call_timeout, left)
+
+    async def _hedged(self, attempt: Callable[[], Awaitable[Any]], timeout: float) -> Any:
+        end = time.monotonic() + timeout
+        tasks = {asyncio.ensure_future(attempt())}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if not done:
+                RESILIENCE_EVENTS.labels("hedge").inc()
+                tasks.add(asyncio.ensure_future(attempt()))
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(
+                    tasks, timeout=end - time.monotonic(), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise asyncio.TimeoutError()
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+                task.add_done_callback(_consume)
+
+    def stats(self) -> dict:
+        return {"circuit": self.breaker.stats()}
+
+
+def _consume(task: asyncio.Task) -> None:
+    # résultat d'un appel doublé abandonné : exception marquée comme lue
+    if not task.cancelled():
+        task.exception()
+
+
+class DeadlineMiddleware:
+    """
+    Middleware ASGI : chaque requête HTTP reçoit une échéance (REQUEST_DEADLINE
+    secondes), propagée aux appels Supabase via un ContextVar. Un appel qui ne
+    peut plus aboutir à temps échoue en 504 au lieu d'occuper le worker.
+    """
+
+    def __init__(self, app, budget: float | None = None):
+        self.app = app
+        self.budget = budget
+
+    async def __call__(self, scope, receive, send):
+        budget = self.budget if self.budget is not None else settings.REQUEST_DEADLINE
+        if scope["type"] != "http" or budget <= 0:
+            await self.app(scope, receive, send)
+            return
+        token = _deadline.set(time.monotonic() + budget)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _deadline.reset(token)
+
+
+# 📌 Politique des appels Supabase du worker (cf. instrument())
+supabase_policy = CallPolicy(
+    settings.SUPABASE_CALL_TIMEOUT,
+    settings.SUPABASE_READ_RETRIES,
+    settings.SUPABASE_RETRY_BACKOFF,
+    settings.SUPABASE_HEDGE_AFTER,
+    CircuitBreaker(settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_TIMEOUT),
+)
@@ -0,0 +1,80 @@
+# app/core/responses.py
+from uuid import UUID
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+# Champs exposés par modèle de réponse (calculés une fois)
+_fields: dict[type, tuple[str, ...]] = {}
+
+
+def select_list(model: type[BaseModel], fields: str | None, always: tuple[str, ...] = ()) -> str:
+    """
+    Liste de colonnes PostgREST d'un paramètre fields= (noms séparés par des
+    virgules, parmi les champs du modèle de réponse) ; "*" sans fields.
+    Les colonnes de always (clés, curseurs) sont toujours incluses.
+    Lève ValueError sur un champ inconnu.
+    """
+    if not fields:
+        return "*"
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in model.model_fields and name not in always]
+    if unknown:
+        raise ValueError(f"Champs inconnus : {', '.join(unknown)}")
+    return ",".join(dict.fromkeys((*always, *requested)))
+
+
+def pick(row: dict, columns: str) -> dict:
+    """Ligne réduite aux colonnes d'une liste produite par select_list."""
+    if columns == "*":
+        return row
+    return {name: row.get(name) for name in columns.split(",")}
+
+
+def split_ids(raw: str, max_ids: int) -> list[str]:
+    """
+    Ids d'un paramètre ids=a,b,c (UUID), dédoublonnés dans l'ordre de la requête.
+    Lève ValueError si un id est invalide ou s'il y en a plus de max_ids.
+    """
+    ids = []
+    for value in raw.split(","):
+        if not value.strip():
+            continue
+        try:
+            ids.append(str(UUID(value.strip())))
+        except ValueError:
+            raise ValueError(f"Id invalide : {value.strip()}")
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > max_ids:
+        raise ValueError(f"Au plus {max_ids} ids par requête")
+    return ids
+
+
+def many_response(ids: list[str], found: dict[str, dict], model: type[BaseModel] | None = None) -> ORJSONResponse:
+    """
+    Réponse d'une lecture groupée : {"items": [...], "missing": [...]}, items dans
+    l'ordre des ids demandés avec null à la place des ids introuvables.
+    """
+    items = [
+        None if key not in found else found[key] if model is None else project(model, found[key])
+        for key in ids
+    ]
+    return ORJSONResponse({"items": items, "missing": [key for key in ids if key not in found]})
+
+
+def project(model: type[BaseModel], row: dict) -> dict:
+    """Ligne réduite aux champs du modèle de réponse (comme le ferait response_model)."""
+    fields = _fields.get(model)
+    if fields is None:
+        fields = _fields[model] = tuple(model.model_fields)
+    return {name: row.get(name) for name in fields}
+
+
+def trusted_response(model: type[BaseModel], row: dict, status_code: int = 200) -> ORJSONResponse:
+    """
+    Réponse JSON d'une ligne lue en base (ou en cache) dont la forme est déjà
+    celle de `model` : projection sur ses champs puis encodage orjson, sans
+    passer par la validation pydantic du response_model ni par jsonable_encoder.
+    À réserver aux lectures : les données saisies par le client restent validées.
+    """
+    return ORJSONResponse(project(model, row), status_code=status_code)
@@ -0,0 +1,69 @@
+# app/core/singleflight.py
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from app.config import settings
+from app.core.metrics import SINGLEFLIGHT_CALLS
+
+
+class SingleFlight:
+    """
+    Coalescence des lectures concurrentes (un jeu par worker) : tant qu'un appel
+    pour une clé est en cours, les appels suivants pour la même clé attendent
+    son résultat (ou son exception) au lieu de refaire l'aller-retour Supabase.
+
+    L'appel partagé tourne dans sa propre tâche : l'annulation d'un appelant
+    (client déconnecté) n'annule pas la lecture des autres.
+    """
+
+    def __init__(self, name: str, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+        self._leader_metric = SINGLEFLIGHT_CALLS.labels(name, "leader")
+        self._follower_metric = SINGLEFLIGHT_CALLS.labels(name, "follower")
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            return await fn()
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            self._leader_metric.inc()
+            task = self._inflight[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.followers += 1
+            self._follower_metric.inc()
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # marque l'exception comme lue si personne n'attendait plus
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.followers,
+        }
+
+
+# 📌 Lectures coalescées, activables route par route (SINGLEFLIGHT_ROUTES)
+community_flight = SingleFlight("community", "community" in settings.SINGLEFLIGHT_ROUTES)
+community_members_flight = SingleFlight("community_members", "community_members" in settings.SINGLEFLIGHT_ROUTES)
+profile_flight = SingleFlight("profile", "profile" in settings.SINGLEFLIGHT_ROUTES)
+sticker_flight = SingleFlight("sticker", "sticker" in settings.SINGLEFLIGHT_ROUTES)
+
+flights = {
+    flight.name: flight
+    for flight in (community_flight, community_members_flight, profile_flight, sticker_flight)
+}
@@ -0,0 +1,104 @@
+# app/core/tiles.py
+import math
+
+from app.config import settings
+from app.core.cache import LRUCache
+
+MAX_MERCATOR_LAT = 85.05112878
+
+
+def tile_xy(lat: float, long: float, z: int) -> tuple[int, int]:
+    """Coordonnées de la tuile Web Mercator (schéma XYZ) contenant le point au zoom z."""
+    n = 1 << z
+    lat = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))
+    lat_rad = math.radians(lat)
+    x = int((long + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+class TileAggregator:
+    """
+    Agrégats de densité des stickers par tuile, précalculés pour chaque niveau de zoom.
+
+    Pour chaque niveau 0..max_zoom+cluster_depth on garde, par tuile,
+    (nombre de stickers, somme des lat, somme des long). Une tuile z/x/y est
+    rendue à partir de ses sous-tuiles au niveau z+cluster_depth (une grille
+    de 2^depth x 2^depth clusters) : aucune lecture de la table stickers.
+    Les tuiles rendues sont gardées dans un cache LRU, invalidé précisément
+    à chaque ajout / suppression.
+    """
+
+    def __init__(self, max_zoom: int = 12, cluster_depth: int = 3, cache_size: int = 2048):
+        self.max_zoom = max_zoom
+        self.cluster_depth = cluster_depth
+        self._deepest = max_zoom + cluster_depth
+        # niveau -> {(x, y): [count, sum_lat, sum_long]}
+        self._levels: list[dict[tuple[int, int], list]] = [{} for _ in range(self._deepest + 1)]
+        self.cache = LRUCache(cache_size)
+
+    def _apply(self, lat: float, long: float, sign: int) -> None:
+        x, y = tile_xy(lat, long, self._deepest)
+        for z in range(self._deepest, -1, -1):
+            shift = self._deepest - z
+            key = (x >> shift, y >> shift)
+            level = self._levels[z]
+            agg = level.get(key)
+            if agg is None:
+                if sign < 0:
+                    continue
+                agg = level[key] = [0, 0.0, 0.0]
+            agg[0] += sign
+            agg[1] += sign * lat
+            agg[2] += sign * long
+            if agg[0] <= 0:
+                del level[key]
+            if z <= self.max_zoom:
+                self.cache.pop((z, *key))
+
+    def add(self, lat: float, long: float) -> None:
+        self._apply(float(lat), float(long), 1)
+
+    def remove(self, lat: float, long: float) -> None:
+        self._apply(float(lat), float(long), -1)
+
+    def clear(self) -> None:
+        for level in self._levels:
+            level.clear()
+        self.cache.clear()
+
+    def replace(self, other: "TileAggregator") -> None:
+        """Remplace les agrégats par ceux d'un agrégateur reconstruit à part (mêmes niveaux)."""
+        self._levels = other._levels
+        self.cache.clear()
+
+    def tile(self, z: int, x: int, y: int) -> dict:
+        """Clusters (nombre + centroïde) de la tuile z/x/y."""
+        key = (z, x, y)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        level = self._levels[z + self.cluster_depth]
+        side = 1 << self.cluster_depth
+        clusters = []
+        total = 0
+        for sx in range(x * side, (x + 1) * side):
+            for sy in range(y * side, (y + 1) * side):
+                agg = level.get((sx, sy))
+                if agg:
+                    count, sum_lat, sum_long = agg
+                    total += count
+                    clusters.append({"count": count, "lat": sum_lat / count, "long": sum_long / count})
+
+        result = {"z": z, "x": x, "y": y, "count": total, "clusters": clusters}
+        self.cache.set(key, result)
+        return result
+
+
+# 📌 Agrégats partagés par les routes du worker
+sticker_tiles = TileAggregator(
+    max_zoom=settings.TILE_MAX_ZOOM,
+    cluster_depth=settings.TILE_CLUSTER_DEPTH,
+    cache_size=settings.TILE_CACHE_SIZE,
+)
@@ -0,0 +1,172 @@
+# app/core/write_behind.py
+import asyncio
+import logging
+from typing import Awaitable, Callable, TypeVar
+
+from app.config import settings
+from app.core.cache import profile_cache
+from app.core.metrics import PROFILE_COUNTER_FLUSHES
+from app.core.replication import replicator
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CounterAggregator:
+    """
+    Écriture différée des compteurs total_stickers / score des profils : les
+    deltas sont cumulés par auth_id dans le worker puis appliqués en un seul
+    appel (fonction apply_profile_deltas) toutes les flush_interval secondes,
+    dès que max_pending profils sont en attente, et à l'arrêt du worker.
+
+    Les lectures de profil passent par merge() : les deltas pas encore écrits
+    (en attente ou en cours d'écriture) sont ajoutés aux valeurs lues en base.
+    Les lectures en base passent par read() : une ligne lue pendant un flush peut
+    précéder ou suivre l'écriture des deltas, merge() compterait faux.
+
+    Les deltas en attente sont propres au worker : les autres workers lisent les
+    compteurs en base et ne voient ces deltas qu'une fois écrits, soit au plus
+    flush_interval secondes (plus la durée du flush) de retard. Après chaque flush,
+    les compteurs écrits sont diffusés (événement profile.counters) : caches et
+    classements de tous les workers sont à jour sans attendre l'expiration du cache.
+    """
+
+    def __init__(self, enabled: bool = False, flush_interval: float = 1.0, max_pending: int = 500):
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: dict[str, list[int]] = {}
+        self._flushing: dict[str, list[int]] = {}
+        self._get_client: Callable[[], Awaitable] | None = None
+        self._timer: asyncio.Task | None = None
+        self._flush_task: asyncio.Task | None = None
+        self.flushed = 0
+        # génération des flushs : impaire pendant un flush (cf. read)
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, auth_id: str, total_stickers: int, score: int) -> None:
+        """Met un delta en attente (O(1), sans aller-retour)."""
+        self._accumulate(str(auth_id), total_stickers, score)
+        if len(self._pending) >= self.max_pending and self._get_client is not None:
+            self._start_flush()
+
+    def merge(self, profile: dict | None) -> dict | None:
+        """Profil lu en base + deltas non encore écrits (le même objet s'il n'y en a pas)."""
+        if not profile:
+            return profile
+        auth_id = str(profile.get("auth_id"))
+        deltas = [d for d in (self._flushing.get(auth_id), self._pending.get(auth_id)) if d]
+        if not deltas:
+            return profile
+        return {
+            **profile,
+            "total_stickers": max((profile.get("total_stickers") or 0) + sum(d[0] for d in deltas), 0),
+            "score": max((profile.get("score") or 0) + sum(d[1] for d in deltas), 0),
+        }
+
+    async def read(self, fetch: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """
+        Lecture en base de lignes profiles, cohérente avec merge() : attend la fin du
+        flush en cours, puis relit une fois si un flush a eu lieu pendant la lecture.
+        Renvoie (résultat, stable) : une lecture non stable ne doit pas être mise en cache.
+        """
+        for _ in range(2):
+            if self.generation % 2 and self._flush_task is not None:
+                await asyncio.wait({self._flush_task})
+            generation = self.generation
+            result = await fetch()
+            if generation == self.generation and not generation % 2:
+                return result, True
+        return result, False
+
+    async def start(self, get_client: Callable[[], Awaitable]) -> None:
+        self._get_client = get_client
+        if self.enabled and self._timer is None:
+            self._timer = asyncio.ensure_future(self._run())
+
+    async def close(self) -> None:
+        """Arrête le minuteur et écrit tout ce qui reste en attente."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._get_client is not None:
+            await self.flush()
+            if self._pending:
+                await self.flush()  # deltas arrivés pendant le flush précédent
+        if self._pending:
+            logger.error("Compteurs de %d profils non écrits à l'arrêt", len(self._pending))
+
+    async def flush(self) -> int:
+        """Écrit les deltas en attente (attend le flush en cours s'il y en a un)."""
+        return await self._start_flush()
+
+    def _start_flush(self) -> asyncio.Task:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush())
+        return self._flush_task
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def _flush(self) -> int:
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        self._flushing = batch
+        self.generation += 1
+        deltas = [
+            {"auth_id": auth_id, "total_stickers": total, "score": score}
+            for auth_id, (total, score) in batch.items()
+        ]
+        try:
+            client = await self._get_client()
+            response = await client.rpc("apply_profile_deltas", {"p_deltas": deltas}).execute()
+        except Exception:
+            # remis en attente : retenté au prochain flush
+            for auth_id, (total, score) in batch.items():
+                self._accumulate(auth_id, total, score)
+            PROFILE_COUNTER_FLUSHES.labels("error").inc()
+            logger.exception("Écriture différée des compteurs de %d profils échouée", len(batch))
+            return 0
+        finally:
+            self._flushing = {}
+            self.generation += 1
+        PROFILE_COUNTER_FLUSHES.labels("ok").inc()
+        # les profils en cache ne contiennent pas encore ces deltas
+        for auth_id in batch:
+            profile_cache.pop(auth_id)
+        # compteurs écrits (+ deltas arrivés depuis) diffusés aux autres workers
+        for profile in response.data or []:
+            replicator.publish("profile.counters", self.merge(profile))
+        self.flushed += len(batch)
+        return len(batch)
+
+    def _accumulate(self, auth_id: str, total_stickers: int, score: int) -> None:
+        entry = self._pending.get(auth_id)
+        if entry is None:
+            self._pending[auth_id] = [total_stickers, score]
+        else:
+            entry[0] += total_stickers
+            entry[1] += score
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "pending": len(self._pending),
+            "flushing": len(self._flushing),
+            "flushed": self.flushed,
+        }
+
+
+# 📌 Compteurs des profils (PROFILE_COUNTERS_WRITE_BEHIND=1 pour activer)
+profile_counters = CounterAggregator(
+    settings.PROFILE_COUNTERS_WRITE_BEHIND,
+    settings.PROFILE_COUNTERS_FLUSH_INTERVAL,
+    settings.PROFILE_COUNTERS_FLUSH_SIZE,
+)
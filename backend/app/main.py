@@ -1,12 +1,51 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.config import settings
 from app.api import communities
 from app.api import users
 from app.api import stickers
+from app.core.database import TESTING, get_async_db, close_async_db
+from app.core.cache import entity_caches
+from app.core.tiles import sticker_tiles
+from app.core.singleflight import flights
+from app.core.broker import broker
+from app.core.replication import replicator
+from app.core.write_behind import profile_counters
+from app.core.admission import outbound_limiter
+from app.core.resilience import DeadlineMiddleware, supabase_policy
+from app.core.access_log import access_log
+from app.core.metrics import CONTENT_TYPE_LATEST, PrometheusMiddleware, metrics_payload
+from app.core.instrumentation import ServerTimingMiddleware
+from contextlib import asynccontextmanager
 import datetime
+import logging
 
-app = FastAPI(title="SlapIt API", version="1.0.0")
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 📌 Journal d'accès JSON (thread d'écriture propre au worker, démarré après le fork)
+    if settings.ACCESS_LOG_ENABLED and not TESTING:
+        access_log.start()
+    # 📌 Transport du broker (WebSocket et réplication, local ou inter-workers)
+    await broker.start()
+    if not TESTING:
+        # 📌 Index spatial, tuiles et classements chargés en tâche de fond (un jeu par
+        # worker) : /ready répond "warming_up" jusqu'à la fin du premier chargement
+        await replicator.start(get_async_db)
+        # 📌 Écriture différée des compteurs de profils (si activée)
+        await profile_counters.start(get_async_db)
+    yield
+    await replicator.close()
+    await broker.close()
+    await profile_counters.close()
+    # 📌 Fermeture du pool HTTP/2 vers Supabase du worker
+    await close_async_db()
+    access_log.stop()
+
+# 📌 orjson pour encoder toutes les réponses JSON (plus rapide que json.dumps)
+app = FastAPI(title="SlapIt API", version="1.0.0", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # 📌 Configuration CORS avec ALLOWED_ORIGINS
 app.add_middleware(
@@ -17,6 +56,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 📌 Server-Timing : nombre et durée des appels Supabase de chaque requête
+app.add_middleware(ServerTimingMiddleware)
+
+# 📌 Métriques Prometheus (compteurs / latences par route et code HTTP)
+app.add_middleware(PrometheusMiddleware)
+
+# 📌 Échéance par requête, propagée aux appels Supabase (504 plutôt qu'une minute d'attente)
+app.add_middleware(DeadlineMiddleware)
+
 app.include_router(communities.router, prefix="/communities", tags=["Communities"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(stickers.router, prefix="/stickers", tags=["Stickers"])
@@ -27,8 +75,42 @@ def root():
 
 @app.get("/health")
 async def health_check():
+    # vivacité seule : toujours 200 tant que le worker répond
     return {
         "status": "healthy",
         "timestamp": datetime.datetime.now().isoformat(),
         "version": "1.0.0"
-    }
\ No newline at end of file
+    }
+
+@app.get("/ready")
+async def readiness_check():
+    # prêt à servir : index et classements chargés (503 pendant le chargement)
+    if not replicator.ready:
+        return ORJSONResponse(status_code=503, content={
+            "status": "warming_up",
+            "timestamp": datetime.datetime.now().isoformat(),
+            "version": "1.0.0"
+        })
+    return {
+        "status": "ready",
+        "timestamp": datetime.datetime.now().isoformat(),
+        "version": "1.0.0"
+    }
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(content=metrics_payload(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Compteurs hits / misses et taille des caches du worker (dimensionnement)."""
+    return {
+        **{name: cache.stats() for name, cache in entity_caches.items()},
+        "tiles": sticker_tiles.cache.stats(),
+        "singleflight": {name: flight.stats() for name, flight in flights.items()},
+        "broker": broker.stats(),
+        "replication": replicator.stats(),
+        "profile_counters": profile_counters.stats(),
+        "admission": outbound_limiter.stats(),
+        "resilience": supabase_policy.stats(),
+    }
@@ -0,0 +1,160 @@
+from fastapi import HTTPException
+from postgrest import AsyncPostgrestClient
+from postgrest.exceptions import APIError
+from app.core.leaderboard import leaderboards
+from app.core.cache import community_cache, get_many, profile_cache
+from app.core.singleflight import community_flight, community_members_flight
+from app.core.pagination import decode_key_cursor, encode_key_cursor
+from app.core.replication import replicator
+
+# Codes SQLSTATE levés par les fonctions SQL -> statut HTTP
+ERROR_STATUS = {
+    "P0002": 404,  # ligne introuvable
+    "42501": 403,  # droits insuffisants
+}
+
+async def _call(supabase: AsyncPostgrestClient, fn: str, params: dict, default_detail: str, status_map=ERROR_STATUS):
+    # appel d'une fonction SQL transactionnelle, erreurs Postgres -> HTTPException
+    try:
+        response = await supabase.rpc(fn, params).execute()
+    except APIError as e:
+        raise HTTPException(status_code=status_map.get(e.code, 400), detail=e.message or default_detail)
+    return response.data
+
+def _on_membership_changed(user_id: str, community_id: str | None) -> None:
+    replicator.publish("membership.changed", {
+        "auth_id": str(user_id), "community_id": str(community_id) if community_id else None,
+    })
+
+def _apply_membership_changed(event: dict) -> None:
+    # appliqué par chaque worker (cf. app/core/replication.py)
+    leaderboards.update(event["auth_id"], community_id=event["community_id"])
+    profile_cache.pop(event["auth_id"])
+
+replicator.on("membership.changed", _apply_membership_changed)
+
+async def create_community(supabase: AsyncPostgrestClient, data: dict) -> dict:
+    """
+    Crée la communauté, inscrit son administrateur et met à jour son profil
+    (community_id, is_admin) dans une seule transaction (fonction create_community).
+    """
+    community = await _call(
+        supabase, "create_community", {"p_community": data},
+        "Erreur lors de la création de la communauté", status_map={},
+    )
+    _on_membership_changed(data["admin_id"], data["id"])
+    return community
+
+async def join_community(supabase: AsyncPostgrestClient, community_id: str, user_id: str) -> dict:
+    """Inscrit l'utilisateur et en fait sa communauté active (fonction join_community)."""
+    result = await _call(
+        supabase, "join_community", {"p_community_id": community_id, "p_user_id": user_id},
+        "Insert failed", status_map={},
+    )
+    _on_membership_changed(user_id, community_id)
+    return result
+
+async def quit_community(supabase: AsyncPostgrestClient, community_id: str, user_id: str) -> dict:
+    """Retire l'utilisateur de la communauté et vide son community_id (fonction quit_community)."""
+    result = await _call(
+        supabase, "quit_community", {"p_community_id": community_id, "p_user_id": user_id},
+        "Erreur lors de la suppression de l'utilisateur de la communauté",
+    )
+    _on_membership_changed(user_id, None)
+    return result
+
+async def kick_user(supabase: AsyncPostgrestClient, community_id: str, admin_id: str, user_id: str) -> dict:
+    """
+    Vérifie que admin_id administre la communauté puis expulse l'utilisateur,
+    dans une seule transaction (fonction kick_user).
+    """
+    result = await _call(
+        supabase, "kick_user", {"p_community_id": community_id, "p_admin_id": admin_id, "p_user_id": user_id},
+        "Erreur lors de l'expulsion de l'utilisateur",
+    )
+    _on_membership_changed(user_id, None)
+    return result
+
+async def get_community(supabase: AsyncPostgrestClient, community_id: str) -> dict | None:
+    """Communauté par id, lue à travers le cache des communautés. None si introuvable."""
+    cached = community_cache.get(community_id)
+    if cached is not None:
+        return cached
+
+    async def fetch():
+        token = community_cache.token()
+        res = (
+            await supabase.table("communities")
+            .select("id,name,description,created_at,updated_at")
+            .eq("id", community_id)
+            .single()
+            .execute()
+        )
+        if res.data:
+            community_cache.set(community_id, res.data, token)
+        return res.data or None
+
+    # lectures concurrentes de la même communauté : un seul appel Supabase
+    return await community_flight.do(community_id, fetch)
+
+async def get_communities_many(supabase: AsyncPostgrestClient, ids: list[str]) -> dict[str, dict]:
+    """
+    {id: communauté} des communautés trouvées : cache des communautés d'abord,
+    puis une seule requête (filtre in_) pour les absentes.
+    """
+
+    async def fetch(missing):
+        res = await supabase.table("communities").select("id,name,description,created_at,updated_at").in_("id", missing).execute()
+        return {str(row["id"]): row for row in res.data or []}
+
+    return await get_many(community_cache, list(dict.fromkeys(ids)), fetch)
+
+async def list_members(
+    supabase: AsyncPostgrestClient,
+    community_id: str,
+    columns: str = "*",
+    limit: int | None = 100,
+    cursor: str = "",
+    count: bool = False,
+) -> dict | None:
+    """
+    Profils des membres de la communauté, triés par auth_id, page par page
+    (curseur sur auth_id) ; tous d'un coup si limit est None. La communauté et ses membres (et leur nombre total
+    si count) sont lus en un seul aller-retour : profils embarqués dans la
+    ligne communities. Renvoie {"community_users": [...], "next_cursor": ...
+    [, "count": n]} ; None si la communauté n'existe pas.
+    Lève ValueError si le curseur est invalide.
+    """
+    after = decode_key_cursor(cursor) if cursor else None
+    select = f"id,profiles!community_id({columns})"
+    if count:
+        select += ",member_count:profiles!community_id(count)"
+
+    async def fetch():
+        query = (
+            supabase.table("communities")
+            .select(select)
+            .eq("id", community_id)
+            .order("auth_id", foreign_table="profiles")
+        )
+        if limit is not None:
+            # une ligne de plus pour savoir s'il existe une page suivante
+            query = query.limit(limit + 1, foreign_table="profiles")
+        if after is not None:
+            query = query.gt("profiles.auth_id", after)
+        res = await query.execute()
+        if not res.data:
+            return None
+        row = res.data[0]
+        members = row.get("profiles") or []
+        next_cursor = None
+        if limit is not None and len(members) > limit:
+            members = members[:limit]
+            next_cursor = encode_key_cursor(members[-1]["auth_id"])
+        result = {"community_users": members, "next_cursor": next_cursor}
+        if count:
+            result["count"] = (row.get("member_count") or [{"count": 0}])[0]["count"]
+        return result
+
+    key = (community_id, columns, limit, cursor, count)
+    return await community_members_flight.do(key, fetch)
@@ -0,0 +1,274 @@
+from fastapi import HTTPException
+from postgrest import AsyncPostgrestClient
+from postgrest.exceptions import APIError
+from app.core.geo import GridIndex, sticker_index
+from app.core.tiles import TileAggregator, sticker_tiles
+from app.core.leaderboard import leaderboards
+from app.core.cache import get_many, profile_cache, sticker_cache
+from app.core.singleflight import sticker_flight
+from app.core.broker import broker, community_topic
+from app.core.write_behind import profile_counters
+from app.core.pagination import decode_cursor, encode_cursor, keyset_filter
+from app.core.replication import replicator
+
+# Code SQLSTATE levé par les fonctions SQL quand la ligne visée n'existe pas
+NOT_FOUND_CODE = "P0002"
+
+async def create_sticker(supabase: AsyncPostgrestClient, data: dict) -> dict:
+    """
+    Insère le sticker et incrémente total_stickers (+1) / score (+10) du profil
+    dans une seule transaction côté Postgres (fonction add_sticker, un aller-retour).
+    En écriture différée, le profil n'est pas modifié (add_sticker_deferred) :
+    le delta est mis en attente dans profile_counters.
+    Renvoie {"sticker": {...}, "total_stickers": n, "score": n}.
+    """
+    deferred = profile_counters.enabled
+    try:
+        response = await supabase.rpc(
+            "add_sticker_deferred" if deferred else "add_sticker", {"p_sticker": data}
+        ).execute()
+    except APIError as e:
+        if e.code == NOT_FOUND_CODE:
+            raise HTTPException(status_code=404, detail=e.message or "Profil non trouvé")
+        raise HTTPException(status_code=400, detail=e.message or "Insert failed")
+    result = _defer_counters(response.data, 1) if deferred else response.data
+    _on_sticker_added(result)
+    return result
+
+async def remove_sticker(supabase: AsyncPostgrestClient, sticker_id: str) -> dict:
+    """
+    Supprime le sticker et décrémente les compteurs de son auteur
+    dans la même transaction (fonction delete_sticker), ou en différé.
+    """
+    deferred = profile_counters.enabled
+    try:
+        response = await supabase.rpc(
+            "delete_sticker_deferred" if deferred else "delete_sticker", {"p_id": sticker_id}
+        ).execute()
+    except APIError as e:
+        if e.code == NOT_FOUND_CODE:
+            raise HTTPException(status_code=404, detail="Sticker not found")
+        raise HTTPException(status_code=400, detail=e.message or "Delete failed")
+    result = _defer_counters(response.data, -1) if deferred else response.data
+    _on_sticker_removed(result)
+    return result
+
+async def create_stickers_batch(supabase: AsyncPostgrestClient, rows: list[dict]) -> dict:
+    """
+    Insère un lot de stickers en un appel (fonction add_stickers_batch) : un seul
+    INSERT groupé puis une mise à jour agrégée des compteurs par auth_id.
+    En écriture différée, le profil n'est pas modifié (add_stickers_batch_deferred) :
+    les deltas de chaque auth_id sont mis en attente dans profile_counters.
+    Renvoie {"stickers": [lignes insérées], "profiles": [{auth_id, total_stickers, score}]}.
+    """
+    deferred = profile_counters.enabled
+    try:
+        response = await supabase.rpc(
+            "add_stickers_batch_deferred" if deferred else "add_stickers_batch", {"p_stickers": rows}
+        ).execute()
+    except APIError as e:
+        raise HTTPException(status_code=400, detail=e.message or "Insert failed")
+    result = response.data or {"stickers": [], "profiles": []}
+    profiles = []
+    for profile in result["profiles"]:
+        n = profile.pop("n", 0)
+        if deferred:
+            profile_counters.add(profile["auth_id"], n, 10 * n)
+        profiles.append(profile_counters.merge({**profile, "auth_id": str(profile["auth_id"])}))
+    for sticker in result["stickers"]:
+        _on_sticker_added({"sticker": sticker})
+    for profile in profiles:
+        replicator.publish("profile.counters", profile)
+    return {**result, "profiles": profiles}
+
+async def get_sticker(supabase: AsyncPostgrestClient, sticker_id: str) -> dict | None:
+    """Sticker par id, lu à travers le cache des stickers. None si introuvable."""
+    row = sticker_cache.get(sticker_id)
+    if row is not None:
+        return row
+
+    async def fetch():
+        token = sticker_cache.token()
+        response = await supabase.table("stickers").select("*").eq("id", sticker_id).execute()
+        if not response.data:
+            return None
+        # écartée si le sticker a été supprimé / modifié pendant la lecture
+        sticker_cache.set(sticker_id, response.data[0], token)
+        return response.data[0]
+
+    return await sticker_flight.do(sticker_id, fetch)
+
+async def get_stickers_by_ids(supabase: AsyncPostgrestClient, ids: list[str]) -> list[dict]:
+    """
+    Récupère les stickers correspondant aux ids, dans l'ordre des ids demandés.
+    Les ids introuvables sont ignorés.
+    """
+    rows = await get_stickers_many(supabase, ids)
+    return [rows[i] for i in ids if i in rows]
+
+async def get_stickers_many(supabase: AsyncPostgrestClient, ids: list[str]) -> dict[str, dict]:
+    """
+    {id: sticker} des ids trouvés : cache des stickers d'abord, puis une seule
+    requête (filtre in_) pour les ids absents du cache.
+    """
+
+    async def fetch(missing):
+        response = await supabase.table("stickers").select("*").in_("id", missing).execute()
+        return {str(row["id"]): row for row in response.data or []}
+
+    return await get_many(sticker_cache, list(dict.fromkeys(ids)), fetch)
+
+async def list_stickers(
+    supabase: AsyncPostgrestClient,
+    column: str,
+    value: str,
+    limit: int,
+    offset: int = 0,
+    cursor: str | None = None,
+    columns: str = "*",
+) -> tuple[list[dict], str | None]:
+    """
+    Liste les stickers où column == value, du plus récent au plus ancien
+    (colonnes : liste PostgREST, doit contenir created_at et id).
+
+    - cursor fourni (chaîne vide = première page) : pagination par clé sur
+      (created_at, id), coût constant quelle que soit la profondeur de la page.
+    - sinon : pagination par offset (.range), conservée en repli.
+    Renvoie (stickers, next_cursor) ; next_cursor vaut None sur la dernière page.
+    Lève ValueError si le curseur est invalide.
+    """
+    query = (
+        supabase.table("stickers")
+        .select(columns)
+        .eq(column, value)
+        .order("created_at", desc=True)
+        .order("id", desc=True)
+    )
+    if cursor is not None:
+        if cursor:
+            query = query.or_(keyset_filter(*decode_cursor(cursor)))
+        # une ligne de plus pour savoir s'il existe une page suivante
+        query = query.limit(limit + 1)
+    else:
+        query = query.range(offset, offset + limit)
+
+    rows = (await query.execute()).data or []
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
+async def iter_sticker_pages(
+    supabase: AsyncPostgrestClient,
+    column: str,
+    value: str,
+    page_size: int,
+    first_page_size: int | None = None,
+    cursor: str = "",
+):
+    """
+    Parcourt les stickers où column == value (plus récents d'abord) page par page,
+    par clé : produit (stickers, curseur de la page suivante ou None). Une seule
+    page est en mémoire à la fois. La première page peut être plus courte.
+    """
+    limit = first_page_size or page_size
+    while True:
+        rows, cursor = await list_stickers(supabase, column, value, limit, cursor=cursor)
+        if rows:
+            yield rows, cursor
+        if cursor is None:
+            return
+        limit = page_size
+
+async def load_sticker_indexes(supabase: AsyncPostgrestClient, page_size: int = 1000):
+    """
+    Reconstruit à part l'index spatial et les tuiles de densité à partir de la
+    table stickers, par pages triées sur id (pagination par clé, pas d'offset) ;
+    les structures en service ne changent pas pendant la lecture. Renvoie la
+    fonction qui met les nouvelles en place (cf. Replicator.reload).
+    """
+    index = GridIndex(sticker_index.cell_deg)
+    tiles = TileAggregator(sticker_tiles.max_zoom, sticker_tiles.cluster_depth, cache_size=1)
+    last_id = None
+    while True:
+        query = supabase.table("stickers").select("id,lat,long,community_id").order("id").limit(page_size)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = (await query.execute()).data or []
+        for row in rows:
+            index.add(row["id"], row["lat"], row["long"], row.get("community_id"))
+            tiles.add(row["lat"], row["long"])
+        if len(rows) < page_size:
+            break
+        last_id = rows[-1]["id"]
+
+    def commit():
+        sticker_index.replace(index)
+        sticker_tiles.replace(tiles)
+
+    return commit
+
+def _defer_counters(result: dict, n: int) -> dict:
+    # met le delta en attente ; compteurs renvoyés = valeurs en base + deltas en attente
+    sticker = result["sticker"]
+    if result.get("score") is None:  # profil introuvable (suppression)
+        return result
+    profile_counters.add(sticker["auth_id"], n, 10 * n)
+    merged = profile_counters.merge({
+        "auth_id": str(sticker["auth_id"]), "total_stickers": result["total_stickers"], "score": result["score"],
+    })
+    return {**result, "total_stickers": merged["total_stickers"], "score": merged["score"]}
+
+def _on_sticker_added(result: dict) -> None:
+    # 📌 structures dérivées de tous les workers tenues à jour à chaque écriture
+    # result : réponse de la fonction SQL {"sticker": {...}, "total_stickers": n, "score": n}
+    replicator.publish("sticker.added", result)
+    _publish("sticker.added", result["sticker"])
+
+def _on_sticker_removed(result: dict) -> None:
+    replicator.publish("sticker.removed", result)
+    _publish("sticker.removed", result["sticker"])
+
+def _apply_sticker_added(result: dict) -> None:
+    # appliqué par chaque worker ; idempotent (rejoué après un rechargement)
+    sticker = result["sticker"]
+    previous = sticker_index.get(sticker["id"])
+    if previous is not None:
+        sticker_tiles.remove(previous[0], previous[1])
+    sticker_index.add(sticker["id"], sticker["lat"], sticker["long"], sticker.get("community_id"))
+    sticker_tiles.add(sticker["lat"], sticker["long"])
+    _update_leaderboards(sticker, result)
+    _invalidate_caches(sticker)
+
+def _apply_sticker_removed(result: dict) -> None:
+    sticker = result["sticker"]
+    previous = sticker_index.get(sticker["id"])
+    if previous is not None:
+        # tuiles : position connue de l'index (la ligne renvoyée peut être partielle)
+        sticker_index.remove(sticker["id"])
+        sticker_tiles.remove(previous[0], previous[1])
+    _update_leaderboards(sticker, result)
+    _invalidate_caches(sticker)
+
+def _apply_profile_counters(profile: dict) -> None:
+    leaderboards.update(**profile)
+    profile_cache.pop(str(profile["auth_id"]))
+
+def _publish(event_type: str, sticker: dict) -> None:
+    # diffusion aux abonnés WebSocket de la communauté (non bloquant)
+    if sticker.get("community_id"):
+        broker.publish(community_topic(str(sticker["community_id"])), {"type": event_type, "sticker": sticker})
+
+def _invalidate_caches(sticker: dict) -> None:
+    sticker_cache.pop(str(sticker["id"]))
+    if sticker.get("auth_id"):
+        profile_cache.pop(str(sticker["auth_id"]))
+
+def _update_leaderboards(sticker: dict, result: dict) -> None:
+    if sticker.get("auth_id") and result.get("score") is not None:
+        leaderboards.update(sticker["auth_id"], score=result["score"], total_stickers=result["total_stickers"])
+
+replicator.on("sticker.added", _apply_sticker_added)
+replicator.on("sticker.removed", _apply_sticker_removed)
+replicator.on("profile.counters", _apply_profile_counters)
+replicator.loader("stickers", load_sticker_indexes)
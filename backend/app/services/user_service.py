@@ -1,8 +1,16 @@
 from fastapi import HTTPException
-from supabase import Client
+from postgrest import AsyncPostgrestClient
 from datetime import datetime, timezone
+from app.core.leaderboard import Leaderboards, leaderboards
+from app.core.cache import get_many, profile_cache
+from app.core.singleflight import profile_flight
+from app.core.write_behind import profile_counters
+from app.core.replication import replicator
 
-def create_profile(supabase: Client, auth_id: str, username: str, avatar_url: str = None, bio: str = None):
+# Colonnes du profil utiles aux classements
+LEADERBOARD_COLUMNS = "auth_id,username,avatar_url,score,total_stickers,community_id"
+
+async def create_profile(supabase: AsyncPostgrestClient, auth_id: str, username: str, avatar_url: str = None, bio: str = None):
     data = {
         "auth_id": str(auth_id),
         "username": username,
@@ -15,7 +23,93 @@ def create_profile(supabase: Client, auth_id: str, username: str, avatar_url: st
         "total_stickers": 0,
         "score": 0
     }
-    response = supabase.table("profiles").insert(data).execute()
+    response = await supabase.table("profiles").insert(data).execute()
     if not response.data:
         raise HTTPException(status_code=400, detail=f"Erreur lors de la création du profil: {response}")
-    return response.data[0]
\ No newline at end of file
+    profile = response.data[0]
+    replicator.publish("profile.updated", profile)
+    return profile
+
+async def get_profile(supabase: AsyncPostgrestClient, auth_id: str) -> dict | None:
+    """
+    Profil par auth_id, lu à travers le cache des profils. Les compteurs
+    incluent les deltas pas encore écrits (écriture différée).
+    """
+    cached = profile_cache.get(auth_id)
+    if cached is not None:
+        return profile_counters.merge(cached)
+
+    async def read():
+        token = profile_cache.token()
+        response = await supabase.table("profiles").select("*").eq("auth_id", auth_id).single().execute()
+        return token, response.data
+
+    async def fetch():
+        # pas mise en cache si un flush des compteurs a eu lieu pendant la lecture
+        (token, data), stable = await profile_counters.read(read)
+        if data and stable:
+            # écarté si le profil a été invalidé pendant la lecture
+            profile_cache.set(auth_id, data, token)
+        return data
+
+    return profile_counters.merge(await profile_flight.do(auth_id, fetch))
+
+async def get_profiles_many(supabase: AsyncPostgrestClient, auth_ids: list[str]) -> dict[str, dict]:
+    """
+    {auth_id: profil} des profils trouvés : cache des profils d'abord, puis une
+    seule requête (filtre in_) pour les absents. Compteurs différés inclus.
+    """
+
+    async def read(missing):
+        return (await supabase.table("profiles").select("*").in_("auth_id", missing).execute()).data or []
+
+    async def fetch(missing):
+        # lecture rejouée après un flush des compteurs ; le flush invalide ces
+        # profils en cache, les lignes lues pendant qu'il tournait sont écartées
+        rows, _ = await profile_counters.read(lambda: read(missing))
+        return {str(row["auth_id"]): row for row in rows}
+
+    found = await get_many(profile_cache, list(dict.fromkeys(auth_ids)), fetch)
+    return {auth_id: profile_counters.merge(profile) for auth_id, profile in found.items()}
+
+async def update_profile(supabase: AsyncPostgrestClient, auth_id: str, payload: dict) -> dict | None:
+    """
+    Met à jour les champs fournis du profil. Si rien n'a changé côté base,
+    renvoie le profil existant ; None si le profil n'existe pas.
+    """
+    res = await supabase.table("profiles").update(payload).eq("auth_id", auth_id).execute()
+    profile_cache.pop(auth_id)
+
+    if res.data:
+        profile = profile_counters.merge(res.data[0])
+        replicator.publish("profile.updated", profile)
+        return profile
+    existing = await supabase.table("profiles").select("*").eq("auth_id", auth_id).single().execute()
+    return profile_counters.merge(existing.data) or None
+
+async def load_leaderboards(supabase: AsyncPostgrestClient, page_size: int = 1000):
+    """
+    Reconstruit à part les classements à partir de la table profiles, par pages
+    triées sur auth_id (pagination par clé). Renvoie la fonction qui les met en
+    place (cf. Replicator.reload).
+    """
+    boards = Leaderboards()
+    last_id = None
+    while True:
+        query = supabase.table("profiles").select(LEADERBOARD_COLUMNS).order("auth_id").limit(page_size)
+        if last_id is not None:
+            query = query.gt("auth_id", last_id)
+        rows = (await query.execute()).data or []
+        for row in rows:
+            boards.update(**row)
+        if len(rows) < page_size:
+            return lambda: leaderboards.replace(boards)
+        last_id = rows[-1]["auth_id"]
+
+def _apply_profile_updated(profile: dict) -> None:
+    # appliqué par chaque worker (cf. app/core/replication.py)
+    leaderboards.update(**profile)
+    profile_cache.pop(str(profile["auth_id"]))
+
+replicator.on("profile.updated", _apply_profile_updated)
+replicator.loader("leaderboards", load_leaderboards)
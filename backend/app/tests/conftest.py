@@ -1,4 +1,6 @@
 import os
+import re
+import asyncio
 
 os.environ.setdefault("TESTING", "1")
 os.environ.setdefault("SUPABASE_URL", "http://example.com")
@@ -8,7 +10,23 @@ import pytest
 from fastapi.testclient import TestClient
 
 from app.main import app
-from app.core.database import get_db
+from app.core.database import get_async_db, instrument
+from app.core.cache import entity_caches
+from app.core.resilience import supabase_policy
+
+# --- rapport affiché en fin de session (temps d'import, cf. test_startup.py) ---
+# [(titre, [lignes])], rempli par les tests (fixture session_report), imprimé par pytest_terminal_summary
+session_reports: list[tuple[str, list[str]]] = []
+
+@pytest.fixture
+def session_report():
+    return session_reports
+
+def pytest_terminal_summary(terminalreporter):
+    for title, lines in session_reports:
+        terminalreporter.section(title)
+        for line in lines:
+            terminalreporter.write_line(line)
 
 # --- fakes minimalistes ---
 class FakeResp:
@@ -28,11 +46,17 @@ class FakeTable:
     def update(self, payload):   self._ops.append(("update", payload));  return self
     def delete(self):            self._ops.append(("delete",));          return self
     def eq(self, k, v):          self._ops.append(("eq", k, v));         return self
+    def in_(self, k, v):         self._ops.append(("in_", k, list(v)));  return self
+    def gt(self, k, v):          self._ops.append(("gt", k, v));         return self
+    def or_(self, f):            self._ops.append(("or_", f));           return self
+    def limit(self, n, **_k):    self._ops.append(("limit", n));         return self
     def order(self, *a, **k):    self._ops.append(("order", a, k));      return self
     def range(self, *a):         self._ops.append(("range", a));         return self
     def single(self):            self._ops.append(("single",));          return self
 
-    def execute(self):
+    async def execute(self):
+        # point de suspension : simule l'aller-retour réseau (entrelacement des requêtes concurrentes)
+        await asyncio.sleep(0)
         return self.fake.handle(self.name, self._ops)
 
 class FakeSupabase:
@@ -43,13 +67,91 @@ class FakeSupabase:
     def table(self, name):
         return FakeTable(name, self)
 
+    def rpc(self, fn, params):
+        # appel de fonction SQL : le script reçoit le nom de la fonction et ("rpc", params)
+        call = FakeTable(fn, self)
+        call._ops.append(("rpc", params))
+        return call
+
     def handle(self, table, ops):
         return self.script(table, ops)
 
+def db_round_trips(response) -> int:
+    """Nombre d'appels Supabase faits par la requête, lu dans l'en-tête Server-Timing."""
+    match = re.search(r'(?:^|, )db;dur=[\d.]+;desc="(\d+) calls"', response.headers.get("server-timing", ""))
+    assert match, "En-tête Server-Timing absent : le client factice doit passer par instrument()"
+    return int(match.group(1))
+
+def assert_max_round_trips(response, max_calls: int) -> None:
+    """Échoue si la requête a fait plus de max_calls allers-retours vers Supabase."""
+    calls = db_round_trips(response)
+    assert calls <= max_calls, f"{calls} appels Supabase (max attendu : {max_calls})"
+
+# --- données et client des tests de routes (chemin nominal de chaque route) ---
+USER = "7660c4d7-a3af-47b2-a9d0-b37c72643324"
+COMMUNITY = "cbddd46b-619c-4a3d-ab83-5888fe9bc21e"
+PROFILE = {
+    "auth_id": USER, "username": "foo", "created_at": "2025-01-01T00:00:00Z",
+    "is_admin": False, "total_stickers": 0, "score": 0,
+}
+STICKER = {
+    "id": "s1", "title": "t", "description": "d", "image_url": "u", "lat": 1.0, "long": 2.0,
+    "community_id": COMMUNITY, "auth_id": USER, "created_at": "2025-01-01T00:00:00Z",
+}
+STICKER_BODY = {k: STICKER[k] for k in ("community_id", "title", "description", "image_url", "lat", "long", "auth_id")}
+
+def happy_script(table, ops):
+    """Réponses plausibles pour que chaque route suive son chemin nominal."""
+    verb = ops[0][0]
+    if verb == "rpc":
+        params = ops[0][1]
+        if "p_stickers" in params:
+            return FakeResp({"stickers": params["p_stickers"], "profiles": []})
+        return FakeResp({"sticker": params.get("p_sticker", STICKER), "total_stickers": 1, "score": 10})
+    if verb == "insert":
+        return FakeResp([ops[0][1]])
+    if verb == "delete":
+        return FakeResp([{"ok": True}])
+    if table == "profiles":
+        if any(op[0] == "single" for op in ops):
+            return FakeResp(PROFILE)
+        return FakeResp([PROFILE])
+    if table == "communities":
+        row = {"id": COMMUNITY, "name": "c", "description": None, "admin_id": USER, "created_at": "2025-01-01"}
+        if any(op[0] == "single" for op in ops):
+            return FakeResp(row)
+        return FakeResp([row])
+    if table == "stickers":
+        return FakeResp([STICKER])
+    return FakeResp([])
+
+@pytest.fixture
+def client_counted():
+    fake = FakeSupabase(script=happy_script)
+    app.dependency_overrides[get_async_db] = lambda: instrument(fake)
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # les caches de lecture sont globaux au worker : on repart à vide à chaque test
+    for cache in entity_caches.values():
+        cache.clear()
+    # coupe-circuit global au worker : un test en échec ne doit pas couper les suivants
+    supabase_policy.breaker.reset()
+    yield
+
 @pytest.fixture
 def client_ok():
     # script par défaut: renvoie qqch de plausible
     def script(table, ops):
+        # fonctions SQL (supabase.rpc)
+        if table in ("add_sticker", "delete_sticker"):
+            sticker = ops[0][1].get("p_sticker") or {"id": ops[0][1].get("p_id")}
+            return FakeResp({"sticker": sticker, "total_stickers": 1, "score": 10})
+
         # stickers
         if table == "stickers":
             if any(op[0] == "insert" for op in ops):
@@ -112,9 +214,9 @@ def client_ok():
     fake = FakeSupabase(script=script)
 
     def override_get_db():
-        return fake
+        return instrument(fake)
 
-    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_db
     try:
         yield TestClient(app)
     finally:
@@ -124,15 +226,15 @@ def client_ok():
 def client_fk_error():
     def script(table, ops):
         from postgrest.exceptions import APIError
-        if table == "stickers" and any(op[0]=="insert" for op in ops):
-            raise APIError({"message": "FK violation"})
+        if table == "add_sticker":
+            raise APIError({"message": "FK violation", "code": "23503"})
         return FakeResp([])
     fake = FakeSupabase(script=script)
 
     def override_get_db():
-        return fake
+        return instrument(fake)
 
-    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_db
     try:
         yield TestClient(app)
     finally:
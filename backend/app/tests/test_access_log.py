@@ -0,0 +1,42 @@
+import io
+import json
+import logging
+
+import pytest
+
+from app.core.access_log import access_log
+from app.tests.conftest import COMMUNITY
+
+
+@pytest.fixture
+def log_lines():
+    stream = io.StringIO()
+    access_log.start(stream)
+
+    def lines():
+        access_log.stop()  # vide la file du thread d'écriture
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    yield lines
+    access_log.stop()
+
+
+def test_access_line_fields_and_request_id(client_counted, log_lines):
+    r = client_counted.get(f"/communities/{COMMUNITY}")
+    client_counted.get("/communities/nope/users", headers={"X-Request-ID": "gateway-42"})
+    [ok, other] = [line for line in log_lines() if line.get("type") == "access"]
+
+    assert ok["route"] == "/communities/{community_id}" and ok["status"] == 200
+    assert ok["level"] == "info" and ok["db_calls"] == 1 and ok["duration_ms"] >= ok["db_ms"]
+    assert ok["request_id"] == r.headers["x-request-id"]
+    assert other["request_id"] == "gateway-42"
+
+
+def test_successes_are_sampled_errors_are_not(client_counted, log_lines, monkeypatch):
+    monkeypatch.setattr(access_log, "sample_rate", 0.0)
+    client_counted.get(f"/communities/{COMMUNITY}")
+    client_counted.get("/nope")
+    logging.getLogger("app.tests").error("échec %s", "métier")
+    lines = log_lines()
+    assert [(line["status"], line["level"]) for line in lines if line.get("type") == "access"] == [(404, "warning")]
+    assert any(line.get("message") == "échec métier" and line["level"] == "error" for line in lines)
@@ -0,0 +1,66 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.main import app
+from app.core import admission
+from app.core.admission import AdmissionLimiter, Overloaded
+from app.core.database import get_async_db, instrument
+from app.tests.conftest import STICKER_BODY, USER, happy_script
+from app.tests.test_singleflight import SlowSupabase
+
+
+def test_limiter_queues_then_sheds():
+    async def scenario():
+        limiter = AdmissionLimiter(limit=1, queue_timeout=0.05, max_queue=1)
+        await limiter.acquire()
+        queued = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):  # file pleine : refus immédiat
+            await limiter.acquire()
+        limiter.release()  # la place passe à l'appel en attente
+        await queued
+        assert limiter.stats()["in_flight"] == 1
+        with pytest.raises(Overloaded) as exc:  # délai d'attente dépassé
+            await limiter.acquire()
+        assert exc.value.status_code == 503 and exc.value.headers["Retry-After"] == "1"
+        limiter.release()
+        assert limiter.stats() == {"limit": 1, "in_flight": 0, "waiting": 0, "rejected": 2}
+
+    asyncio.run(scenario())
+
+
+def test_overload_returns_fast_503_and_health_stays_up(monkeypatch):
+    monkeypatch.setattr(admission, "outbound_limiter", AdmissionLimiter(1, 0.01, 2))
+    monkeypatch.setattr("app.core.database.outbound_limiter", admission.outbound_limiter)
+    app.dependency_overrides[get_async_db] = lambda: instrument(SlowSupabase(script=happy_script))
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            reads = [ac.get(f"/users/{USER}/stickers") for _ in range(10)]
+            return await asyncio.gather(*reads, ac.get("/health"))
+
+    try:
+        *reads, health = asyncio.run(burst())
+    finally:
+        app.dependency_overrides.clear()
+    assert health.status_code == 200
+    assert {r.status_code for r in reads} == {200, 503}
+    assert all(r.headers["retry-after"] == "1" for r in reads if r.status_code == 503)
+
+
+def test_write_rate_limit_per_user(client_counted, monkeypatch):
+    monkeypatch.setattr(admission.write_limiter, "rate", 0.5)
+    monkeypatch.setattr(admission.write_limiter, "burst", 2)
+    admission.write_limiter._buckets.clear()
+    try:
+        codes = [client_counted.post("/stickers/", json=STICKER_BODY).status_code for _ in range(3)]
+        assert codes == [200, 200, 429]
+        r = client_counted.post("/stickers/", json=STICKER_BODY)
+        assert r.status_code == 429 and int(r.headers["retry-after"]) >= 1
+        # quota par utilisateur : un autre auteur n'est pas concerné
+        admission.write_limiter.check("someone-else")
+    finally:
+        admission.write_limiter._buckets.clear()
@@ -0,0 +1,150 @@
+"""
+Mêmes scénarios (par l'API) contre le moteur en mémoire et contre une vraie base :
+le moteur recopie le parsing PostgREST et les fonctions SQL, ces tests vérifient
+qu'il se comporte comme elles. La base réelle est une instance Supabase / PostgREST
+jetable, migrations appliquées, désignée par TEST_SUPABASE_URL et TEST_SUPABASE_KEY
+(sans elles, seul le moteur en mémoire est testé).
+"""
+import os
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from postgrest import AsyncPostgrestClient
+
+from app.main import app
+from app.core.database import get_async_db, instrument
+from app.core.leaderboard import leaderboards
+from app.core.memory_db import MemoryDatabase
+
+TEST_SUPABASE_URL = os.getenv("TEST_SUPABASE_URL")
+TEST_SUPABASE_KEY = os.getenv("TEST_SUPABASE_KEY")
+
+
+def _postgrest_client() -> AsyncPostgrestClient:
+    return AsyncPostgrestClient(
+        f"{TEST_SUPABASE_URL}/rest/v1",
+        headers={"apikey": TEST_SUPABASE_KEY, "Authorization": f"Bearer {TEST_SUPABASE_KEY}"},
+    )
+
+
+class Scenario:
+    """Client de l'API branché sur un backend, et lignes créées à supprimer ensuite."""
+
+    def __init__(self, client: TestClient):
+        self.client = client
+        self.profiles: list[str] = []
+        self.communities: list[str] = []
+
+    def user(self, username: str = "u") -> str:
+        auth_id = str(uuid.uuid4())
+        r = self.client.post("/users/", json={"auth_id": auth_id, "username": f"{username}-{auth_id[:8]}"})
+        assert r.status_code == 200
+        self.profiles.append(auth_id)
+        return auth_id
+
+    def community(self, admin_id: str) -> str:
+        r = self.client.post("/communities/", json={"name": f"c-{admin_id[:8]}", "admin_id": admin_id})
+        assert r.status_code == 200
+        self.communities.append(r.json()["id"])
+        return r.json()["id"]
+
+    async def cleanup(self, db) -> None:
+        # ordre des clés étrangères : stickers, adhésions, profils (community_id), communautés
+        if self.profiles:
+            await db.table("stickers").delete().in_("auth_id", self.profiles).execute()
+            await db.table("profiles").update({"community_id": None}).in_("auth_id", self.profiles).execute()
+        if self.communities:
+            await db.table("user_communities").delete().in_("community_id", self.communities).execute()
+            await db.table("communities").delete().in_("id", self.communities).execute()
+        if self.profiles:
+            await db.table("profiles").delete().in_("auth_id", self.profiles).execute()
+
+
+@pytest.fixture(params=[
+    "memory",
+    pytest.param("postgrest", marks=pytest.mark.skipif(
+        not (TEST_SUPABASE_URL and TEST_SUPABASE_KEY), reason="TEST_SUPABASE_URL / TEST_SUPABASE_KEY non définies",
+    )),
+])
+def scenario(request):
+    db = MemoryDatabase() if request.param == "memory" else _postgrest_client()
+    app.dependency_overrides[get_async_db] = lambda: instrument(db)
+    try:
+        with TestClient(app) as client:
+            s = Scenario(client)
+            try:
+                yield s
+            finally:
+                client.portal.call(s.cleanup, db)
+    finally:
+        app.dependency_overrides.clear()
+        leaderboards.clear()
+
+
+def _sticker(community_id: str, auth_id: str) -> dict:
+    return {"community_id": community_id, "title": "t", "image_url": "u", "lat": 48.85, "long": 2.35, "auth_id": auth_id}
+
+
+def test_sticker_functions_keep_counters(scenario):
+    c = scenario.client
+    admin = scenario.user()
+    community_id = scenario.community(admin)
+
+    created = [c.post("/stickers/", json=_sticker(community_id, admin)) for _ in range(3)]
+    assert all(r.status_code == 200 for r in created)
+    profile = c.get(f"/users/{admin}").json()
+    assert (profile["total_stickers"], profile["score"]) == (3, 30)
+
+    assert c.delete(f"/stickers/{created[0].json()['id']}").status_code == 200
+    assert c.get(f"/users/{admin}").json()["score"] == 20
+    assert c.delete(f"/stickers/{created[0].json()['id']}").status_code == 404
+    assert c.post("/stickers/", json=_sticker(community_id, str(uuid.uuid4()))).status_code == 404
+
+    # lot : les lignes sans profil sont écartées, les compteurs agrégés par auth_id
+    batch = [_sticker(community_id, admin), _sticker(community_id, admin), _sticker(community_id, str(uuid.uuid4()))]
+    r = c.post("/stickers/batch", json=batch)
+    assert r.status_code == 200
+    assert c.get(f"/users/{admin}").json()["total_stickers"] == 4
+
+
+def test_membership_functions_and_member_listing(scenario):
+    c = scenario.client
+    admin, member = scenario.user("admin"), scenario.user("member")
+    community_id = scenario.community(admin)
+
+    assert c.post(f"/communities/{community_id}/join", json={"user_id": member}).status_code == 200
+    assert c.post(f"/communities/{community_id}/join", json={"user_id": member}).status_code == 400  # déjà membre (23505)
+    assert c.get(f"/users/{member}").json()["community_id"] == community_id
+
+    url = f"/communities/{community_id}/users"
+    page = c.get(url, params={"fields": "username", "limit": 1, "count": True}).json()
+    assert page["count"] == 2 and len(page["community_users"]) == 1
+    assert set(page["community_users"][0]) == {"auth_id", "updated_at", "username"}
+    rest = c.get(url, params={"fields": "username", "limit": 1, "cursor": page["next_cursor"]}).json()
+    assert rest["next_cursor"] is None
+    assert [m["auth_id"] for m in page["community_users"] + rest["community_users"]] == sorted([admin, member])
+
+    r = c.delete(f"/communities/{community_id}/kick", params={"admin_id": member, "user_id": admin})
+    assert r.status_code == 403
+    r = c.delete(f"/communities/{community_id}/kick", params={"admin_id": admin, "user_id": member})
+    assert r.status_code == 200
+    assert c.get(f"/users/{member}").json()["community_id"] is None
+    assert [m["auth_id"] for m in c.get(url).json()["community_users"]] == [admin]
+
+
+def test_keyset_pages_follow_created_at_then_id(scenario):
+    c = scenario.client
+    admin = scenario.user()
+    community_id = scenario.community(admin)
+    ids = [c.post("/stickers/", json=_sticker(community_id, admin)).json()["id"] for _ in range(5)]
+
+    seen, cursor = [], ""
+    while cursor is not None:
+        page = c.get(f"/communities/{community_id}/stickers", params={"limit": 2, "cursor": cursor}).json()
+        seen += page["items"]
+        cursor = page["next_cursor"]
+    assert sorted(s["id"] for s in seen) == sorted(ids)
+    keys = [(s["created_at"], s["id"]) for s in seen]
+    assert keys == sorted(keys, reverse=True)
+    assert c.get(f"/communities/{community_id}/stickers", params={"cursor": "x"}).status_code == 400
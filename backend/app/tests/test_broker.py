@@ -0,0 +1,47 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core.broker import Broker, broker, community_topic
+from app.tests.conftest import COMMUNITY, STICKER_BODY
+
+
+def test_publishes_are_batched_per_loop_turn():
+    async def scenario():
+        broker = Broker()
+        sub = broker.subscribe("t")
+        for i in range(5):
+            broker.publish("t", {"n": i})
+        broker.publish("other", {"n": -1})  # sujet sans abonné : ignoré
+        batch = await asyncio.wait_for(sub.get(), 1)
+        assert [e["n"] for e in batch] == [0, 1, 2, 3, 4]
+        assert sub.queue.empty()
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_is_dropped_without_blocking_others():
+    async def scenario():
+        broker = Broker(queue_size=1)
+        slow, fast = broker.subscribe("t"), broker.subscribe("t")
+        broker.publish("t", {"n": 1})
+        await asyncio.sleep(0)
+        assert (await fast.get())[0]["n"] == 1  # fast consomme, slow non
+        broker.publish("t", {"n": 2})
+        await asyncio.sleep(0)
+        assert slow.dropped and await slow.get() is None
+        assert (await fast.get())[0]["n"] == 2
+        assert broker.subscribers("t") == 1
+
+    asyncio.run(scenario())
+
+
+def test_websocket_receives_added_sticker(client_counted):
+    with TestClient(app) as client:
+        with client.websocket_connect(f"/communities/{COMMUNITY}/ws") as ws:
+            assert client.post("/stickers/", json=STICKER_BODY).status_code == 200
+            events = ws.receive_json()
+        assert events[0]["type"] == "sticker.added"
+        assert events[0]["sticker"]["community_id"] == COMMUNITY
+    assert broker.subscribers(community_topic(COMMUNITY)) == 0
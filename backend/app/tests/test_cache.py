@@ -0,0 +1,110 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core.cache import TTLCache, profile_cache, sticker_cache
+from app.core.database import get_async_db
+from app.tests.conftest import FakeResp, FakeSupabase
+
+
+def test_ttl_cache_expiry_and_lru(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.core.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # évince b, le moins récemment utilisé
+    assert cache.get("b") is None
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_profile_read_through_and_invalidation():
+    calls = []
+    profile = {
+        "auth_id": "u", "username": "foo", "created_at": "2025-01-01T00:00:00Z",
+        "is_admin": False, "total_stickers": 0, "score": 0,
+    }
+
+    def script(table, ops):
+        calls.append((table, ops[0][0]))
+        if table == "profiles" and ops[0][0] == "update":
+            return FakeResp([{**profile, "username": "neo"}])
+        if table == "profiles":
+            return FakeResp(profile)
+        return FakeResp([])
+
+    fake = FakeSupabase(script=script)
+    app.dependency_overrides[get_async_db] = lambda: fake
+    try:
+        client = TestClient(app)
+        assert client.get("/users/u").json()["username"] == "foo"
+        assert client.get("/users/u").json()["username"] == "foo"
+        assert calls == [("profiles", "select")]
+
+        client.put("/users/u", json={"username": "neo"})
+        assert profile_cache.get("u") is None
+        client.get("/users/u")
+        assert calls[-1] == ("profiles", "select")
+        assert len(calls) == 3
+
+        stats = client.get("/cache/stats").json()
+        assert stats["profiles"]["hits"] >= 1
+        assert "stickers" in stats and "communities" in stats
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_delete_sticker_invalidates_sticker_cache():
+    sticker = {
+        "id": "s1", "title": "t", "description": "d", "image_url": "u", "lat": 1.0, "long": 2.0,
+        "community_id": "cbddd46b-619c-4a3d-ab83-5888fe9bc21e",
+        "auth_id": "7660c4d7-a3af-47b2-a9d0-b37c72643324",
+    }
+
+    def script(table, ops):
+        if table == "delete_sticker":
+            return FakeResp({"sticker": sticker, "total_stickers": 0, "score": 0})
+        return FakeResp([sticker])
+
+    app.dependency_overrides[get_async_db] = lambda: FakeSupabase(script=script)
+    try:
+        client = TestClient(app)
+        assert client.get("/stickers/s1").status_code == 200
+        assert sticker_cache.get("s1") is not None
+        assert client.delete("/stickers/s1").status_code == 200
+        assert sticker_cache.get("s1") is None
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_invalidation_during_read_discards_stale_fill():
+    cache = TTLCache(maxsize=2, ttl=10)
+    token = cache.token()
+    cache.pop("a")  # invalidation pendant la lecture de "a"
+    assert cache.set("a", "périmé", token) is False and cache.get("a") is None
+    assert cache.set("b", 2, token) is True  # autre clé : pas concernée
+    assert cache.set("a", "frais", cache.token()) is True
+    for key in ("x", "y", "z"):  # invalidations oubliées au-delà de maxsize : prudence
+        cache.pop(key)
+    assert cache.set("b", 3, token) is False
+    assert cache.stats()["stale_writes"] == 2
+
+
+def test_sticker_deleted_while_being_read_is_not_cached():
+    from app.services.sticker_service import get_sticker, _apply_sticker_removed
+
+    sticker = {"id": "s1", "lat": 1.0, "long": 2.0, "auth_id": "a"}
+
+    def script(table, ops):
+        # la suppression arrive (depuis ce worker ou un autre) pendant l'aller-retour
+        _apply_sticker_removed({"sticker": sticker})
+        return FakeResp([sticker])
+
+    row = asyncio.run(get_sticker(FakeSupabase(script=script), "s1"))
+    assert row == sticker  # la lecture en cours rend ce qu'elle a lu...
+    assert sticker_cache.get("s1") is None  # ...mais ne le remet pas en cache
@@ -5,4 +5,39 @@ def test_join_community_ok(client_ok):
     body = {"user_id":"7660c4d7-a3af-47b2-a9d0-b37c72643324"}
     r = client_ok.post(f"/communities/{cid}/join", json=body)
     assert r.status_code == 200
-    assert r.json()["ok"] is True
\ No newline at end of file
+    assert r.json()["ok"] is True
+
+def _client_raising(code, message):
+    from fastapi.testclient import TestClient
+    from postgrest.exceptions import APIError
+    from app.main import app
+    from app.core.database import get_async_db, instrument
+    from app.tests.conftest import FakeSupabase
+
+    def script(table, ops):
+        raise APIError({"message": message, "code": code})
+
+    app.dependency_overrides[get_async_db] = lambda: instrument(FakeSupabase(script=script))
+    return TestClient(app)
+
+def test_kick_user_errors_map_to_http():
+    from app.main import app
+    cid = "cbddd46b-619c-4a3d-ab83-5888fe9bc21e"
+    try:
+        r = _client_raising("42501", "Seul l'administrateur peut expulser un utilisateur") \
+            .delete(f"/communities/{cid}/kick", params={"admin_id": "x", "user_id": "y"})
+        assert r.status_code == 403
+        r = _client_raising("P0002", "Communauté introuvable") \
+            .delete(f"/communities/{cid}/kick", params={"admin_id": "x", "user_id": "y"})
+        assert r.status_code == 404
+        assert r.json()["detail"] == "Communauté introuvable"
+    finally:
+        app.dependency_overrides.clear()
+
+def test_create_community_is_one_rpc(client_ok):
+    from app.core.leaderboard import leaderboards
+    admin = "7660c4d7-a3af-47b2-a9d0-b37c72643324"
+    r = client_ok.post("/communities/", json={"name": "c", "admin_id": admin})
+    assert r.status_code == 200
+    assert leaderboards.community(r.json()["id"]).rank(admin) == 1
+    leaderboards.clear()
@@ -0,0 +1,14 @@
+import asyncio
+
+from app.config import settings
+from app.core.database import PooledPostgrestClient
+
+
+def test_pooled_client_uses_configured_limits():
+    client = PooledPostgrestClient("http://example.com/rest/v1", headers={"apikey": "dummy"})
+    pool = client.session._transport._pool
+    assert pool._http2 is settings.SUPABASE_HTTP2
+    assert pool._max_connections == settings.SUPABASE_POOL_MAX_CONNECTIONS
+    assert pool._max_keepalive_connections == settings.SUPABASE_POOL_MAX_KEEPALIVE
+    assert pool._keepalive_expiry == settings.SUPABASE_POOL_KEEPALIVE_EXPIRY
+    asyncio.run(client.aclose())
@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from app.core.geo import GridIndex, haversine_m, sticker_index
+
+
+def _brute_nearby(points, lat, long, radius, community_id=None):
+    hits = [
+        (haversine_m(lat, long, p_lat, p_long), sid)
+        for sid, p_lat, p_long, comm in points
+        if (community_id is None or comm == community_id)
+        and haversine_m(lat, long, p_lat, p_long) <= radius
+    ]
+    return sorted(hits)
+
+
+def test_grid_nearby_matches_brute_force():
+    rnd = random.Random(42)
+    index = GridIndex(cell_deg=0.01)
+    points = []
+    for i in range(2000):
+        p = (f"s{i}", 48.8 + rnd.uniform(-0.1, 0.1), 2.3 + rnd.uniform(-0.1, 0.1), rnd.choice(["c1", "c2"]))
+        points.append(p)
+        index.add(*p)
+
+    for radius in (100, 1500, 8000):
+        assert index.nearby(48.85, 2.35, radius, limit=5000) == _brute_nearby(points, 48.85, 2.35, radius)
+    assert index.nearby(48.85, 2.35, 3000, community_id="c2", limit=5000) == \
+        _brute_nearby(points, 48.85, 2.35, 3000, community_id="c2")
+
+
+def test_grid_bbox_and_remove():
+    index = GridIndex()
+    index.add("a", 48.85, 2.35, "c1")
+    index.add("b", 48.86, 2.36, "c1")
+    index.add("c", 45.76, 4.83, "c2")
+
+    assert [sid for _, sid in index.bbox(48.8, 2.3, 48.9, 2.4)] == ["a", "b"]
+    index.remove("a")
+    assert [sid for _, sid in index.bbox(48.8, 2.3, 48.9, 2.4)] == ["b"]
+    assert [sid for _, sid in index.bbox(40, -5, 50, 10, community_id="c2")] == ["c"]
+    assert len(index) == 2
+
+
+def test_grid_wraps_around_antimeridian():
+    index = GridIndex()
+    index.add("east", -16.5, 179.999, "c")
+    index.add("west", -16.5, -179.999, "c")
+    index.add("far", -16.5, 170.0, "c")
+    for i in range(100):
+        # cellules occupées ailleurs : les requêtes passent par la grille, pas par le parcours complet
+        index.add(f"pad{i}", 10 + i * 0.01, 0, "c")
+
+    assert [sid for _, sid in index.nearby(-16.5, 179.9995, 500)] == ["east", "west"]
+    assert [sid for _, sid in index.nearby(-16.5, -179.9995, 500)] == ["west", "east"]
+    # boîte à cheval sur ±180 : min_long > max_long
+    assert sorted(sid for _, sid in index.bbox(-17, 179.9, -16, -179.9)) == ["east", "west"]
+    assert [sid for _, sid in index.bbox(-17, 179.9, -16, 180)] == ["east"]
+
+
+@pytest.fixture
+def indexed_stickers():
+    sticker_index.clear()
+    sticker_index.add("far", 48.90, 2.35, "c")
+    sticker_index.add("s1", 48.8001, 2.3001, "c")
+    yield
+    sticker_index.clear()
+
+
+def test_nearby_endpoint(client_ok, indexed_stickers):
+    r = client_ok.get("/stickers/nearby", params={"lat": 48.8, "long": 2.3, "radius": 500})
+    assert r.status_code == 200
+    body = r.json()
+    assert [s["id"] for s in body] == ["s1"]
+    assert body[0]["distance_m"] < 500
+
+
+def test_bbox_endpoint_rejects_inverted_box(client_ok):
+    r = client_ok.get("/stickers/bbox", params={"min_lat": 49, "min_long": 2, "max_lat": 48, "max_long": 3})
+    assert r.status_code == 400
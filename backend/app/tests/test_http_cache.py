@@ -0,0 +1,110 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core import http_cache
+from app.core.database import get_async_db, instrument
+from app.schemas.user import ProfileResponse
+from app.tests.conftest import COMMUNITY, PROFILE, USER, FakeResp, FakeSupabase, happy_script
+
+
+@pytest.mark.parametrize("path,cache_control", [
+    ("/stickers/s1", "public, max-age=300"),
+    (f"/users/{USER}", "public, max-age=30"),
+    (f"/communities/{COMMUNITY}", "public, max-age=300"),
+    (f"/communities/{COMMUNITY}/users", "public, max-age=30"),
+    (f"/users/{USER}/stickers", "public, max-age=30"),
+    (f"/users/{USER}/stickers?cursor=", "public, max-age=30"),
+])
+def test_conditional_get(client_counted, path, cache_control):
+    r = client_counted.get(path)
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    assert etag.startswith('"') and r.headers["cache-control"] == cache_control
+
+    r304 = client_counted.get(path, headers={"If-None-Match": f'"other", W/{etag}'})
+    assert r304.status_code == 304
+    assert r304.content == b""
+    assert r304.headers["etag"] == etag
+
+    assert client_counted.get(path, headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_etag_changes_with_content():
+    profile = dict(PROFILE)
+
+    def script(table, ops):
+        if ops[0][0] == "update":
+            profile.update(ops[0][1])
+            return FakeResp([dict(profile)])
+        if table == "profiles":
+            return FakeResp(dict(profile))
+        return happy_script(table, ops)
+
+    app.dependency_overrides[get_async_db] = lambda: instrument(FakeSupabase(script=script))
+    try:
+        client = TestClient(app)
+        before = client.get(f"/users/{USER}").headers["etag"]
+        client.put(f"/users/{USER}", json={"username": "neo"})
+        r = client.get(f"/users/{USER}", headers={"If-None-Match": before})
+        assert r.status_code == 200
+        assert r.json()["username"] == "neo"
+        assert r.headers["etag"] != before
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_cached_row_is_encoded_once(monkeypatch):
+    calls = []
+    dumps = http_cache.orjson.dumps
+    monkeypatch.setattr(http_cache.orjson, "dumps", lambda obj: calls.append(1) or dumps(obj))
+    row = {"id": "s1", "title": "t"}
+    assert http_cache.encode(row, key=("test", 1)) == http_cache.encode(row, key=("test", 1))
+    assert len(calls) == 1
+    http_cache.encode(dict(row), key=("test", 1))  # nouvel objet (cache invalidé) : recalcul
+    assert len(calls) == 2
+
+
+def test_row_version_answers_304_without_encoding(monkeypatch):
+    profile = {**PROFILE, "updated_at": "2026-10-18T10:00:00+00:00"}
+
+    def script(table, ops):
+        if ops[0][0] == "update":
+            profile.update(ops[0][1], updated_at="2026-10-18T10:05:00+00:00")
+            return FakeResp([dict(profile)])
+        if table == "profiles":
+            return FakeResp(dict(profile))
+        return happy_script(table, ops)
+
+    app.dependency_overrides[get_async_db] = lambda: instrument(FakeSupabase(script=script))
+    try:
+        client = TestClient(app)
+        etag = client.get(f"/users/{USER}").headers["etag"]
+        # ETag tiré de updated_at (et des compteurs), pas de l'empreinte du corps
+        assert etag != http_cache.encode(profile, ProfileResponse)[0]
+        assert etag != client.get(f"/users/{USER}", params={"fields": "score"}).headers["etag"]
+
+        calls = []
+        dumps = http_cache.orjson.dumps
+        monkeypatch.setattr(http_cache.orjson, "dumps", lambda obj: calls.append(1) or dumps(obj))
+        assert client.get(f"/users/{USER}", headers={"If-None-Match": etag}).status_code == 304
+        assert calls == []
+        monkeypatch.undo()
+
+        client.put(f"/users/{USER}", json={"username": "neo"})
+        assert client.get(f"/users/{USER}", headers={"If-None-Match": etag}).status_code == 200
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_row_version():
+    rows = [{"id": "a", "updated_at": "t1"}, {"id": "b", "updated_at": "t2"}]
+    assert http_cache.row_version(rows, "id", "*") == ("*", ("a", "t1"), ("b", "t2"))
+    assert http_cache.row_version(rows + [{"id": "c"}], "id") is None
+
+
+def test_etag_matches():
+    assert http_cache.etag_matches('*', '"a"')
+    assert http_cache.etag_matches('"b", W/"a"', '"a"')
+    assert not http_cache.etag_matches('"b"', '"a"')
+    assert not http_cache.etag_matches(None, '"a"')
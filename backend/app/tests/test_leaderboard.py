@@ -0,0 +1,59 @@
+import pytest
+
+from app.core.leaderboard import Leaderboards, leaderboards
+
+
+def test_leaderboard_incremental_updates():
+    boards = Leaderboards()
+    boards.update("a", username="alice", score=30, community_id="c1")
+    boards.update("b", username="bob", score=50, community_id="c1")
+    boards.update("c", username="carol", score=40, community_id="c2")
+
+    assert [e["auth_id"] for e in boards.global_board.top(10)] == ["b", "c", "a"]
+    assert [e["auth_id"] for e in boards.community("c1").top(10)] == ["b", "a"]
+
+    # un sticker de plus pour alice : elle passe devant bob
+    boards.update("a", score=60, total_stickers=6)
+    top = boards.community("c1").top(1)
+    assert top == [{"rank": 1, "auth_id": "a", "username": "alice", "avatar_url": None,
+                    "score": 60, "total_stickers": 6}]
+    assert boards.global_board.rank("a") == 1
+
+    # bob quitte c1 puis rejoint c2
+    boards.update("b", community_id=None)
+    assert [e["auth_id"] for e in boards.community("c1").top(10)] == ["a"]
+    boards.update("b", community_id="c2")
+    assert [e["auth_id"] for e in boards.community("c2").top(10)] == ["b", "c"]
+
+
+@pytest.fixture
+def seeded_leaderboards():
+    leaderboards.clear()
+    cid = "cbddd46b-619c-4a3d-ab83-5888fe9bc21e"
+    leaderboards.update("u1", username="one", score=10, community_id=cid)
+    leaderboards.update("u2", username="two", score=20, community_id=cid)
+    leaderboards.update("u3", username="three", score=30)
+    yield cid
+    leaderboards.clear()
+
+
+def test_community_leaderboard_endpoint(client_ok, seeded_leaderboards):
+    r = client_ok.get(f"/communities/{seeded_leaderboards}/leaderboard", params={"top": 1})
+    assert r.status_code == 200
+    assert [e["auth_id"] for e in r.json()["leaderboard"]] == ["u2"]
+
+
+def test_global_leaderboard_endpoint(client_ok, seeded_leaderboards):
+    r = client_ok.get("/users/leaderboard")
+    assert r.status_code == 200
+    assert [e["rank"] for e in r.json()["leaderboard"]] == [1, 2, 3]
+    assert r.json()["leaderboard"][0]["auth_id"] == "u3"
+
+
+def test_add_sticker_updates_leaderboard(client_ok, seeded_leaderboards):
+    payload = {
+        "community_id": seeded_leaderboards, "title": "t", "description": "d", "image_url": "u",
+        "long": 1, "lat": 2, "auth_id": "7660c4d7-a3af-47b2-a9d0-b37c72643324",
+    }
+    assert client_ok.post("/stickers/", json=payload).status_code == 200
+    assert leaderboards.global_board.rank("7660c4d7-a3af-47b2-a9d0-b37c72643324") == 3
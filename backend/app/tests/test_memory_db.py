@@ -0,0 +1,189 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from postgrest.exceptions import APIError
+
+from app.main import app
+from app.api import communities
+from app.core.database import get_async_db, instrument
+from app.core.leaderboard import leaderboards
+from app.core.memory_db import MemoryDatabase
+from app.core.pagination import keyset_filter
+from app.services.sticker_service import list_stickers
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def _seeded(n=50, sid="s{:03d}".format):
+    db = MemoryDatabase()
+    db.insert("profiles", [{"auth_id": "u1", "username": "a"}, {"auth_id": "u2", "username": "b"}])
+    db.insert("communities", [{"id": "c1", "name": "c", "admin_id": "u1"}])
+    db.insert("stickers", [
+        {"id": sid(i), "auth_id": "u1" if i % 2 else "u2", "community_id": "c1",
+         "lat": 1.0, "long": 2.0, "created_at": f"2025-01-01T00:{i // 60:02d}:{i % 60:02d}Z"}
+        for i in range(n)
+    ])
+    return db
+
+
+def test_secondary_index_keyset_matches_full_sort():
+    db = _seeded(sid=lambda i: str(uuid.UUID(int=i)))  # curseurs : ids UUID
+    expected = sorted(
+        (r for r in db.tables["stickers"].rows.values() if r["auth_id"] == "u1"),
+        key=lambda r: (r["created_at"], r["id"]), reverse=True,
+    )
+    seen, cursor = [], ""
+    while cursor is not None:
+        rows, cursor = run(list_stickers(db, "auth_id", "u1", 7, cursor=cursor))
+        seen += rows
+    assert [r["id"] for r in seen] == [r["id"] for r in expected]
+
+    # pagination par offset : mêmes lignes
+    rows, _ = run(list_stickers(db, "auth_id", "u1", 7, offset=7))
+    assert [r["id"] for r in rows] == [r["id"] for r in expected[7:14]]
+
+
+def test_query_builder_filters_and_projection():
+    db = _seeded(10)
+    rows = run(db.table("stickers").select("id,auth_id").in_("id", ["s001", "s002", "zz"]).execute()).data
+    assert sorted(r["id"] for r in rows) == ["s001", "s002"]
+    assert set(rows[0]) == {"id", "auth_id"}
+
+    page = run(db.table("stickers").select("id").order("id").gt("id", "s007").limit(5).execute()).data
+    assert page == [{"id": "s008"}, {"id": "s009"}]
+
+    c, i = "2025-01-01T00:00:05Z", "s005"
+    older = run(db.table("stickers").select("id").or_(keyset_filter(c, i))
+                .order("created_at", desc=True).order("id", desc=True).execute()).data
+    assert [r["id"] for r in older] == ["s004", "s003", "s002", "s001", "s000"]
+    unquoted = keyset_filter(c, i).replace('"', "")
+    assert run(db.table("stickers").select("id").or_(unquoted)
+               .order("created_at", desc=True).order("id", desc=True).execute()).data == older
+
+    # autre forme de or_ : refusée comme PostgREST (400 côté route), pas de 500
+    with pytest.raises(APIError) as e:
+        run(db.table("stickers").select("id").or_("id.eq.s001,id.eq.s002").execute())
+    assert e.value.code == "PGRST100"
+
+    with pytest.raises(APIError) as e:
+        run(db.table("profiles").select("*").eq("auth_id", "nobody").single().execute())
+    assert e.value.code == "PGRST116"
+
+
+def test_update_keeps_indexes_in_sync():
+    db = _seeded(4)
+    run(db.table("stickers").update({"auth_id": "u2"}).eq("id", "s001").execute())
+    ids = lambda a: {r["id"] for r in run(db.table("stickers").select("id").eq("auth_id", a).execute()).data}
+    assert ids("u1") == {"s003"}
+    assert ids("u2") == {"s000", "s001", "s002"}
+    run(db.table("stickers").delete().eq("id", "s000").execute())
+    assert ids("u2") == {"s001", "s002"}
+
+
+def test_rpc_functions_mirror_sql_errors():
+    db = _seeded(0)
+    result = run(db.rpc("add_sticker", {"p_sticker": {"auth_id": "u1", "community_id": "c1", "lat": 1, "long": 2}}).execute()).data
+    assert (result["total_stickers"], result["score"]) == (1, 10)
+    with pytest.raises(APIError) as e:
+        run(db.rpc("add_sticker", {"p_sticker": {"auth_id": "ghost", "community_id": "c1"}}).execute())
+    assert e.value.code == "P0002"
+    with pytest.raises(APIError) as e:
+        run(db.rpc("kick_user", {"p_community_id": "c1", "p_admin_id": "u2", "p_user_id": "u1"}).execute())
+    assert e.value.code == "42501"
+
+
+@pytest.fixture
+def client_memory():
+    db = MemoryDatabase()
+    app.dependency_overrides[get_async_db] = lambda: instrument(db)
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+        leaderboards.clear()
+
+
+def test_api_runs_end_to_end_on_memory_backend(client_memory):
+    admin, member = str(uuid.uuid4()), str(uuid.uuid4())
+    for auth_id in (admin, member):
+        assert client_memory.post("/users/", json={"auth_id": auth_id, "username": auth_id[:8]}).status_code == 200
+    community_id = client_memory.post("/communities/", json={"name": "c", "admin_id": admin}).json()["id"]
+    assert client_memory.post(f"/communities/{community_id}/join", json={"user_id": member}).status_code == 200
+
+    body = {"community_id": community_id, "title": "t", "image_url": "u", "lat": 48.85, "long": 2.35, "auth_id": member}
+    for _ in range(3):
+        assert client_memory.post("/stickers/", json=body).status_code == 200
+    assert client_memory.get(f"/users/{member}").json()["score"] == 30
+
+    page = client_memory.get(f"/communities/{community_id}/stickers", params={"limit": 2}).json()
+    rest = client_memory.get(f"/communities/{community_id}/stickers", params={"cursor": page["next_cursor"]}).json()
+    assert len(page["items"]) == 2 and len(rest["items"]) == 1 and rest["next_cursor"] is None
+
+    members = client_memory.get(f"/communities/{community_id}/users").json()["community_users"]
+    assert {m["auth_id"] for m in members} == {admin, member}
+
+    r = client_memory.delete(f"/communities/{community_id}/kick", params={"admin_id": member, "user_id": admin})
+    assert r.status_code == 403
+    r = client_memory.delete(f"/communities/{community_id}/kick", params={"admin_id": admin, "user_id": member})
+    assert r.status_code == 200
+    assert client_memory.get(f"/users/{member}").json()["community_id"] is None
+
+
+def test_member_listing_projection_paging_and_count(client_memory, monkeypatch):
+    admin = str(uuid.uuid4())
+    client_memory.post("/users/", json={"auth_id": admin, "username": "admin"})
+    community_id = client_memory.post("/communities/", json={"name": "c", "admin_id": admin}).json()["id"]
+    members = sorted(str(uuid.uuid4()) for _ in range(4))
+    for auth_id in members:
+        client_memory.post("/users/", json={"auth_id": auth_id, "username": auth_id[:8]})
+        client_memory.post(f"/communities/{community_id}/join", json={"user_id": auth_id})
+
+    url = f"/communities/{community_id}/users"
+    page = client_memory.get(url, params={"fields": "username", "limit": 3, "count": True}).json()
+    assert page["count"] == 5
+    assert all(set(m) == {"auth_id", "updated_at", "username"} for m in page["community_users"])
+    rest = client_memory.get(url, params={"fields": "username", "limit": 3, "cursor": page["next_cursor"]}).json()
+    assert rest["next_cursor"] is None and "count" not in rest
+    assert [m["auth_id"] for m in page["community_users"] + rest["community_users"]] == sorted(members + [admin])
+
+    # sans limit ni cursor : tous les membres (tableau de bord de la communauté)
+    monkeypatch.setattr(communities, "MEMBERS_PAGE_SIZE", 2)
+    everyone = client_memory.get(url).json()
+    assert len(everyone["community_users"]) == 5 and everyone["next_cursor"] is None
+    first = client_memory.get(url, params={"cursor": ""}).json()
+    assert len(first["community_users"]) == 2 and first["next_cursor"] is not None
+
+    assert client_memory.get(url, params={"fields": "password"}).status_code == 400
+    assert client_memory.get(url, params={"cursor": "x"}).status_code == 400
+    assert client_memory.get(f"/communities/{uuid.uuid4()}/users").status_code == 404
+    assert client_memory.get(f"/users/{admin}", params={"fields": "score"}).json() == {"auth_id": admin, "score": 0}
+
+    body = {"community_id": community_id, "title": "t", "image_url": "u", "lat": 1.0, "long": 2.0, "auth_id": admin}
+    client_memory.post("/stickers/", json=body)
+    [sticker] = client_memory.get(f"/users/{admin}/stickers", params={"fields": "title"}).json()
+    assert set(sticker) == {"id", "created_at", "updated_at", "title"}
+
+
+def test_member_listing_etag_changes_on_join_and_kick(client_memory):
+    admin, member = str(uuid.uuid4()), str(uuid.uuid4())
+    for auth_id in (admin, member):
+        client_memory.post("/users/", json={"auth_id": auth_id, "username": auth_id[:8]})
+    community_id = client_memory.post("/communities/", json={"name": "c", "admin_id": admin}).json()["id"]
+    url = f"/communities/{community_id}/users"
+
+    before = client_memory.get(url).headers["etag"]
+    assert client_memory.get(url, headers={"If-None-Match": before}).status_code == 304
+
+    client_memory.post(f"/communities/{community_id}/join", json={"user_id": member})
+    joined = client_memory.get(url)
+    assert joined.status_code == 200 and joined.headers["etag"] != before
+    assert client_memory.get(url, headers={"If-None-Match": before}).status_code == 200
+
+    client_memory.delete(f"/communities/{community_id}/kick", params={"admin_id": admin, "user_id": member})
+    kicked = client_memory.get(url, headers={"If-None-Match": joined.headers["etag"]})
+    assert kicked.status_code == 200 and kicked.headers["etag"] != joined.headers["etag"]
+    assert [m["auth_id"] for m in kicked.json()["community_users"]] == [admin]
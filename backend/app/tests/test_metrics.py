@@ -0,0 +1,47 @@
+import asyncio
+
+from app.main import app
+from app.core.database import get_async_db, instrument
+from app.core.instrumentation import InstrumentedClient
+from app.tests.conftest import FakeResp, FakeSupabase
+
+
+def test_metrics_endpoint_uses_route_templates(client_ok):
+    assert client_ok.get("/users/u").status_code == 200
+    r = client_ok.get("/metrics")
+    assert r.status_code == 200
+    assert 'slapit_http_requests_total{method="GET",route="/users/{auth_id}",status="200"}' in r.text
+    assert "slapit_http_requests_in_flight" in r.text
+
+
+def test_instrumented_client_reports_table_and_verb():
+    seen = []
+    client = InstrumentedClient(
+        FakeSupabase(script=lambda t, ops: FakeResp([{"ok": True}])),
+        observers=[lambda table, verb, duration, error: seen.append((table, verb, error))],
+    )
+
+    async def run():
+        await client.table("profiles").select("*").eq("auth_id", "u").single().execute()
+        await client.table("stickers").delete().eq("id", "s1").execute()
+        await client.rpc("add_sticker", {"p_sticker": {}}).execute()
+
+    asyncio.run(run())
+    assert seen == [("profiles", "select", None), ("stickers", "delete", None), ("add_sticker", "rpc", None)]
+
+
+def test_supabase_histogram_exported(client_ok):
+    fake = instrument(FakeSupabase(script=lambda t, ops: FakeResp([{"id": "c"}])))
+    app.dependency_overrides[get_async_db] = lambda: fake
+    client_ok.get("/communities/cbddd46b-619c-4a3d-ab83-5888fe9bc21e")
+    text = client_ok.get("/metrics").text
+    assert 'slapit_supabase_request_duration_seconds_count{outcome="ok",table="communities",verb="select"}' in text
+
+
+def test_series_caches_are_separate_per_family():
+    from app.core.metrics import _http_series, observe_supabase_call
+    # mêmes clés dans les deux familles ((x, y, True) == (x, y, 1)) : pas de mélange
+    observe_supabase_call("GET", "/collision", 0.01, None)
+    requests, latency = _http_series("GET", "/collision", 1)
+    requests.inc()
+    latency.observe(0.01)
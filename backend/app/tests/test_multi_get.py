@@ -0,0 +1,57 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.config import settings
+from app.core.database import get_async_db, instrument
+from app.core.memory_db import MemoryDatabase
+from app.tests.conftest import db_round_trips
+
+U1, U2, C1, S1, S2 = (str(uuid.uuid4()) for _ in range(5))
+UNKNOWN = str(uuid.uuid4())
+
+
+@pytest.fixture
+def client():
+    db = MemoryDatabase()
+    db.insert("profiles", [{"auth_id": U1, "username": "a"}, {"auth_id": U2, "username": "b"}])
+    db.insert("communities", [{"id": C1, "name": "c", "admin_id": U1}])
+    db.insert("stickers", [
+        {"id": sid, "auth_id": U1, "community_id": C1, "title": "t", "image_url": "u", "lat": 1.0, "long": 2.0}
+        for sid in (S1, S2)
+    ])
+    client = instrument(db)
+    app.dependency_overrides[get_async_db] = lambda: client
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("path,ids,key", [
+    ("/users", [U2, UNKNOWN, U1, U2], "auth_id"),
+    ("/stickers", [S2, S1, UNKNOWN], "id"),
+    ("/communities", [UNKNOWN, C1], "id"),
+])
+def test_multi_get_keeps_order_and_reports_misses(client, path, ids, key):
+    r = client.get(path, params={"ids": ",".join(ids)})
+    assert r.status_code == 200
+    assert db_round_trips(r) == 1  # un seul filtre in_ pour tout le lot
+
+    wanted = list(dict.fromkeys(ids))
+    body = r.json()
+    assert [item and item[key] for item in body["items"]] == [None if i == UNKNOWN else i for i in wanted]
+    assert body["missing"] == [UNKNOWN]
+
+    # les lignes trouvées sont en cache : seul l'id inconnu est relu
+    again = client.get(path, params={"ids": ",".join(ids)})
+    assert again.json() == body
+
+
+def test_multi_get_validation(client, monkeypatch):
+    assert client.get("/users", params={"ids": f"{U1},nope"}).status_code == 400
+    monkeypatch.setattr(settings, "MULTI_GET_MAX_IDS", 2)
+    assert client.get("/stickers", params={"ids": ",".join([S1, S2, UNKNOWN])}).status_code == 400
+    assert client.get("/stickers", params={"ids": ",".join([S1, S1, S2])}).status_code == 200
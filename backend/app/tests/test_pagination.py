@@ -0,0 +1,90 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core.database import get_async_db
+from app.core.pagination import decode_cursor, encode_cursor
+from app.tests.conftest import FakeResp, FakeSupabase
+
+USER = "7660c4d7-a3af-47b2-a9d0-b37c72643324"
+COMMUNITY = "cbddd46b-619c-4a3d-ab83-5888fe9bc21e"
+
+S1, S2, S3 = (f"00000000-0000-0000-0000-00000000000{i}" for i in (1, 2, 3))
+
+ROWS = [
+    {"id": S3, "created_at": "2025-01-03T00:00:00+00:00"},
+    {"id": S2, "created_at": "2025-01-02T00:00:00+00:00"},
+    {"id": S1, "created_at": "2025-01-01T00:00:00+00:00"},
+]
+
+
+def test_cursor_roundtrip():
+    cursor = encode_cursor("2025-01-02T00:00:00+00:00", S2)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == ("2025-01-02T00:00:00+00:00", S2)
+
+
+@pytest.mark.parametrize("created_at, row_id", [
+    ('2025-01-02",id.gt."0', S2),  # guillemets / virgules : réécriture du filtre
+    ("2025-01-02T00:00:00+00:00", "s2),or(id.gt.0"),
+    ("hier", S2),
+    (None, S2),
+])
+def test_cursor_values_are_validated(created_at, row_id):
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(created_at, row_id))
+
+
+def _client(seen):
+    def script(table, ops):
+        seen.append(ops)
+        limit = next((op[1] for op in ops if op[0] == "limit"), len(ROWS))
+        rows = ROWS
+        if any(op[0] == "or_" for op in ops):
+            rows = ROWS[2:]  # après s2
+        return FakeResp(rows[:limit])
+
+    app.dependency_overrides[get_async_db] = lambda: FakeSupabase(script=script)
+    return TestClient(app)
+
+
+def test_user_stickers_cursor_mode():
+    seen = []
+    try:
+        client = _client(seen)
+        page = client.get(f"/users/{USER}/stickers", params={"cursor": "", "limit": 2}).json()
+        assert [s["id"] for s in page["items"]] == [S3, S2]
+        assert decode_cursor(page["next_cursor"]) == ("2025-01-02T00:00:00+00:00", S2)
+
+        page = client.get(f"/users/{USER}/stickers", params={"cursor": page["next_cursor"], "limit": 2}).json()
+        assert [s["id"] for s in page["items"]] == [S1]
+        assert page["next_cursor"] is None
+        or_filter = next(op[1] for op in seen[-1] if op[0] == "or_")
+        assert or_filter == 'created_at.lt."2025-01-02T00:00:00+00:00",' \
+                           f'and(created_at.eq."2025-01-02T00:00:00+00:00",id.lt."{S2}")'
+
+        # sans curseur : ancien contrat (liste + offset)
+        legacy = client.get(f"/users/{USER}/stickers", params={"offset": 1, "limit": 2}).json()
+        assert isinstance(legacy, list)
+        assert ("range", (1, 3)) in seen[-1]
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_community_stickers_and_invalid_cursor():
+    seen = []
+    try:
+        client = _client(seen)
+        page = client.get(f"/communities/{COMMUNITY}/stickers", params={"limit": 5}).json()
+        assert [s["id"] for s in page["items"]] == [S3, S2, S1]
+        assert page["next_cursor"] is None
+        assert ("eq", "community_id", COMMUNITY) in seen[-1]
+
+        r = client.get(f"/communities/{COMMUNITY}/stickers", params={"cursor": "not-a-cursor"})
+        assert r.status_code == 400
+        forged = encode_cursor('2025-01-02",id.gt."0', S2)
+        r = client.get(f"/communities/{COMMUNITY}/stickers", params={"cursor": forged})
+        assert r.status_code == 400
+        assert not any(op[0] == "or_" for ops in seen for op in ops)
+    finally:
+        app.dependency_overrides.clear()
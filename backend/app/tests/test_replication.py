@@ -0,0 +1,118 @@
+import asyncio
+import os
+
+import pytest
+
+from app.core.broker import Broker, UnixSocketBackend
+from app.core.geo import sticker_index
+from app.core.leaderboard import leaderboards
+from app.core.replication import SYNC_TOPIC, Replicator, replicator
+from app.core.tiles import sticker_tiles
+from app.services.sticker_service import load_sticker_indexes
+from app.tests.conftest import FakeResp, FakeSupabase
+
+STICKER = {"id": "s1", "lat": 48.85, "long": 2.35, "community_id": "c", "auth_id": "u1"}
+
+
+@pytest.fixture(autouse=True)
+def empty_structures():
+    sticker_index.clear()
+    sticker_tiles.clear()
+    leaderboards.clear()
+    yield
+    sticker_index.clear()
+    sticker_tiles.clear()
+    leaderboards.clear()
+    replicator.ready = True
+
+
+def from_peer(event_type, payload):
+    # message d'un autre worker, tel que remis par le transport du broker
+    replicator._receive({"type": event_type, "origin": -1, "payload": payload})
+
+
+def test_peer_events_are_applied_once_and_idempotent():
+    added = {"sticker": STICKER, "total_stickers": 1, "score": 10}
+    from_peer("sticker.added", added)
+    from_peer("sticker.added", added)  # remis deux fois (ou rejoué) : rien ne double
+    assert sticker_index.get("s1") is not None
+    assert sticker_tiles.tile(0, 0, 0)["count"] == 1
+    assert leaderboards.global_board.rank("u1") == 1
+
+    # propre message renvoyé par le transport : déjà appliqué par publish(), ignoré
+    replicator._receive({"type": "sticker.removed", "origin": os.getpid(), "payload": added})
+    assert sticker_index.get("s1") is not None
+
+    from_peer("sticker.removed", {"sticker": {"id": "s1"}, "total_stickers": 0, "score": 0})
+    assert sticker_index.get("s1") is None
+    assert sticker_tiles.tile(0, 0, 0)["count"] == 0
+
+
+def test_reload_swaps_structures_and_replays_concurrent_writes():
+    pages = asyncio.Event()
+
+    def script(table, ops):
+        return FakeResp([{"id": "old", "lat": 1.0, "long": 1.0, "community_id": "c"}])
+
+    async def scenario():
+        local = Replicator()
+        local._handlers = replicator._handlers
+
+        async def slow_load(supabase):
+            commit = await load_sticker_indexes(supabase)
+            await pages.wait()
+            return commit
+
+        local.loader("stickers", slow_load)
+        sticker_index.add("stale", 0.0, 0.0)
+        reload = asyncio.ensure_future(local.reload(FakeSupabase(script=script)))
+        await asyncio.sleep(0.01)
+        # écriture pendant le chargement : appliquée tout de suite, puis rejouée
+        local.publish("sticker.added", {"sticker": STICKER})
+        assert sticker_index.get("stale") is not None  # structures en service inchangées
+        pages.set()
+        await reload
+
+    asyncio.run(scenario())
+    assert sticker_index.get("stale") is None
+    assert sticker_index.get("old") is not None and sticker_index.get("s1") is not None
+    assert sticker_tiles.tile(0, 0, 0)["count"] == 2
+
+
+def test_warming_up_until_first_load(client_ok):
+    replicator.ready = False
+    r = client_ok.get("/ready")
+    assert r.status_code == 503 and r.json()["status"] == "warming_up"
+    # la vivacité ne dépend pas du chargement
+    assert client_ok.get("/health").status_code == 200
+    r = client_ok.get("/stickers/nearby", params={"lat": 48.85, "long": 2.35})
+    assert r.status_code == 503 and r.headers["retry-after"] == "5"
+    assert client_ok.get("/users/leaderboard").status_code == 503
+    replicator.ready = True
+    assert client_ok.get("/ready").status_code == 200
+
+
+def test_unix_socket_backend_reaches_other_workers(tmp_path):
+    async def scenario():
+        a = Broker(UnixSocketBackend(str(tmp_path), name="a"))
+        b = Broker(UnixSocketBackend(str(tmp_path), name="b"))
+        seen_a, seen_b = [], []
+        a.listen(SYNC_TOPIC, seen_a.append)
+        b.listen(SYNC_TOPIC, seen_b.append)
+        await a.start()
+        await b.start()
+        (tmp_path / "dead.sock").touch()  # socket d'un worker arrêté
+        try:
+            a.publish(SYNC_TOPIC, {"n": 1})
+            for _ in range(100):
+                if seen_b:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await a.close()
+            await b.close()
+        return seen_a, seen_b
+
+    seen_a, seen_b = asyncio.run(scenario())
+    assert seen_a == [{"n": 1}] and seen_b == [{"n": 1}]
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.main import app
+from app.core import resilience
+from app.core.database import get_async_db, instrument
+from app.core.resilience import supabase_policy
+from app.tests.conftest import STICKER_BODY, USER, FakeSupabase, FakeTable, happy_script
+
+
+class FaultyTable(FakeTable):
+    async def execute(self):
+        # chaque appel consomme la panne suivante du scénario : ("ok" | "error" | secondes de latence)
+        self.fake.calls.append(self.name)
+        fault = self.fake.faults.pop(0) if self.fake.faults else "ok"
+        if fault == "error":
+            raise httpx.ConnectError("connexion refusée")
+        if fault != "ok":
+            await asyncio.sleep(fault)
+        return self.fake.handle(self.name, self._ops)
+
+
+class FaultySupabase(FakeSupabase):
+    """Client factice à pannes injectables : erreurs réseau et latences, appel par appel."""
+
+    def __init__(self, faults):
+        super().__init__(script=happy_script)
+        self.faults = list(faults)
+        self.calls = []
+
+    def table(self, name):
+        return FaultyTable(name, self)
+
+    def rpc(self, fn, params):
+        call = FaultyTable(fn, self)
+        call._ops.append(("rpc", params))
+        return call
+
+
+@pytest.fixture
+def faulty(monkeypatch):
+    monkeypatch.setattr(supabase_policy, "call_timeout", 0.1)
+    monkeypatch.setattr(supabase_policy, "retries", 2)
+    monkeypatch.setattr(supabase_policy, "backoff", 0.001)
+    monkeypatch.setattr(supabase_policy, "hedge_after", 0)
+
+    def install(*faults):
+        fake = FaultySupabase(faults)
+        app.dependency_overrides[get_async_db] = lambda: instrument(fake)
+        return fake
+
+    yield install
+    app.dependency_overrides.clear()
+
+
+def get(path, method="GET", **kwargs):
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            return await ac.request(method, path, **kwargs)
+
+    return asyncio.run(go())
+
+
+def test_reads_are_retried_on_transient_errors(faulty):
+    fake = faulty("error", "error")
+    assert get(f"/users/{USER}").status_code == 200
+    assert fake.calls == ["profiles"] * 3
+
+
+def test_writes_are_not_retried(faulty):
+    fake = faulty("error")
+    assert get("/stickers/", method="POST", json=STICKER_BODY).status_code == 500
+    assert fake.calls == ["add_sticker"]
+
+
+def test_slow_call_times_out_with_504(faulty, monkeypatch):
+    monkeypatch.setattr(supabase_policy, "retries", 0)
+    faulty(1.0)
+    start = time.perf_counter()
+    assert get(f"/users/{USER}").status_code == 504
+    assert time.perf_counter() - start < 0.5
+
+
+def test_request_deadline_bounds_retries(faulty, monkeypatch):
+    monkeypatch.setattr(resilience.settings, "REQUEST_DEADLINE", 0.15)
+    fake = faulty(1.0, 1.0, 1.0)
+    start = time.perf_counter()
+    assert get(f"/users/{USER}").status_code == 504
+    assert time.perf_counter() - start < 0.5 and len(fake.calls) == 2  # 0.1 s puis 0.05 s restantes
+
+
+def test_hedged_read_beats_slow_first_call(faulty, monkeypatch):
+    monkeypatch.setattr(supabase_policy, "call_timeout", 2.0)
+    monkeypatch.setattr(supabase_policy, "hedge_after", 0.02)
+    fake = faulty(1.0, "ok")
+    start = time.perf_counter()
+    assert get(f"/users/{USER}").status_code == 200
+    assert time.perf_counter() - start < 0.5 and len(fake.calls) == 2
+
+
+def test_circuit_breaker_fails_fast_then_recovers(faulty, monkeypatch):
+    monkeypatch.setattr(supabase_policy, "retries", 0)
+    monkeypatch.setattr(supabase_policy.breaker, "threshold", 2)
+    monkeypatch.setattr(supabase_policy.breaker, "reset_timeout", 0.05)
+    fake = faulty("error", "error")
+    assert [get(f"/users/{USER}").status_code for _ in range(2)] == [500, 500]
+    r = get(f"/users/{USER}")
+    assert r.status_code == 503 and r.headers["retry-after"] == "1"
+    assert len(fake.calls) == 2  # coupe-circuit ouvert : pas d'appel
+
+    time.sleep(0.06)  # demi-ouvert : l'appel d'essai réussit et referme le circuit
+    assert get(f"/users/{USER}").status_code == 200
+    assert supabase_policy.breaker.state == "closed"
@@ -0,0 +1,20 @@
+import json
+
+from app.core.responses import trusted_response
+from app.schemas.sticker import StickerResponse
+from app.schemas.user import ProfileResponse
+from app.tests.conftest import PROFILE, STICKER
+
+
+def test_trusted_response_matches_response_model():
+    for model, row in ((StickerResponse, STICKER), (ProfileResponse, {**PROFILE, "id": 1, "bio": "é"})):
+        fast = json.loads(trusted_response(model, row).body)
+        assert fast == model.model_validate(row).model_dump(mode="json")
+
+
+def test_read_routes_use_fast_path(client_ok):
+    r = client_ok.get("/stickers/s1")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/json"
+    # colonnes hors modèle (created_at) non exposées, comme avec response_model
+    assert set(r.json()) == set(StickerResponse.model_fields)
@@ -0,0 +1,50 @@
+import pytest
+
+from app.tests.conftest import COMMUNITY, STICKER_BODY, USER, assert_max_round_trips, db_round_trips
+
+# (méthode, url, corps JSON, allers-retours Supabase max)
+ROUND_TRIP_BUDGETS = [
+    ("POST", "/users/", {"auth_id": USER, "username": "foo"}, 1),
+    ("GET", f"/users/{USER}", None, 1),
+    ("PUT", f"/users/{USER}", {"username": "neo"}, 2),
+    ("GET", f"/users/{USER}/stickers", None, 1),
+    ("POST", "/stickers/", STICKER_BODY, 1),
+    ("POST", "/stickers/batch", [STICKER_BODY, STICKER_BODY], 1),
+    ("GET", "/stickers/s1", None, 1),
+    ("DELETE", "/stickers/s1", None, 1),
+    ("POST", "/communities/", {"name": "c", "admin_id": USER}, 1),
+    ("GET", f"/communities/{COMMUNITY}", None, 1),
+    ("GET", f"/communities/{COMMUNITY}/stickers", None, 1),
+    ("GET", f"/communities/{COMMUNITY}/users", None, 1),
+    ("POST", f"/communities/{COMMUNITY}/join", {"user_id": USER}, 1),
+    ("DELETE", f"/communities/{COMMUNITY}/quit?user_id={USER}", None, 1),
+    ("DELETE", f"/communities/{COMMUNITY}/kick?admin_id={USER}&user_id={USER}", None, 1),
+]
+
+
+@pytest.mark.parametrize("method,url,body,max_calls", ROUND_TRIP_BUDGETS)
+def test_round_trip_budget(client_counted, method, url, body, max_calls):
+    r = client_counted.request(method, url, json=body)
+    assert r.status_code == 200, r.text
+    assert_max_round_trips(r, max_calls)
+
+
+def test_server_timing_details(client_counted):
+    r = client_counted.get(f"/users/{USER}")
+    assert db_round_trips(r) == 1
+    assert 'db.profiles.select;dur=' in r.headers["server-timing"]
+    # deuxième lecture servie par le cache : aucun appel
+    assert db_round_trips(client_counted.get(f"/users/{USER}")) == 0
+
+
+def test_query_log_line(client_counted, caplog, monkeypatch):
+    import json
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "QUERY_LOG_ENABLED", True)
+    with caplog.at_level("INFO", logger="slapit.queries"):
+        client_counted.get(f"/communities/{COMMUNITY}")
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["route"] == "/communities/{community_id}"
+    assert record["db_calls"] == 1
+    assert record["calls"][0]["table"] == "communities"
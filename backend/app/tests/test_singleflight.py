@@ -0,0 +1,111 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.main import app
+from app.core.database import get_async_db, instrument
+from app.core.singleflight import SingleFlight
+from app.tests.conftest import COMMUNITY, FakeSupabase, FakeTable, happy_script
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"id": "c"}
+
+    async def main():
+        return await asyncio.gather(*(flight.do("c", fetch) for _ in range(50)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flight.stats() == {"enabled": True, "in_flight": 0, "leaders": 1, "coalesced": 49}
+
+
+def test_errors_are_shared_and_disabled_flight_passes_through():
+    flight = SingleFlight("test")
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream")
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", boom) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, ValueError) for r in asyncio.run(main()))
+    assert flight.leaders == 1
+
+    off = SingleFlight("off", enabled=False)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0)
+
+    async def many():
+        await asyncio.gather(*(off.do("k", fetch) for _ in range(5)))
+
+    asyncio.run(many())
+    assert len(calls) == 5
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flight = SingleFlight("test")
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return 42
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == 42
+
+
+class SlowTable(FakeTable):
+    async def execute(self):
+        await asyncio.sleep(0.05)
+        return self.fake.handle(self.name, self._ops)
+
+
+class SlowSupabase(FakeSupabase):
+    def table(self, name):
+        return SlowTable(name, self)
+
+
+@pytest.mark.parametrize("path,upstream_calls", [
+    (f"/communities/{COMMUNITY}", 1),
+    (f"/communities/{COMMUNITY}/users", 1),  # communauté et membres en un appel, une seule fois pour tous
+])
+def test_hot_community_reads_are_coalesced(path, upstream_calls):
+    calls = []
+
+    def script(table, ops):
+        calls.append(table)
+        return happy_script(table, ops)
+
+    app.dependency_overrides[get_async_db] = lambda: instrument(SlowSupabase(script=script))
+
+    async def burst(n):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            return await asyncio.gather(*(ac.get(path) for _ in range(n)))
+
+    try:
+        responses = asyncio.run(burst(30))
+    finally:
+        app.dependency_overrides.clear()
+
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.text for r in responses}) == 1
+    assert len(calls) == upstream_calls
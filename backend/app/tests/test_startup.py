@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# paquets du SDK supabase complet : inutiles au chemin PostgREST, ne doivent pas être chargés
+HEAVY_PACKAGES = {"supabase", "realtime", "storage3", "gotrue", "supafunc", "sqlalchemy"}
+
+
+def import_profile(module: str = "app.main") -> list[tuple[str, int, int]]:
+    """
+    Importe module dans un interpréteur neuf avec -X importtime.
+    Renvoie [(module, temps propre µs, temps cumulé µs)] dans l'ordre d'import.
+    """
+    env = dict(os.environ, TESTING="1", SUPABASE_URL="http://example.com", SUPABASE_KEY="dummy")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    profile = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile.append((name.strip(), int(self_us), int(cumulative_us)))
+    return profile
+
+
+def test_import_skips_full_sdk(record_property, session_report):
+    profile = import_profile()
+    total = next(cumulative for name, _, cumulative in profile if name == "app.main")
+    top = sorted(
+        (p for p in profile if p[0].startswith("app.") or "." not in p[0]),
+        key=lambda p: p[2], reverse=True,
+    )[:12]
+    # temps d'import dans le résumé de fin de session (et le rapport JUnit si --junitxml)
+    record_property("import_app_main_ms", round(total / 1000))
+    record_property("import_top_ms", {name: round(cumulative / 1000, 1) for name, _, cumulative in top})
+    session_report.append((
+        "import time",
+        [f"{name:<40} {cumulative / 1000:8.1f} ms" for name, _, cumulative in top],
+    ))
+
+    loaded = {name.split(".")[0] for name, _, _ in profile} & HEAVY_PACKAGES
+    assert not loaded, (
+        f"paquets chargés à l'import alors qu'ils devraient l'être à la demande : {sorted(loaded)} "
+        f"(import de app.main : {total / 1000:.0f} ms)"
+    )
+
+
+def test_clients_are_dropped_after_fork():
+    from app.core import database
+
+    database._async_db = object()
+    database._supabase = object()
+    database._forget_clients()
+    assert database._async_db is None and database._supabase is None
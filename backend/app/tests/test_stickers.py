@@ -1,3 +1,14 @@
+import asyncio
+import random
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core.database import get_async_db, instrument
+from app.core.memory_db import MemoryDatabase
+from app.tests.conftest import FakeResp, FakeSupabase
+
 def test_add_sticker_ok(client_ok):
     payload = {
         "community_id":"cbddd46b-619c-4a3d-ab83-5888fe9bc21e",
@@ -38,4 +49,113 @@ def test_get_user_stickers(client_ok):
     assert r.status_code == 200
     arr = r.json()
     assert isinstance(arr, list)
-    assert arr and "id" in arr[0]
\ No newline at end of file
+    assert arr and "id" in arr[0]
+
+def test_delete_sticker_ok(client_ok):
+    r = client_ok.delete("/stickers/cbddd46b-619c-4a3d-ab83-5888fe9bc21e")
+    assert r.status_code == 200
+
+class _Interleaved:
+    """
+    Moteur en mémoire dont chaque appel rend la main à la boucle (délai aléatoire) :
+    les requêtes concurrentes s'entrelacent entre leurs allers-retours, comme
+    face à Supabase. Chaque fonction SQL reste atomique, comme en base.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.calls = []
+
+    def _delayed(self, name, query):
+        execute = query.execute
+
+        async def interleaved():
+            self.calls.append(name)
+            await asyncio.sleep(random.random() / 1000)
+            return await execute()
+
+        query.execute = interleaved
+        return query
+
+    def table(self, name):
+        return self._delayed(name, self.db.table(name))
+
+    def rpc(self, fn, params):
+        return self._delayed(fn, self.db.rpc(fn, params))
+
+def test_concurrent_add_and_delete_lose_no_counter_update():
+    auth_id = "7660c4d7-a3af-47b2-a9d0-b37c72643324"
+    community_id = "cbddd46b-619c-4a3d-ab83-5888fe9bc21e"
+    db = MemoryDatabase()
+    db.insert("profiles", [{"auth_id": auth_id, "username": "foo", "total_stickers": 0, "score": 0}])
+    db.insert("communities", [{"id": community_id, "name": "c", "admin_id": auth_id}])
+    fake = _Interleaved(db)
+    app.dependency_overrides[get_async_db] = lambda: instrument(fake)
+    payload = {
+        "community_id": community_id, "title": "t", "description": "d", "image_url": "u",
+        "long": 1, "lat": 2, "auth_id": auth_id,
+    }
+
+    async def scenario(n):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            created = await asyncio.gather(*(ac.post("/stickers/", json=payload) for _ in range(n)))
+            ids = [r.json()["id"] for r in created]
+            deleted = await asyncio.gather(*(ac.delete(f"/stickers/{sid}") for sid in ids[: n // 2]))
+        return created + deleted
+
+    try:
+        n = 50
+        responses = asyncio.run(scenario(n))
+    finally:
+        app.dependency_overrides.clear()
+
+    assert all(r.status_code == 200 for r in responses)
+    profile = db.tables["profiles"].rows[auth_id]
+    # aucun incrément perdu entre requêtes entrelacées
+    assert (profile["total_stickers"], profile["score"]) == (n - n // 2, 10 * (n - n // 2))
+    # un seul aller-retour par écriture, jamais de lecture-modification-écriture de profiles
+    assert fake.calls == ["add_sticker"] * n + ["delete_sticker"] * (n // 2)
+
+def test_add_stickers_batch_partial_failure():
+    calls = []
+    good_user = "7660c4d7-a3af-47b2-a9d0-b37c72643324"
+
+    def script(table, ops):
+        calls.append(table)
+        rows = ops[0][1]["p_stickers"]
+        # la base écarte les stickers dont le profil n'existe pas
+        inserted = [r for r in rows if r["auth_id"] == good_user]
+        return FakeResp({
+            "stickers": inserted,
+            "profiles": [{"auth_id": good_user, "total_stickers": len(inserted), "score": 10 * len(inserted)}],
+        })
+
+    sticker = {
+        "community_id": "cbddd46b-619c-4a3d-ab83-5888fe9bc21e",
+        "title": "t", "description": "d", "image_url": "u", "long": 1, "lat": 2, "auth_id": good_user,
+    }
+    items = [
+        sticker,
+        {**sticker, "title": "  "},
+        {**sticker, "auth_id": "00000000-0000-0000-0000-000000000000"},
+        sticker,
+    ]
+    app.dependency_overrides[get_async_db] = lambda: FakeSupabase(script=script)
+    try:
+        r = TestClient(app).post("/stickers/batch", json=items)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert r.status_code == 200
+    body = r.json()
+    assert calls == ["add_stickers_batch"]
+    assert (body["inserted"], body["failed"]) == (2, 2)
+    assert [res["ok"] for res in body["results"]] == [True, False, False, True]
+    assert "title" in body["results"][1]["error"]
+
+def test_add_stickers_batch_too_large(client_ok, monkeypatch):
+    from app.config import settings
+    monkeypatch.setattr(settings, "STICKER_BATCH_MAX_SIZE", 2)
+    r = client_ok.post("/stickers/batch", json=[{}, {}, {}])
+    assert r.status_code == 413
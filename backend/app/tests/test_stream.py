@@ -0,0 +1,93 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.config import settings
+from app.core.database import get_async_db
+from app.core.instrumentation import InstrumentedClient
+from app.core.memory_db import MemoryDatabase
+
+COMMUNITY = "cbddd46b-619c-4a3d-ab83-5888fe9bc21e"
+N = 1234
+
+
+@pytest.fixture
+def stream_db(monkeypatch):
+    monkeypatch.setattr(settings, "STREAM_FIRST_PAGE_SIZE", 10)
+    monkeypatch.setattr(settings, "STREAM_PAGE_SIZE", 100)
+    db = MemoryDatabase()
+    db.insert("stickers", [
+        {"id": str(uuid.UUID(int=i)), "community_id": COMMUNITY, "auth_id": "u", "lat": 1.0, "long": 2.0,
+         "created_at": f"2025-01-01T{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}Z"}
+        for i in range(N)
+    ])
+    calls = []
+    client = InstrumentedClient(db, observers=[lambda *call: calls.append(call)])
+    app.dependency_overrides[get_async_db] = lambda: client
+    try:
+        yield calls
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_ndjson_stream_pages_through_everything(stream_db):
+    r = TestClient(app).get(f"/communities/{COMMUNITY}/stickers/stream")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert len(rows) == N
+    assert rows[0]["id"] == str(uuid.UUID(int=N - 1)) and rows[-1]["id"] == str(uuid.UUID(int=0))
+    assert len(stream_db) == 1 + (N - 10 + 99) // 100  # première page courte, puis pages pleines
+
+
+def test_sse_stream_and_resume(stream_db):
+    client = TestClient(app)
+    r = client.get(f"/communities/{COMMUNITY}/stickers/stream", headers={"Accept": "text/event-stream"})
+    assert r.headers["content-type"].startswith("text/event-stream")
+    assert r.text.startswith(": stream\n\n")
+    assert sum(line.startswith('data: {"id"') for line in r.text.splitlines()) == N
+    assert r.text.endswith(f'event: end\ndata: {{"count":{N}}}\n\n')
+
+    # reprise après la première page (10 stickers) avec Last-Event-ID
+    first_id = next(line[4:] for line in r.text.splitlines() if line.startswith("id: "))
+    resumed = client.get(
+        f"/communities/{COMMUNITY}/stickers/stream?format=sse", headers={"Last-Event-ID": first_id}
+    )
+    assert resumed.text.endswith(f'event: end\ndata: {{"count":{N - 10}}}\n\n')
+
+    assert client.get(f"/communities/{COMMUNITY}/stickers/stream?cursor=garbage").status_code == 400
+
+
+def test_client_disconnect_stops_upstream_paging(stream_db):
+    sent = []
+
+    async def main():
+        disconnected = asyncio.Event()
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if message["type"] == "http.response.body" and message.get("body"):
+                disconnected.set()  # le client part après le premier morceau
+
+        path = f"/communities/{COMMUNITY}/stickers/stream"
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+            "root_path": "", "headers": [], "client": ("127.0.0.1", 1), "server": ("test", 80),
+        }
+        await app(scope, receive, send)
+
+    asyncio.run(main())
+    assert sent[0]["status"] == 200
+    assert len(stream_db) <= 2
@@ -0,0 +1,54 @@
+import pytest
+
+from app.core.tiles import TileAggregator, sticker_tiles, tile_xy
+
+
+def test_tile_xy_known_values():
+    assert tile_xy(0, 0, 0) == (0, 0)
+    # Paris au zoom 10
+    assert tile_xy(48.8566, 2.3522, 10) == (518, 352)
+
+
+def test_tile_counts_centroids_and_incremental_updates():
+    agg = TileAggregator(max_zoom=10, cluster_depth=2, cache_size=8)
+    agg.add(48.85, 2.35)
+    agg.add(48.87, 2.37)
+    agg.add(45.76, 4.83)
+
+    world = agg.tile(0, 0, 0)
+    assert world["count"] == 3
+    assert sum(c["count"] for c in world["clusters"]) == 3
+
+    x, y = tile_xy(48.85, 2.35, 8)
+    tile = agg.tile(8, x, y)
+    assert tile["count"] == 2
+    assert agg.cache.get((8, x, y)) is tile
+
+    # la suppression invalide la tuile en cache et met à jour le centroïde
+    agg.remove(48.87, 2.37)
+    tile = agg.tile(8, x, y)
+    assert tile["count"] == 1
+    assert tile["clusters"] == [{"count": 1, "lat": pytest.approx(48.85), "long": pytest.approx(2.35)}]
+    assert agg.tile(0, 0, 0)["count"] == 2
+
+
+def test_tile_cache_eviction():
+    agg = TileAggregator(max_zoom=4, cluster_depth=1, cache_size=2)
+    agg.tile(1, 0, 0)
+    agg.tile(1, 1, 0)
+    agg.tile(1, 0, 1)
+    assert len(agg.cache) == 2
+    assert agg.cache.get((1, 0, 0)) is None
+
+
+def test_tile_endpoint(client_ok):
+    sticker_tiles.clear()
+    sticker_tiles.add(48.85, 2.35)
+    try:
+        r = client_ok.get("/stickers/tiles/0/0/0")
+        assert r.status_code == 200
+        assert r.json()["count"] == 1
+        assert client_ok.get("/stickers/tiles/2/4/0").status_code == 400
+        assert client_ok.get(f"/stickers/tiles/{sticker_tiles.max_zoom + 1}/0/0").status_code == 400
+    finally:
+        sticker_tiles.clear()
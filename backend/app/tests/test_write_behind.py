@@ -0,0 +1,196 @@
+import asyncio
+
+import pytest
+
+from app.core.memory_db import MemoryDatabase
+from app.core.write_behind import CounterAggregator, profile_counters
+from app.services.sticker_service import create_sticker, create_stickers_batch, remove_sticker
+from app.services.user_service import get_profile
+
+
+def _db():
+    db = MemoryDatabase()
+    db.insert("profiles", [{"auth_id": "u1", "username": "a"}])
+    db.insert("communities", [{"id": "c1", "name": "c", "admin_id": "u1"}])
+    return db
+
+
+@pytest.fixture
+def deferred(monkeypatch):
+    monkeypatch.setattr(profile_counters, "enabled", True)
+    yield profile_counters
+    profile_counters._pending.clear()
+    profile_counters._get_client = None
+
+
+def test_deltas_are_merged_into_reads_then_flushed(deferred):
+    db = _db()
+    stored = db.tables["profiles"].rows
+
+    async def client():
+        return db
+
+    async def scenario():
+        for i in range(3):
+            result = await create_sticker(db, {"id": f"s{i}", "auth_id": "u1", "community_id": "c1", "lat": 1.0, "long": 2.0})
+        assert (result["total_stickers"], result["score"]) == (3, 30)
+        assert not stored["u1"].get("total_stickers")  # ligne profiles non modifiée
+        profile = await get_profile(db, "u1")
+        assert (profile["total_stickers"], profile["score"]) == (3, 30)
+
+        await deferred.start(client)
+        assert await deferred.flush() == 1
+        assert (stored["u1"]["total_stickers"], stored["u1"]["score"]) == (3, 30)
+        assert (await get_profile(db, "u1"))["total_stickers"] == 3  # pas compté deux fois
+
+        await remove_sticker(db, "s0")
+        assert (await get_profile(db, "u1"))["score"] == 20
+        await deferred.close()  # écrit ce qui reste
+        assert stored["u1"]["score"] == 20 and len(deferred) == 0
+
+    asyncio.run(scenario())
+
+
+def test_batch_insert_defers_counters(deferred):
+    db = _db()
+    stored = db.tables["profiles"].rows
+
+    async def client():
+        return db
+
+    async def scenario():
+        rows = [{"id": f"s{i}", "auth_id": "u1", "community_id": "c1", "lat": 1.0, "long": 2.0} for i in range(3)]
+        rows.append({"id": "orphan", "auth_id": "nobody", "community_id": "c1", "lat": 1.0, "long": 2.0})
+        result = await create_stickers_batch(db, rows)
+        assert len(result["stickers"]) == 3
+        assert [(p["auth_id"], p["total_stickers"], p["score"]) for p in result["profiles"]] == [("u1", 3, 30)]
+        assert not stored["u1"].get("total_stickers")  # ligne profiles non modifiée
+        assert (await get_profile(db, "u1"))["score"] == 30
+
+        await deferred.start(client)
+        assert await deferred.flush() == 1
+        assert (stored["u1"]["total_stickers"], stored["u1"]["score"]) == (3, 30)
+
+    asyncio.run(scenario())
+
+
+def test_flush_publishes_written_counters_to_other_workers(deferred, monkeypatch):
+    from app.core import replication
+
+    db = _db()
+    sent = []
+    monkeypatch.setattr(replication.broker, "publish", lambda topic, event: sent.append(event))
+
+    async def client():
+        return db
+
+    async def scenario():
+        await create_sticker(db, {"id": "s0", "auth_id": "u1", "community_id": "c1", "lat": 1.0, "long": 2.0})
+        sent.clear()
+        await deferred.start(client)
+        assert await deferred.flush() == 1
+
+    asyncio.run(scenario())
+    # les autres workers reçoivent les compteurs écrits (caches et classements à jour)
+    [event] = [e for e in sent if e["type"] == "profile.counters"]
+    assert (event["payload"]["total_stickers"], event["payload"]["score"]) == (1, 10)
+
+
+def test_size_threshold_and_failed_flush_requeues():
+    db = _db()
+    db.insert("profiles", [{"auth_id": "u2", "username": "b"}])
+    failing = True
+
+    async def client():
+        if failing:
+            raise ConnectionError("supabase indisponible")
+        return db
+
+    async def scenario():
+        nonlocal failing
+        counters = CounterAggregator(enabled=True, flush_interval=60, max_pending=2)
+        await counters.start(client)
+        counters.add("u1", 1, 10)
+        counters.add("u2", 1, 10)  # seuil atteint : flush déclenché
+        assert await counters.flush() == 0 and len(counters) == 2  # échec : deltas remis en attente
+        counters.add("u1", 1, 10)
+        failing = False
+        await counters.close()
+        assert db.tables["profiles"].rows["u1"]["total_stickers"] == 2
+        assert db.tables["profiles"].rows["u2"]["score"] == 10
+
+    asyncio.run(scenario())
+
+
+class _Gated:
+    """Client dont la première lecture de profiles et les flushs attendent un signal."""
+
+    def __init__(self, db):
+        self.db = db
+        self.flush_gate = asyncio.Event()
+        self.read_gate = asyncio.Event()
+        self.reads = 0
+
+    def table(self, name):
+        query = self.db.table(name)
+        execute = query.execute
+
+        async def gated():
+            self.reads += 1
+            response = await execute()  # ligne lue maintenant, réponse reçue après le signal
+            if self.reads == 1:
+                await self.read_gate.wait()
+            return response
+
+        query.execute = gated
+        return query
+
+    def rpc(self, fn, params):
+        call = self.db.rpc(fn, params)
+        execute = call.execute
+
+        async def gated():
+            await self.flush_gate.wait()
+            return await execute()
+
+        call.execute = gated
+        return call
+
+
+def test_reads_racing_a_flush_count_each_delta_once(deferred):
+    from app.core.cache import profile_cache
+
+    gated = _Gated(_db())
+
+    async def client():
+        return gated
+
+    async def scenario():
+        await deferred.start(client)
+
+        # lecture commencée avant le flush, ligne reçue après : relue
+        deferred.add("u1", 1, 10)
+        reader = asyncio.ensure_future(get_profile(gated, "u1"))
+        await asyncio.sleep(0.01)
+        gated.flush_gate.set()
+        assert await deferred.flush() == 1
+        gated.read_gate.set()
+        assert (await reader)["total_stickers"] == 1
+        assert gated.reads == 2 and profile_cache.get("u1")["total_stickers"] == 1
+
+        # lecture pendant un flush : attend qu'il se termine
+        profile_cache.clear()
+        gated.flush_gate.clear()
+        deferred.add("u1", 1, 10)
+        flush = asyncio.ensure_future(deferred.flush())
+        await asyncio.sleep(0.01)
+        reader = asyncio.ensure_future(get_profile(gated, "u1"))
+        await asyncio.sleep(0.01)
+        assert not reader.done()
+        gated.flush_gate.set()
+        assert await flush == 1
+        assert (await reader)["total_stickers"] == 2
+        assert profile_cache.get("u1")["total_stickers"] == 2
+        await deferred.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,87 @@
+"""
+Surcoût par requête du journal d'accès JSON, mesuré dans le thread de la
+requête (time.thread_time : le thread d'écriture du QueueListener n'est pas
+compté) et en temps CPU total du processus (time.process_time).
+
+Modes comparés sur GET /health (application complète, middlewares compris,
+sortie vers /dev/null) :
+  - sans journal ;
+  - synchrone : formatage JSON et écriture dans le thread de la requête ;
+  - file : enregistrement posé dans la file, formaté et écrit par un thread dédié ;
+  - file + échantillonnage à 10 % des réponses réussies.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_access_log [--requests 20000] [--rounds 5]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("TESTING", "1")
+os.environ.setdefault("SUPABASE_URL", "http://example.com")
+os.environ.setdefault("SUPABASE_KEY", "dummy")
+
+from app.core.access_log import access_log  # noqa: E402
+from app.main import app  # noqa: E402
+
+SCOPE = {
+    "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+    "scheme": "http", "path": "/health", "raw_path": b"/health", "query_string": b"",
+    "root_path": "", "headers": [], "client": ("127.0.0.1", 1), "server": ("test", 80),
+}
+
+
+async def drive(n: int) -> tuple[float, float]:
+    """(µs CPU du thread de la requête, µs CPU du processus) par requête."""
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(200):  # échauffement
+        await app(dict(SCOPE), receive, send)
+    t0, p0 = time.thread_time(), time.process_time()
+    for _ in range(n):
+        await app(dict(SCOPE), receive, send)
+    return (time.thread_time() - t0) / n * 1e6, (time.process_time() - p0) / n * 1e6
+
+
+def measure(mode: str, n: int) -> tuple[float, float]:
+    with open(os.devnull, "w") as devnull:
+        if mode != "sans journal":
+            access_log.sample_rate = 0.1 if "10 %" in mode else 1.0
+            access_log.start(devnull, queued=mode != "synchrone")
+        try:
+            return asyncio.run(drive(n))
+        finally:
+            access_log.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    modes = ["sans journal", "synchrone", "file", "file, 10 %"]
+    best = {mode: (float("inf"), float("inf")) for mode in modes}
+    # meilleur de plusieurs passes alternées, pour limiter le bruit de la machine
+    for _ in range(args.rounds):
+        for mode in modes:
+            thread, process = measure(mode, args.requests)
+            best[mode] = (min(best[mode][0], thread), min(best[mode][1], process))
+
+    base_thread, base_process = best["sans journal"]
+    for mode in modes:
+        thread, process = best[mode]
+        print(
+            f"{mode:14} requête {thread:7.1f} µs (+{thread - base_thread:5.1f})"
+            f"   processus {process:7.1f} µs (+{process - base_process:5.1f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark de l'index spatial (app.core.geo.GridIndex) contre un scan complet.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_geo [--stickers 1000000] [--queries 200]
+"""
+import argparse
+import heapq
+import random
+import time
+
+from app.core.geo import GridIndex, haversine_m
+
+
+def brute_force_nearby(points, lat, long, radius_m, limit=100):
+    hits = []
+    for sid, p_lat, p_long, _ in points:
+        d = haversine_m(lat, long, p_lat, p_long)
+        if d <= radius_m:
+            hits.append((d, sid))
+    return heapq.nsmallest(limit, hits)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stickers", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--radius", type=float, default=1000)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    # stickers répartis sur la France métropolitaine
+    points = [
+        (f"s{i}", rnd.uniform(42.0, 51.0), rnd.uniform(-5.0, 8.0), "c")
+        for i in range(args.stickers)
+    ]
+
+    t0 = time.perf_counter()
+    index = GridIndex()
+    for p in points:
+        index.add(*p)
+    build_s = time.perf_counter() - t0
+
+    queries = [(rnd.uniform(42.0, 51.0), rnd.uniform(-5.0, 8.0)) for _ in range(args.queries)]
+
+    t0 = time.perf_counter()
+    for lat, long in queries:
+        index.nearby(lat, long, args.radius)
+    grid_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+
+    # le scan complet est très lent : on le limite à quelques requêtes
+    brute_queries = queries[: max(1, min(len(queries), 10))]
+    t0 = time.perf_counter()
+    for lat, long in brute_queries:
+        brute_force_nearby(points, lat, long, args.radius)
+    brute_ms = (time.perf_counter() - t0) * 1000 / len(brute_queries)
+
+    for lat, long in brute_queries:
+        assert index.nearby(lat, long, args.radius) == brute_force_nearby(points, lat, long, args.radius)
+
+    print(f"stickers            : {args.stickers}")
+    print(f"construction index  : {build_s:.2f} s")
+    print(f"nearby (grille)     : {grid_ms:.3f} ms/requête")
+    print(f"nearby (scan)       : {brute_ms:.3f} ms/requête")
+    print(f"accélération        : x{brute_ms / grid_ms:.0f}")
+
+
+if __name__ == "__main__":
+    main()
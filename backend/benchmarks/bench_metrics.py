@@ -0,0 +1,90 @@
+"""
+Surcoût de l'instrumentation Prometheus sur le chemin chaud.
+
+- middleware HTTP : requêtes ASGI directes (sans réseau) sur une route
+  triviale, avec et sans PrometheusMiddleware ;
+- client Supabase : execute() d'un query builder factice, brut et
+  enveloppé par InstrumentedClient.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_metrics [--requests 20000] [--rounds 5]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("TESTING", "1")
+
+from fastapi import FastAPI  # noqa: E402
+
+from app.core.database import instrument  # noqa: E402
+from app.core.metrics import PrometheusMiddleware  # noqa: E402
+from app.tests.conftest import FakeResp, FakeSupabase  # noqa: E402
+
+
+def make_app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        return {"id": item_id}
+
+    if with_metrics:
+        app.add_middleware(PrometheusMiddleware)
+    return app
+
+
+async def drive(app, n: int) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/items/42", "raw_path": b"/items/42", "query_string": b"",
+        "root_path": "", "headers": [], "client": ("127.0.0.1", 1), "server": ("test", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(200):  # échauffement
+        await app(dict(scope), receive, send)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+async def drive_client(client, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        await client.table("profiles").select("*").eq("auth_id", "u").execute()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    # meilleur de plusieurs passes alternées, pour limiter le bruit de la machine
+    bare_app, metrics_app = make_app(False), make_app(True)
+    fake = FakeSupabase(script=lambda t, ops: FakeResp([]))
+    wrapped_fake = instrument(fake)
+    bare = measured = raw = wrapped = float("inf")
+    for _ in range(args.rounds):
+        bare = min(bare, asyncio.run(drive(bare_app, args.requests)))
+        measured = min(measured, asyncio.run(drive(metrics_app, args.requests)))
+        raw = min(raw, asyncio.run(drive_client(fake, args.requests)))
+        wrapped = min(wrapped, asyncio.run(drive_client(wrapped_fake, args.requests)))
+
+    print(f"requête HTTP sans métriques : {bare:8.1f} µs")
+    print(f"requête HTTP avec métriques : {measured:8.1f} µs  (+{measured - bare:.1f} µs)")
+    print(f"appel Supabase brut         : {raw:8.1f} µs")
+    print(f"appel Supabase instrumenté  : {wrapped:8.1f} µs  (+{wrapped - raw:.1f} µs)")
+
+
+if __name__ == "__main__":
+    main()
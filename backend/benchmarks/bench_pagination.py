@@ -0,0 +1,98 @@
+"""
+Latence de la page N : pagination par offset vs pagination par clé (curseur).
+
+Par défaut, simulation hors ligne d'un parcours d'index B-tree sur
+(created_at desc, id desc) : l'offset doit parcourir toutes les lignes
+sautées, le curseur se positionne directement par dichotomie.
+
+Avec --live AUTH_ID, les deux modes sont mesurés contre le Supabase
+configuré (SUPABASE_URL / SUPABASE_KEY) via sticker_service.list_stickers.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_pagination [--rows 200000] [--limit 50]
+    python -m benchmarks.bench_pagination --live <auth_id>
+"""
+import argparse
+import asyncio
+import bisect
+import itertools
+import time
+
+PAGES = (1, 10, 100, 1000, 3000)
+
+
+def simulate(rows: int, limit: int, repeat: int = 20):
+    # index trié par clé croissante (-created_at, -id) == ordre created_at desc, id desc
+    index = [(-i, -i) for i in range(rows, 0, -1)]
+    index.sort()
+
+    def offset_page(n):
+        start = (n - 1) * limit
+        return list(itertools.islice(iter(index), start, start + limit))
+
+    def keyset_page(last_key):
+        pos = 0 if last_key is None else bisect.bisect_right(index, last_key)
+        return index[pos:pos + limit]
+
+    results = []
+    for n in PAGES:
+        if (n - 1) * limit >= rows:
+            break
+        last_key = index[(n - 1) * limit - 1] if n > 1 else None
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            a = offset_page(n)
+        offset_ms = (time.perf_counter() - t0) * 1000 / repeat
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            b = keyset_page(last_key)
+        keyset_ms = (time.perf_counter() - t0) * 1000 / repeat
+        assert a == b
+        results.append((n, offset_ms, keyset_ms))
+    return results
+
+
+async def live(auth_id: str, limit: int):
+    from app.core.database import get_async_db, close_async_db
+    from app.services.sticker_service import list_stickers
+
+    supabase = await get_async_db()
+    results = []
+    cursor = ""
+    try:
+        for n in range(1, max(PAGES) + 1):
+            t0 = time.perf_counter()
+            await list_stickers(supabase, "auth_id", auth_id, limit, offset=(n - 1) * limit)
+            offset_ms = (time.perf_counter() - t0) * 1000
+            t0 = time.perf_counter()
+            items, next_cursor = await list_stickers(supabase, "auth_id", auth_id, limit, cursor=cursor)
+            keyset_ms = (time.perf_counter() - t0) * 1000
+            if n in PAGES:
+                results.append((n, offset_ms, keyset_ms))
+            if next_cursor is None:
+                break
+            cursor = next_cursor
+    finally:
+        await close_async_db()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--live", metavar="AUTH_ID")
+    args = parser.parse_args()
+
+    if args.live:
+        results = asyncio.run(live(args.live, args.limit))
+    else:
+        results = simulate(args.rows, args.limit)
+
+    print(f"{'page':>6} {'offset (ms)':>12} {'curseur (ms)':>13}")
+    for n, offset_ms, keyset_ms in results:
+        print(f"{n:>6} {offset_ms:>12.3f} {keyset_ms:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Coût CPU par requête des lectures : chemin historique (response_model +
+validation pydantic + jsonable_encoder + json.dumps) vs chemin rapide
+(projection de la ligne, encodage orjson direct, sans revalidation).
+
+Les routes sont appelées directement en ASGI, sans réseau ni Supabase :
+seul le travail de l'application (sérialisation comprise) est mesuré.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_responses [--requests 20000] [--rounds 5]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("TESTING", "1")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+
+from app.core.responses import trusted_response  # noqa: E402
+from app.schemas.sticker import StickerResponse  # noqa: E402
+from app.schemas.user import ProfileResponse  # noqa: E402
+from app.tests.test_round_trips import PROFILE, STICKER  # noqa: E402
+
+ROW_STICKER = {**STICKER, "id": "0b7c6a4e-7a57-4c58-9d0c-6b4b1f1f5e11"}
+ROW_PROFILE = {**PROFILE, "id": 1, "bio": "Colleur de stickers depuis 2019", "last_login": None}
+ROW_LIST = [dict(ROW_STICKER, title=f"sticker {i}") for i in range(100)]
+
+
+def make_app(fast: bool) -> FastAPI:
+    app = FastAPI(default_response_class=ORJSONResponse if fast else JSONResponse)
+
+    if fast:
+        @app.get("/stickers/{sticker_id}", response_model=StickerResponse)
+        async def sticker(sticker_id: str):
+            return trusted_response(StickerResponse, ROW_STICKER)
+
+        @app.get("/users/{auth_id}", response_model=ProfileResponse)
+        async def profile(auth_id: str):
+            return trusted_response(ProfileResponse, ROW_PROFILE)
+    else:
+        @app.get("/stickers/{sticker_id}", response_model=StickerResponse)
+        async def sticker(sticker_id: str):
+            return StickerResponse(**ROW_STICKER)
+
+        @app.get("/users/{auth_id}", response_model=ProfileResponse)
+        async def profile(auth_id: str):
+            return ROW_PROFILE
+
+    @app.get("/communities/{community_id}/stickers")
+    async def stickers(community_id: str):
+        if fast:
+            return ORJSONResponse({"items": ROW_LIST, "next_cursor": None})
+        return {"items": ROW_LIST, "next_cursor": None}
+
+    return app
+
+
+async def drive(app, path: str, n: int) -> float:
+    """Temps CPU moyen (µs) d'une requête GET path, réponse complète comprise."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [], "client": ("127.0.0.1", 1), "server": ("test", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(200):  # échauffement
+        await app(dict(scope), receive, send)
+    t0 = time.process_time()
+    for _ in range(n):
+        await app(dict(scope), receive, send)
+    return (time.process_time() - t0) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    legacy_app, fast_app = make_app(False), make_app(True)
+    paths = {
+        "GET /stickers/{id}": "/stickers/s1",
+        "GET /users/{auth_id}": "/users/u1",
+        "GET /communities/{id}/stickers (100)": "/communities/c1/stickers",
+    }
+    for label, path in paths.items():
+        # meilleur de plusieurs passes alternées, pour limiter le bruit de la machine
+        legacy = fast = float("inf")
+        for _ in range(args.rounds):
+            legacy = min(legacy, asyncio.run(drive(legacy_app, path, args.requests)))
+            fast = min(fast, asyncio.run(drive(fast_app, path, args.requests)))
+        print(f"{label:40} avant {legacy:8.1f} µs   après {fast:8.1f} µs   (x{legacy / fast:.2f})")
+
+
+if __name__ == "__main__":
+    main()
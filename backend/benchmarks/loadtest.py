@@ -0,0 +1,227 @@
+"""
+Test de charge hors ligne de toute l'API, dans la configuration du Dockerfile
+(gunicorn + workers uvicorn, gunicorn.conf.py), contre un Supabase factice
+qui injecte une latence et une gigue par appel (benchmarks.loadtest_app).
+
+Chaque route est sollicitée à concurrence croissante ; pour chaque palier on
+mesure le débit et les latences p50/p95/p99. Les résultats sont écrits en JSON
+(avec le commit courant) pour comparer les exécutions d'un commit à l'autre.
+
+Usage (depuis backend/) :
+    python -m benchmarks.loadtest [--workers 2] [--concurrency 1,8,32,128]
+        [--requests 400] [--latency-ms 20] [--jitter-ms 5]
+        [--only /stickers] [--output loadtest.json] [--baseline ancien.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("TESTING", "1")
+os.environ.setdefault("SUPABASE_URL", "http://example.com")
+os.environ.setdefault("SUPABASE_KEY", "dummy")
+
+import httpx  # noqa: E402
+
+from app.tests.test_round_trips import COMMUNITY, ROUND_TRIP_BUDGETS, USER  # noqa: E402
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# (méthode, url, corps JSON) : toutes les routes des budgets d'allers-retours,
+# plus les lectures servies depuis les structures en mémoire
+ENDPOINTS = [(method, url, body) for method, url, body, _ in ROUND_TRIP_BUDGETS] + [
+    ("GET", "/health", None),
+    ("GET", "/users/leaderboard", None),
+    ("GET", f"/communities/{COMMUNITY}/leaderboard", None),
+    ("GET", "/stickers/nearby?lat=1&long=2&radius=5000", None),
+    ("GET", "/stickers/bbox?min_lat=0&min_long=1&max_lat=2&max_long=3", None),
+    ("GET", "/stickers/tiles/3/4/3", None),
+    ("GET", f"/users/{USER}/stickers?cursor=", None),
+]
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Percentile p (0-100) par rang le plus proche, sur une liste déjà triée."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_server(port: int, workers: int, latency_ms: float, jitter_ms: float, seed: int | None):
+    """Lance gunicorn comme le CMD du Dockerfile, mais sur l'application factice."""
+    env = dict(
+        os.environ,
+        TESTING="1",
+        SUPABASE_URL="http://example.com",
+        SUPABASE_KEY="dummy",
+        LOADTEST_LATENCY_MS=str(latency_ms),
+        LOADTEST_JITTER_MS=str(jitter_ms),
+        PROMETHEUS_MULTIPROC_DIR=tempfile.mkdtemp(prefix="slapit_prom_"),
+    )
+    if seed is not None:
+        env["LOADTEST_SEED"] = str(seed)
+    cmd = [
+        sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+        "-k", "uvicorn.workers.UvicornWorker", "-w", str(workers),
+        "-b", f"127.0.0.1:{port}", "--log-level", "warning",
+        "benchmarks.loadtest_app:app",
+    ]
+    return subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env)
+
+
+async def wait_ready(base_url: str, server, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"gunicorn s'est arrêté (code {server.returncode})")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("gunicorn n'a pas répondu à /health à temps")
+
+
+async def run_level(client: httpx.AsyncClient, method: str, url: str, body, concurrency: int, total: int) -> dict:
+    """Envoie total requêtes avec concurrency requêtes en vol ; latences en ms."""
+    latencies: list[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            t0 = time.perf_counter()
+            try:
+                r = await client.request(method, url, json=body)
+                ok = r.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append((time.perf_counter() - t0) * 1000)
+            errors += not ok
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+async def run(base_url: str, endpoints, levels: list[int], total: int) -> dict:
+    results: dict[str, list] = {}
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        for method, url, body in endpoints:
+            key = f"{method} {url}"
+            await run_level(client, method, url, body, 1, 10)  # échauffement
+            results[key] = []
+            for level in levels:
+                stats = await run_level(client, method, url, body, level, max(total, level))
+                results[key].append(stats)
+                print(
+                    f"{key[:60]:60} c={level:<4} {stats['rps']:8.1f} req/s  "
+                    f"p50 {stats['p50_ms']:7.2f}  p95 {stats['p95_ms']:7.2f}  p99 {stats['p99_ms']:7.2f} ms"
+                    + (f"  ({stats['errors']} erreurs)" if stats["errors"] else "")
+                )
+    return results
+
+
+def compare(results: dict, baseline_path: str) -> None:
+    """Affiche l'évolution du p95 et du débit par rapport à une exécution précédente."""
+    baseline = json.loads(Path(baseline_path).read_text())
+    print(f"\nComparaison avec {baseline_path} (commit {baseline.get('commit')}) :")
+    for key, levels in results.items():
+        before = {s["concurrency"]: s for s in baseline["results"].get(key, [])}
+        for stats in levels:
+            old = before.get(stats["concurrency"])
+            if not old or not old["p95_ms"] or not old["rps"]:
+                continue
+            print(
+                f"{key[:60]:60} c={stats['concurrency']:<4} "
+                f"p95 {stats['p95_ms'] / old['p95_ms']:5.2f}x  req/s {stats['rps'] / old['rps']:5.2f}x"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", default="1,8,32,128", help="paliers de concurrence, séparés par des virgules")
+    parser.add_argument("--requests", type=int, default=400, help="requêtes par palier et par route")
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=5)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--only", default=None, help="ne garder que les routes dont l'URL contient ce texte")
+    parser.add_argument("--output", default="loadtest.json")
+    parser.add_argument("--baseline", default=None, help="résultats JSON d'une exécution précédente")
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    endpoints = [e for e in ENDPOINTS if not args.only or args.only in e[1]]
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+
+    server = start_server(port, args.workers, args.latency_ms, args.jitter_ms, args.seed)
+    try:
+        asyncio.run(wait_ready(base_url, server))
+        results = asyncio.run(run(base_url, endpoints, levels, args.requests))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "workers": args.workers,
+            "concurrency": levels,
+            "requests": args.requests,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"\nRésultats écrits dans {args.output}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
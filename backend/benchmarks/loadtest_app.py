@@ -0,0 +1,62 @@
+"""
+Application servie par gunicorn pendant le test de charge (benchmarks.loadtest) :
+l'API réelle, dont get_async_db est remplacé par un Supabase factice qui
+simule la latence réseau de chaque appel.
+
+Variables d'environnement :
+    LOADTEST_LATENCY_MS  latence moyenne par appel Supabase (défaut 20)
+    LOADTEST_JITTER_MS   écart-type de la gigue, tronquée à 0 (défaut 5)
+    LOADTEST_SEED        graine du tirage (défaut : aléatoire)
+"""
+import asyncio
+import os
+import random
+
+os.environ.setdefault("TESTING", "1")
+os.environ.setdefault("SUPABASE_URL", "http://example.com")
+os.environ.setdefault("SUPABASE_KEY", "dummy")
+
+from app.main import app  # noqa: E402
+from app.core.database import get_async_db, instrument  # noqa: E402
+from app.tests.conftest import FakeSupabase, FakeTable  # noqa: E402
+from app.tests.test_round_trips import happy_script  # noqa: E402
+
+
+class LatencyTable(FakeTable):
+    async def execute(self):
+        await asyncio.sleep(self.fake.delay())
+        return self.fake.handle(self.name, self._ops)
+
+
+class LatencySupabase(FakeSupabase):
+    """FakeSupabase dont chaque execute() attend latence ± gigue (en secondes)."""
+
+    def __init__(self, script=None, latency: float = 0.02, jitter: float = 0.005, seed=None):
+        super().__init__(script)
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    def delay(self) -> float:
+        if not self.jitter:
+            return self.latency
+        return max(0.0, self._random.gauss(self.latency, self.jitter))
+
+    def table(self, name):
+        return LatencyTable(name, self)
+
+    def rpc(self, fn, params):
+        call = LatencyTable(fn, self)
+        call._ops.append(("rpc", params))
+        return call
+
+
+_seed = os.getenv("LOADTEST_SEED")
+fake = LatencySupabase(
+    script=happy_script,
+    latency=float(os.getenv("LOADTEST_LATENCY_MS", "20")) / 1000,
+    jitter=float(os.getenv("LOADTEST_JITTER_MS", "5")) / 1000,
+    seed=int(_seed) if _seed else None,
+)
+_db = instrument(fake)
+app.dependency_overrides[get_async_db] = lambda: _db
@@ -0,0 +1,36 @@
+# backend/gunicorn.conf.py
+# Hooks gunicorn pour les métriques Prometheus en mode multi-processus :
+# chaque worker écrit ses métriques dans PROMETHEUS_MULTIPROC_DIR, /metrics les agrège.
+import os
+import shutil
+
+# importé ici et non dans child_exit : le hook peut interrompre un import en cours du master
+from prometheus_client import multiprocess
+
+# 📌 Répertoire des métriques multi-processus vidé et recréé ici, à la lecture de la
+# configuration : avec preload_app, le master importe app.main (donc prometheus_client,
+# qui écrit dans ce répertoire) avant le hook on_starting. Une seule fois par master :
+# la configuration est relue à chaque rechargement (HUP), les workers en cours gardent
+# leurs fichiers.
+_PROM_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if _PROM_DIR and os.environ.get("SLAPIT_METRICS_DIR_READY") != str(os.getpid()):
+    shutil.rmtree(_PROM_DIR, ignore_errors=True)
+    os.makedirs(_PROM_DIR, exist_ok=True)
+    os.environ["SLAPIT_METRICS_DIR_READY"] = str(os.getpid())
+
+# 📌 L'application est importée une fois par le master puis partagée par fork :
+# démarrage et recyclage des workers plus rapides. Aucun client réseau n'est créé
+# à l'import (cf. app/core/database.py), chaque worker crée le sien après le fork.
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+
+def on_starting(server):
+    # sockets du broker inter-workers (BROKER_BACKEND=unix) laissés par un arrêt brutal
+    if os.getenv("BROKER_BACKEND") == "unix":
+        shutil.rmtree(os.getenv("BROKER_SOCKET_DIR", "/tmp/slapit_broker"), ignore_errors=True)
+
+
+def child_exit(server, worker):
+    # un worker recyclé ne doit plus compter dans les jauges "live"
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
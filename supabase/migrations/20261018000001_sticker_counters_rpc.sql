@@ -0,0 +1,63 @@
+-- 📌 Création / suppression atomique d'un sticker avec mise à jour des compteurs du profil.
+-- Un seul aller-retour PostgREST (supabase.rpc) et aucune lecture-modification-écriture
+-- côté API : les incréments concurrents d'un même utilisateur ne se perdent plus.
+
+create or replace function public.add_sticker(p_sticker jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_sticker public.stickers%rowtype;
+  v_profile public.profiles%rowtype;
+begin
+  insert into public.stickers (id, community_id, title, description, image_url, long, lat, auth_id)
+  select id, community_id, title, description, image_url, long, lat, auth_id
+    from jsonb_populate_record(null::public.stickers, p_sticker)
+  returning * into v_sticker;
+
+  update public.profiles
+     set total_stickers = coalesce(total_stickers, 0) + 1,
+         score          = coalesce(score, 0) + 10
+   where auth_id = v_sticker.auth_id
+  returning * into v_profile;
+
+  if not found then
+    raise exception 'Profil non trouvé' using errcode = 'P0002';
+  end if;
+
+  return jsonb_build_object(
+    'sticker', to_jsonb(v_sticker),
+    'total_stickers', v_profile.total_stickers,
+    'score', v_profile.score
+  );
+end;
+$$;
+
+create or replace function public.delete_sticker(p_id uuid)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_sticker public.stickers%rowtype;
+  v_profile public.profiles%rowtype;
+begin
+  delete from public.stickers where id = p_id
+  returning * into v_sticker;
+
+  if not found then
+    raise exception 'Sticker not found' using errcode = 'P0002';
+  end if;
+
+  update public.profiles
+     set total_stickers = greatest(coalesce(total_stickers, 0) - 1, 0),
+         score          = greatest(coalesce(score, 0) - 10, 0)
+   where auth_id = v_sticker.auth_id
+  returning * into v_profile;
+
+  return jsonb_build_object(
+    'sticker', to_jsonb(v_sticker),
+    'total_stickers', v_profile.total_stickers,
+    'score', v_profile.score
+  );
+end;
+$$;
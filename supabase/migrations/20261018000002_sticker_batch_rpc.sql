@@ -0,0 +1,46 @@
+-- 📌 Insertion groupée de stickers (POST /stickers/batch) en un seul aller-retour.
+-- Un seul INSERT pour tout le lot, puis une seule mise à jour des compteurs par auth_id.
+-- Les lignes dont le profil ou la communauté n'existe pas (ou dont l'id existe déjà)
+-- sont écartées au lieu de faire échouer tout le lot : l'API les signale élément par élément.
+
+create or replace function public.add_stickers_batch(p_stickers jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_stickers jsonb;
+  v_profiles jsonb;
+begin
+  with candidates as (
+    select r.*
+      from jsonb_populate_recordset(null::public.stickers, p_stickers) r
+  ),
+  inserted as (
+    insert into public.stickers (id, community_id, title, description, image_url, long, lat, auth_id)
+    select c.id, c.community_id, c.title, c.description, c.image_url, c.long, c.lat, c.auth_id
+      from candidates c
+     where exists (select 1 from public.profiles p where p.auth_id = c.auth_id)
+       and exists (select 1 from public.communities k where k.id = c.community_id)
+    on conflict (id) do nothing
+    returning *
+  ),
+  counts as (
+    select auth_id, count(*) as n
+      from inserted
+     group by auth_id
+  ),
+  bumped as (
+    update public.profiles p
+       set total_stickers = coalesce(p.total_stickers, 0) + c.n,
+           score          = coalesce(p.score, 0) + 10 * c.n
+      from counts c
+     where p.auth_id = c.auth_id
+    returning p.auth_id, p.total_stickers, p.score
+  )
+  select coalesce((select jsonb_agg(to_jsonb(i)) from inserted), '[]'::jsonb),
+         coalesce((select jsonb_agg(to_jsonb(b)) from bumped), '[]'::jsonb)
+    into v_stickers, v_profiles;
+
+  return jsonb_build_object('stickers', v_stickers, 'profiles', v_profiles);
+end;
+$$;
@@ -0,0 +1,116 @@
+-- 📌 Opérations de communauté transactionnelles, un seul aller-retour PostgREST chacune.
+-- Une erreur au milieu annule toute l'opération : plus d'appartenance à moitié écrite.
+-- Codes d'erreur interprétés par l'API :
+--   P0002 -> 404 (ligne introuvable), 42501 -> 403 (droits insuffisants), autres -> 400.
+
+create or replace function public.create_community(p_community jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_community public.communities%rowtype;
+begin
+  insert into public.communities (id, name, description, admin_id, created_at)
+  select id, name, description, admin_id, coalesce(created_at, now())
+    from jsonb_populate_record(null::public.communities, p_community)
+  returning * into v_community;
+
+  insert into public.user_communities (user_id, community_id, joined_at)
+  values (v_community.admin_id, v_community.id, v_community.created_at);
+
+  update public.profiles
+     set community_id = v_community.id,
+         is_admin     = true
+   where auth_id = v_community.admin_id;
+
+  if not found then
+    raise exception 'Erreur lors de la mise à jour du profil administrateur';
+  end if;
+
+  return to_jsonb(v_community);
+end;
+$$;
+
+create or replace function public.join_community(p_community_id uuid, p_user_id uuid)
+returns jsonb
+language plpgsql
+as $$
+begin
+  insert into public.user_communities (user_id, community_id, joined_at)
+  values (p_user_id, p_community_id, now());
+
+  update public.profiles
+     set community_id = p_community_id
+   where auth_id = p_user_id;
+
+  if not found then
+    raise exception 'Profil introuvable' using errcode = 'P0002';
+  end if;
+
+  return jsonb_build_object('user_id', p_user_id, 'community_id', p_community_id);
+end;
+$$;
+
+create or replace function public.quit_community(p_community_id uuid, p_user_id uuid)
+returns jsonb
+language plpgsql
+as $$
+begin
+  delete from public.user_communities
+   where community_id = p_community_id
+     and user_id = p_user_id;
+
+  if not found then
+    raise exception 'Utilisateur introuvable dans cette communauté' using errcode = 'P0002';
+  end if;
+
+  update public.profiles
+     set community_id = null
+   where auth_id = p_user_id;
+
+  if not found then
+    raise exception 'Erreur lors de la mise à jour du profil';
+  end if;
+
+  return jsonb_build_object('user_id', p_user_id, 'community_id', p_community_id);
+end;
+$$;
+
+create or replace function public.kick_user(p_community_id uuid, p_admin_id uuid, p_user_id uuid)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_admin_id uuid;
+begin
+  select admin_id into v_admin_id
+    from public.communities
+   where id = p_community_id;
+
+  if not found then
+    raise exception 'Communauté introuvable' using errcode = 'P0002';
+  end if;
+
+  if v_admin_id is distinct from p_admin_id then
+    raise exception 'Seul l''administrateur peut expulser un utilisateur' using errcode = '42501';
+  end if;
+
+  delete from public.user_communities
+   where community_id = p_community_id
+     and user_id = p_user_id;
+
+  if not found then
+    raise exception 'Utilisateur introuvable dans cette communauté' using errcode = 'P0002';
+  end if;
+
+  update public.profiles
+     set community_id = null
+   where auth_id = p_user_id;
+
+  if not found then
+    raise exception 'Erreur lors de la mise à jour du profil de l''utilisateur expulsé';
+  end if;
+
+  return jsonb_build_object('user_id', p_user_id, 'community_id', p_community_id);
+end;
+$$;
@@ -0,0 +1,82 @@
+-- 📌 Compteurs du profil en écriture différée (PROFILE_COUNTERS_WRITE_BEHIND=1).
+-- Les variantes *_deferred insèrent / suppriment le sticker sans toucher à la ligne
+-- profiles (plus de verrou sur une ligne chaude à chaque post) et renvoient les
+-- compteurs tels qu'enregistrés ; l'API accumule les deltas par auth_id et les
+-- applique par lots avec apply_profile_deltas (un seul UPDATE pour tout le lot).
+
+create or replace function public.add_sticker_deferred(p_sticker jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_sticker public.stickers%rowtype;
+  v_profile public.profiles%rowtype;
+begin
+  select * into v_profile
+    from public.profiles
+   where auth_id = (p_sticker->>'auth_id')::uuid;
+
+  if not found then
+    raise exception 'Profil non trouvé' using errcode = 'P0002';
+  end if;
+
+  insert into public.stickers (id, community_id, title, description, image_url, long, lat, auth_id)
+  select id, community_id, title, description, image_url, long, lat, auth_id
+    from jsonb_populate_record(null::public.stickers, p_sticker)
+  returning * into v_sticker;
+
+  return jsonb_build_object(
+    'sticker', to_jsonb(v_sticker),
+    'total_stickers', coalesce(v_profile.total_stickers, 0),
+    'score', coalesce(v_profile.score, 0)
+  );
+end;
+$$;
+
+create or replace function public.delete_sticker_deferred(p_id uuid)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_sticker public.stickers%rowtype;
+  v_profile public.profiles%rowtype;
+begin
+  delete from public.stickers where id = p_id
+  returning * into v_sticker;
+
+  if not found then
+    raise exception 'Sticker not found' using errcode = 'P0002';
+  end if;
+
+  select * into v_profile
+    from public.profiles
+   where auth_id = v_sticker.auth_id;
+
+  return jsonb_build_object(
+    'sticker', to_jsonb(v_sticker),
+    'total_stickers', v_profile.total_stickers,
+    'score', v_profile.score
+  );
+end;
+$$;
+
+-- p_deltas : [{"auth_id": ..., "total_stickers": +n, "score": +n}, ...]
+create or replace function public.apply_profile_deltas(p_deltas jsonb)
+returns jsonb
+language sql
+as $$
+  with deltas as (
+    select d.auth_id, sum(d.total_stickers) as total_stickers, sum(d.score) as score
+      from jsonb_to_recordset(p_deltas) as d(auth_id uuid, total_stickers bigint, score bigint)
+     group by d.auth_id
+  ),
+  bumped as (
+    update public.profiles p
+       set total_stickers = greatest(coalesce(p.total_stickers, 0) + d.total_stickers, 0),
+           score          = greatest(coalesce(p.score, 0) + d.score, 0)
+      from deltas d
+     where p.auth_id = d.auth_id
+    returning p.auth_id, p.total_stickers, p.score
+  )
+  select coalesce(jsonb_agg(to_jsonb(b)), '[]'::jsonb) from bumped;
+$$;
@@ -0,0 +1,32 @@
+-- 📌 Version des lignes lues par l'API : updated_at, tenu à jour par trigger à chaque
+-- UPDATE (y compris ceux des fonctions add_sticker, apply_profile_deltas, etc.).
+-- L'API en tire ses ETag : un 304 se décide sans encoder le corps de la réponse.
+
+alter table public.profiles add column if not exists updated_at timestamptz not null default now();
+alter table public.stickers add column if not exists updated_at timestamptz not null default now();
+alter table public.communities add column if not exists updated_at timestamptz not null default now();
+
+create or replace function public.set_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+  new.updated_at := clock_timestamp();
+  return new;
+end;
+$$;
+
+drop trigger if exists profiles_set_updated_at on public.profiles;
+create trigger profiles_set_updated_at
+  before update on public.profiles
+  for each row execute function public.set_updated_at();
+
+drop trigger if exists stickers_set_updated_at on public.stickers;
+create trigger stickers_set_updated_at
+  before update on public.stickers
+  for each row execute function public.set_updated_at();
+
+drop trigger if exists communities_set_updated_at on public.communities;
+create trigger communities_set_updated_at
+  before update on public.communities
+  for each row execute function public.set_updated_at();
@@ -0,0 +1,43 @@
+-- 📌 Insertion groupée en écriture différée des compteurs (PROFILE_COUNTERS_WRITE_BEHIND=1).
+-- Même insertion que add_stickers_batch, sans mise à jour de la ligne profiles : renvoie
+-- par auth_id le nombre de stickers insérés (n) et les compteurs tels qu'enregistrés ;
+-- l'API met les deltas en attente et les applique par lots (apply_profile_deltas).
+
+create or replace function public.add_stickers_batch_deferred(p_stickers jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_stickers jsonb;
+  v_profiles jsonb;
+begin
+  with candidates as (
+    select r.*
+      from jsonb_populate_recordset(null::public.stickers, p_stickers) r
+  ),
+  inserted as (
+    insert into public.stickers (id, community_id, title, description, image_url, long, lat, auth_id)
+    select c.id, c.community_id, c.title, c.description, c.image_url, c.long, c.lat, c.auth_id
+      from candidates c
+     where exists (select 1 from public.profiles p where p.auth_id = c.auth_id)
+       and exists (select 1 from public.communities k where k.id = c.community_id)
+    on conflict (id) do nothing
+    returning *
+  ),
+  counts as (
+    select auth_id, count(*) as n
+      from inserted
+     group by auth_id
+  ),
+  current as (
+    select p.auth_id, coalesce(p.total_stickers, 0) as total_stickers, coalesce(p.score, 0) as score, c.n
+      from public.profiles p
+      join counts c on c.auth_id = p.auth_id
+  )
+  select coalesce((select jsonb_agg(to_jsonb(i)) from inserted), '[]'::jsonb),
+         coalesce((select jsonb_agg(to_jsonb(k)) from current k), '[]'::jsonb)
+    into v_stickers, v_profiles;
+
+  return jsonb_build_object('stickers', v_stickers, 'profiles', v_profiles);
+end;
+$$;